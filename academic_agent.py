@@ -1,75 +1,208 @@
+import re
 import sqlite3
 import datetime
 import logging
+from database import get_database
+from academic_calendar import AcademicCalendar, normalize_event_type
+from metrics import request_log
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+# Common queries mapped to stored event types
+ACADEMIC_KEYWORDS = {
+    "academic calendar": "academic calendar",
+    "semester exams": "semester exams",
+    "backlog exams": "backlog exams",
+    "exam schedule": "semester exams",
+    "semester start": "academic calendar",
+    "semester calendar": "academic calendar",
+    "backlog exam": "backlog exams",
+    "exam date": "semester exams",
+}
+
+# Finds a known phrase inside a longer query ("generate bonafide and exam schedule").
+# The leftmost phrase wins; longer phrases are tried first at each position.
+ACADEMIC_KEYWORD_PATTERN = re.compile("|".join(re.escape(keyword) for keyword in
+                                               sorted(ACADEMIC_KEYWORDS, key=len, reverse=True)))
+
+# "upcoming" (from today on) or "next N days"
+RANGE_PATTERN = re.compile(r"\bupcoming\b|\bnext\s+(\d+)\s*days?\b")
+
+# Bump when create_database changes
+ACADEMIC_SCHEMA_VERSION = 1
+
+# Words ignored when looking for an event type or event name in a query
+STOP_WORDS = frozenset("a all an and any are at event events for from in is list me of on show the to what when "
+                       "which within".split())
+
+
 class AcademicAgent:
+    INTENTS = ("academic",)
+
     def __init__(self):
         self.db = "academic_data.db"
-        self.create_database()
+        self.database = get_database(self.db)
+        self.database.ensure_schema("academic", ACADEMIC_SCHEMA_VERSION, self.create_database)
+        # Missing when this SQLite build lacks FTS5; names are then matched in memory
+        self.full_text = self.database.fetchone("SELECT 1 FROM sqlite_master WHERE name='academic_events_fts'") is not None
+        self.calendar = AcademicCalendar(self.db)
 
     def create_database(self):
         """Creates the academic events database if it does not exist."""
-        conn = sqlite3.connect(self.db)
-        cursor = conn.cursor()
-        cursor.execute('''CREATE TABLE IF NOT EXISTS academic_events (
+        with self.database.transaction() as conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS academic_events (
                             id INTEGER PRIMARY KEY AUTOINCREMENT,
                             event_name TEXT UNIQUE,
                             event_date TEXT,
                             event_type TEXT
                         )''')
-        conn.commit()
-        conn.close()
+            # Normalized copy of event_type for indexed equality lookups, kept up to date by triggers
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(academic_events)")}
+            if "event_type_norm" not in columns:
+                conn.execute("ALTER TABLE academic_events ADD COLUMN event_type_norm TEXT")
+                conn.execute("UPDATE academic_events SET event_type_norm = lower(trim(event_type))")
+            conn.execute('''CREATE INDEX IF NOT EXISTS idx_academic_events_type_date
+                            ON academic_events (event_type_norm, event_date)''')
+            for event in ("INSERT", "UPDATE OF event_type"):
+                conn.execute(f'''CREATE TRIGGER IF NOT EXISTS academic_events_{event.split()[0].lower()}_normalize_type
+                                 AFTER {event} ON academic_events
+                                 WHEN NEW.event_type_norm IS NOT lower(trim(NEW.event_type))
+                                 BEGIN
+                                     UPDATE academic_events SET event_type_norm = lower(trim(NEW.event_type))
+                                     WHERE id = NEW.id;
+                                 END''')
+        try:
+            self.create_full_text_index()
+        except sqlite3.OperationalError as e:
+            logging.error(f"❌ Full-text search unavailable, matching event names in memory: {e}")
         logging.info("✅ Database verified: 'academic_events' table is ready.")
 
+    def create_full_text_index(self):
+        """Create the FTS5 index over event names, synced with academic_events by triggers."""
+        with self.database.transaction() as conn:
+            exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name='academic_events_fts'").fetchone()
+            conn.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS academic_events_fts
+                            USING fts5(event_name, content='academic_events', content_rowid='id')''')
+            conn.execute('''CREATE TRIGGER IF NOT EXISTS academic_events_fts_insert AFTER INSERT ON academic_events
+                            BEGIN
+                                INSERT INTO academic_events_fts (rowid, event_name) VALUES (NEW.id, NEW.event_name);
+                            END''')
+            conn.execute('''CREATE TRIGGER IF NOT EXISTS academic_events_fts_delete AFTER DELETE ON academic_events
+                            BEGIN
+                                INSERT INTO academic_events_fts (academic_events_fts, rowid, event_name)
+                                VALUES ('delete', OLD.id, OLD.event_name);
+                            END''')
+            conn.execute('''CREATE TRIGGER IF NOT EXISTS academic_events_fts_update AFTER UPDATE OF event_name ON academic_events
+                            BEGIN
+                                INSERT INTO academic_events_fts (academic_events_fts, rowid, event_name)
+                                VALUES ('delete', OLD.id, OLD.event_name);
+                                INSERT INTO academic_events_fts (rowid, event_name) VALUES (NEW.id, NEW.event_name);
+                            END''')
+            if not exists:
+                conn.execute("INSERT INTO academic_events_fts (academic_events_fts) VALUES ('rebuild')")
+
     def add_event(self, event_name, event_date, event_type):
         """Insert an academic event into the database if it doesn't exist."""
         try:
-            conn = sqlite3.connect(self.db)
-            cursor = conn.cursor()
-            cursor.execute("INSERT OR IGNORE INTO academic_events (event_name, event_date, event_type) VALUES (?, ?, ?)", 
-                           (event_name, event_date, event_type))
-            conn.commit()
-            conn.close()
+            with self.database.transaction() as conn:
+                conn.execute("INSERT OR IGNORE INTO academic_events (event_name, event_date, event_type) VALUES (?, ?, ?)", 
+                             (event_name, event_date, event_type))
             logging.info(f"✅ Event added: {event_name} on {event_date} ({event_type})")
         except sqlite3.Error as e:
             logging.error(f"❌ Database error while adding event: {e}")
+        finally:
+            self.calendar.invalidate()
+
+    def add_events(self, conn, events):
+        """Insert (event_name, event_date, event_type) rows inside the caller's transaction, skipping known names.
+
+        The normalized type is written with each row, so the normalizing trigger has nothing to do.
+        Returns the number of rows inserted; call calendar.invalidate() once the transaction commits.
+        """
+        cursor = conn.executemany("INSERT OR IGNORE INTO academic_events (event_name, event_date, event_type, "
+                                  "event_type_norm) VALUES (?, ?, ?, ?)",
+                                  ((name, date, event_type, normalize_event_type(event_type))
+                                   for name, date, event_type in events))
+        return cursor.rowcount
 
     def get_event(self, query):
         """Fetch academic events based on user query."""
         query = query.lower().strip()
-        conn = sqlite3.connect(self.db)
-        cursor = conn.cursor()
-
-        # Match query with known academic keywords
-        academic_keywords = {
-            "academic calendar": "academic calendar",
-            "semester exams": "semester exams",
-            "backlog exams": "backlog exams",
-            "exam schedule": "semester exams",
-            "semester start": "academic calendar"
-        }
-        search_type = academic_keywords.get(query, query)  # Map common queries to stored event types
-
-        cursor.execute("SELECT event_name, event_date FROM academic_events WHERE event_type LIKE ?", ('%' + search_type + '%',))
-        result = cursor.fetchall()
-        conn.close()
+        date_range = RANGE_PATTERN.search(query)
+        if date_range:
+            # Answers move with the date, so today is part of the cache key
+            today = datetime.date.today()
+            return self.calendar.response((query, today), lambda: self.events_in_range(query, date_range, today))
+        return self.calendar.response(query, lambda: self.find_events(query))
+
+    def search_type(self, query):
+        """Map common queries to stored event types; other queries are matched as given."""
+        match = ACADEMIC_KEYWORD_PATTERN.search(query)
+        return ACADEMIC_KEYWORDS[match.group()] if match else query
+
+    def find_events(self, query):
+        """Events whose type contains the query (after keyword mapping), else whose name matches it."""
+        search_type = self.search_type(query)
+        types = [event_type for event_type in self.calendar.event_types() if search_type in event_type]
+        if types:
+            placeholders = ",".join("?" * len(types))
+            result = self.database.fetchall(f"SELECT event_name, event_date FROM academic_events "
+                                            f"WHERE event_type_norm IN ({placeholders}) ORDER BY event_date, id", types)
+        else:
+            result = self.search_event_names(query)
+        return self.format_events(result)
 
+    def search_event_names(self, query):
+        """Full-text search of event names; every non-stop word must prefix-match a word of the name."""
+        words = [word for word in re.findall(r"\w+", query) if word not in STOP_WORDS]
+        if not words:
+            return []
+        if not self.full_text:
+            return [(event.event_name, event.event_date) for event in self.calendar.events()
+                    if all(word in event.event_name.lower() for word in words)]
+        match = " AND ".join(f'"{word}"*' for word in words)
+        return self.database.fetchall('''SELECT e.event_name, e.event_date FROM academic_events_fts
+                                         JOIN academic_events e ON e.id = academic_events_fts.rowid
+                                         WHERE academic_events_fts MATCH ? ORDER BY e.event_date, e.id''', (match,))
+
+    def events_in_range(self, query, date_range, today):
+        """Events from today on ("upcoming") or within the next N days, optionally of one type."""
+        end = today + datetime.timedelta(days=int(date_range.group(1))) if date_range.group(1) else None
+        events = self.calendar.events_between(today.isoformat(), end.isoformat() if end else None)
+
+        rest = " ".join(word for word in RANGE_PATTERN.sub(" ", query).split() if word not in STOP_WORDS)
+        if rest:
+            search_type = normalize_event_type(self.search_type(rest))
+            events = [event for event in events if search_type in event.event_type]
+        if not events:
+            return "❌ No academic events found in that period."
+        return self.format_events([(event.event_name, event.event_date) for event in events])
+
+    def format_events(self, result):
         if result:
-            response = "📅 Upcoming Academic Events:\n"
-            for event_name, event_date in result:
-                response += f"✅ {event_name} on {event_date}\n"
-            return response.strip()
+            lines = ["📅 Upcoming Academic Events:"]
+            lines.extend(f"✅ {event_name} on {event_date}" for event_name, event_date in result)
+            return "\n".join(lines).strip()
         else:
             return "❌ No academic events found. Try asking about 'semester exams' or 'backlog exams'."
 
-    def handle_query(self, user_id, query):
+    def handle_query(self, user_id, query, parsed=None):
         """Process user queries for academic events."""
-        logging.info(f"🎓 Handling academic query for user '{user_id}': {query}")
+        request_log.info("🎓 Handling academic query for user '%s': %s", user_id, query)
         return self.get_event(query)
 
+    def handle_batch(self, items):
+        """Answer (user_id, query, parsed) academic queries, looking up each distinct query once."""
+        answers = {}
+        responses = []
+        for user_id, query, parsed in items:
+            key = query.lower().strip()
+            if key not in answers:
+                answers[key] = self.get_event(query)
+            responses.append(answers[key])
+        return responses
+
 # Run the Academic Agent (Standalone Mode)
 if __name__ == "__main__":
     academic_agent = AcademicAgent()
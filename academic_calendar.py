@@ -0,0 +1,155 @@
+import sqlite3
+import bisect
+import threading
+import time
+import logging
+
+from database import get_database
+from metrics import get_metrics
+from records import CalendarEvent
+from response_cache import invalidate_responses
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Bump when create_version_table changes
+ACADEMIC_CALENDAR_SCHEMA_VERSION = 1
+
+METRICS = get_metrics()
+LOOKUPS = METRICS.counter("office_agent_academic_lookups_total", "Academic calendar responses by cache result",
+                          ("result",))
+CACHE_HITS = LOOKUPS.labels("hit")
+CACHE_MISSES = LOOKUPS.labels("miss")
+BUILD_SECONDS = METRICS.histogram("office_agent_agent_stage_seconds", "Time per stage inside an agent",
+                                  ("agent", "stage")).labels("academic", "build_response")
+
+
+def normalize_event_type(event_type):
+    """Normalize an event type the way the event_type_norm column stores it (e.g. ' Backlog Exams' -> 'backlog exams')."""
+    return (event_type or "").strip().lower()
+
+
+class AcademicCalendar:
+    """Sorted in-memory copy of academic_events with memoized responses.
+
+    The calendar changes a few times a semester, so it is loaded once per
+    version: `AcademicAgent.add_event` calls `invalidate()`, and writes from other
+    processes bump a trigger-maintained version that is polled at most once every
+    `check_interval` seconds. Date ranges are answered with bisect over the
+    sorted dates; responses built from them are memoized until the next change.
+    """
+
+    def __init__(self, db_path="academic_data.db", check_interval=1.0, max_responses=1024):
+        self.db_path = db_path
+        self.database = get_database(db_path)
+        self.check_interval = check_interval
+        self.max_responses = max_responses
+        self._lock = threading.RLock()
+        self._version = None
+        self._next_check = 0.0
+        self._events = None  # list of CalendarEvent sorted by date, loaded on first use
+        self._dates = []
+        self._types = ()
+        self._responses = {}
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.database.ensure_schema("academic_calendar", ACADEMIC_CALENDAR_SCHEMA_VERSION, self.create_version_table)
+
+    def create_version_table(self):
+        """Create the version counter bumped by any write to the academic_events table."""
+        with self.database.transaction() as conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS academic_calendar_version (
+                                id INTEGER PRIMARY KEY CHECK (id = 1),
+                                version INTEGER NOT NULL
+                            )''')
+            conn.execute("INSERT OR IGNORE INTO academic_calendar_version (id, version) VALUES (1, 0)")
+            for event in ("INSERT", "UPDATE", "DELETE"):
+                conn.execute(f'''CREATE TRIGGER IF NOT EXISTS academic_events_{event.lower()}_bump_version
+                                 AFTER {event} ON academic_events
+                                 BEGIN
+                                     UPDATE academic_calendar_version SET version = version + 1 WHERE id = 1;
+                                 END''')
+
+    def _refresh(self):
+        """Poll the version and (re)load the calendar if needed; caller holds the lock."""
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval
+            try:
+                row = self.database.fetchone("SELECT version FROM academic_calendar_version WHERE id = 1")
+            except sqlite3.Error:
+                row = None
+            version = row[0] if row else None
+            if version != self._version:
+                self._version = version
+                self._events = None
+        if self._events is None:
+            # Streamed from the cursor: no list of row tuples alongside the events while loading
+            rows = self.database.execute("SELECT event_date, event_name, event_type_norm FROM academic_events "
+                                         "ORDER BY event_date, id")
+            dates = {}  # events on the same day share one date string
+            self._events = [CalendarEvent(dates.setdefault(event_date, event_date), event_name, event_type)
+                            for event_date, event_name, event_type in rows]
+            self._dates = [event.event_date for event in self._events]
+            self._types = tuple(sorted({event.event_type for event in self._events if event.event_type}))
+            self._responses.clear()
+            self.reloads += 1
+            invalidate_responses(("academic",))  # router-level cached answers were built from the old calendar
+
+    def invalidate(self):
+        """Drop the loaded calendar and memoized responses after a write in this process."""
+        with self._lock:
+            self._events = None
+            self._responses.clear()
+            self._next_check = 0.0
+
+    def event_types(self):
+        """Distinct normalized event types, sorted."""
+        with self._lock:
+            self._refresh()
+            return self._types
+
+    def events(self):
+        """Every event, sorted by date."""
+        with self._lock:
+            self._refresh()
+            return list(self._events)
+
+    def events_between(self, start, end):
+        """Events dated from `start` to `end` inclusive (ISO date strings; None leaves a side open)."""
+        with self._lock:
+            self._refresh()
+            low = bisect.bisect_left(self._dates, start) if start else 0
+            high = bisect.bisect_right(self._dates, end) if end else len(self._dates)
+            return self._events[low:high]
+
+    def response(self, key, build):
+        """Return the memoized response for `key`, calling `build()` to create it on a miss."""
+        with self._lock:
+            self._refresh()
+            response = self._responses.get(key)
+            if response is not None:
+                self.hits += 1
+                CACHE_HITS.inc()
+                return response
+            self.misses += 1
+            CACHE_MISSES.inc()
+            with BUILD_SECONDS.time():
+                response = build()
+            if len(self._responses) >= self.max_responses:
+                self._responses.clear()
+            self._responses[key] = response
+            return response
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "events": len(self._events or ()),
+                "responses": len(self._responses),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "reloads": self.reloads,
+            }
@@ -0,0 +1,88 @@
+import importlib
+import threading
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Built-in agents as (module, class, intents declared in the class's INTENTS).
+# Listed here so they can be routed to before their module is imported.
+AGENT_CLASSES = (
+    ("leave_agent", "LeaveAgent", ("leave",)),
+    ("certificates_agent", "CertificateAgent", ("certificate",)),
+    ("academic_agent", "AcademicAgent", ("academic",)),
+)
+
+
+class AgentRegistry:
+    """Agents by intent, each imported and constructed the first time it is routed to.
+
+    Agents declare the intents they handle in an INTENTS class attribute; an agent
+    declaring several intents is constructed once and shared. Plug-ins are added
+    with register() (an instance) or register_class() (imported lazily).
+
+    A short-lived worker that only answers calendar queries never imports fpdf or
+    opens leave_requests.db. Construction happens under a lock so concurrent first
+    requests (server mode) share one instance.
+    """
+
+    def __init__(self, agent_classes=AGENT_CLASSES):
+        self.agent_classes = {}  # intent -> (module, class)
+        self._agents = {}        # intent -> agent
+        self._instances = {}     # (module, class) -> agent
+        self._lock = threading.Lock()
+        for module_name, class_name, intents in agent_classes:
+            self.register_class(module_name, class_name, intents)
+
+    def __contains__(self, intent):
+        return intent in self.agent_classes
+
+    def __iter__(self):
+        return iter(self.agent_classes)
+
+    def __getitem__(self, intent):
+        agent = self._agents.get(intent)
+        if agent is None:
+            with self._lock:
+                agent = self._agents.get(intent)
+                if agent is None:
+                    spec = self.agent_classes[intent]
+                    agent = self._instances.get(spec)
+                    if agent is None:
+                        module_name, class_name = spec
+                        agent_class = getattr(importlib.import_module(module_name), class_name)
+                        agent = self._instances[spec] = agent_class()
+                        logging.info(f"✅ Loaded {class_name} for {', '.join(agent_class.INTENTS)}.")
+                    self._agents[intent] = agent
+        return agent
+
+    def get(self, intent, default=None):
+        """Return the agent for an intent, creating it if needed; `default` for unknown intents."""
+        if intent not in self.agent_classes:
+            return default
+        return self[intent]
+
+    def register(self, agent, intents=None):
+        """Route `intents` (by default the agent's declared INTENTS) to an already constructed agent."""
+        spec = (type(agent).__module__, type(agent).__name__)
+        with self._lock:
+            self._instances[spec] = agent
+            for intent in intents or agent.INTENTS:
+                self.agent_classes[intent] = spec
+                self._agents[intent] = agent
+
+    def register_class(self, module_name, class_name, intents):
+        """Route intents to an agent class that is imported and constructed on first use."""
+        with self._lock:
+            for intent in intents:
+                self.agent_classes[intent] = (module_name, class_name)
+                self._agents.pop(intent, None)
+
+    def loaded(self):
+        """Agents constructed so far, by intent."""
+        return dict(self._agents)
+
+    def preload(self, intents=None):
+        """Construct agents up front (long-running servers), all of them by default."""
+        for intent in intents or list(self.agent_classes):
+            self[intent]
@@ -0,0 +1,6 @@
+"""Benchmarks for the office agent pipeline.
+
+Run from the repository root, e.g. ``python -m benchmarks.db_pool``.
+``python -m benchmarks.suite`` runs the end-to-end scenarios on a synthetic
+dataset and can save results as JSON and compare them against an earlier run.
+"""
@@ -0,0 +1,73 @@
+"""Academic event lookup latency: LIKE scan vs the cached, indexed AcademicAgent.
+
+Seeds a scratch academic_events table (a large multi-campus calendar), then times
+the old `event_type LIKE '%...%'` query plus response formatting against
+AcademicAgent.get_event for the common "exam schedule" query, a free-text event
+name search and the "next 30 days" range.
+
+Usage: python -m benchmarks.academic_events [--events 50000] [--lookups 20000]
+"""
+import argparse
+import datetime
+import random
+import sqlite3
+
+from benchmarks.common import scratch_workdir, summarize, print_summary, timed_calls
+
+EVENT_TYPES = ("semester exams", "backlog exams", "academic calendar", "workshop", "holiday", "sports")
+
+
+def seed_events(path, count, seed=12):
+    rng = random.Random(seed)
+    first_day = datetime.date.today() - datetime.timedelta(days=365)
+    conn = sqlite3.connect(path)
+    conn.execute('''CREATE TABLE academic_events (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        event_name TEXT,
+                        event_date TEXT,
+                        event_type TEXT
+                    )''')
+    conn.executemany("INSERT INTO academic_events (event_name, event_date, event_type) VALUES (?, ?, ?)",
+                     ((f"{event_type.title()} {i} Campus {i % 40}",
+                       (first_day + datetime.timedelta(days=rng.randrange(730))).isoformat(), event_type)
+                      for i, event_type in ((i, rng.choice(EVENT_TYPES)) for i in range(count))))
+    conn.commit()
+    conn.close()
+
+
+def legacy_get_event(conn, search_type):
+    result = conn.execute("SELECT event_name, event_date FROM academic_events WHERE event_type LIKE ?",
+                          ('%' + search_type + '%',)).fetchall()
+    response = "📅 Upcoming Academic Events:\n"
+    for event_name, event_date in result:
+        response += f"✅ {event_name} on {event_date}\n"
+    return response.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=50000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--legacy-lookups", type=int, default=200, help="the LIKE scan is slow; sample fewer")
+    args = parser.parse_args()
+
+    from academic_agent import AcademicAgent
+
+    print(f"{args.events} academic events\n")
+    with scratch_workdir():
+        seed_events("academic_data.db", args.events)
+        conn = sqlite3.connect("academic_data.db")
+        print_summary("LIKE scan + formatting (before)",
+                      summarize(*timed_calls(legacy_get_event, [(conn, "semester exams")] * args.legacy_lookups)))
+        conn.close()
+
+        agent = AcademicAgent()
+        for query in ("exam schedule", "campus 7 workshop", "events in the next 30 days"):
+            latencies, elapsed = timed_calls(agent.get_event, [(query,)] * args.lookups)
+            print_summary(f"get_event({query!r})", summarize(latencies, elapsed))
+            print(f"{'  first call (cache miss)':<40} {latencies[0] * 1000:9.4f} ms")
+        print(f"\ncalendar cache: {agent.calendar.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Bulk replay throughput: route_query one at a time vs MasterAgent.route_batch.
+
+Replays a day-end backlog of leave, certificate-verification and calendar queries
+from many users against a scratch database, once per mode. A few malformed
+requests are mixed in: each must fail alone, so both modes must give the same
+responses (checked before reporting).
+
+Usage: python -m benchmarks.batch_route [--requests 20000] [--chunk-size 1000]
+"""
+import argparse
+import random
+import time
+
+from benchmarks.common import scratch_workdir, seed_users
+
+QUERIES = [
+    (0.6, "EMP", "apply {n} days casual leave"),
+    (0.1, "EMP", "apply sick leave 2025-{m:02d}-10 2025-{m:02d}-11"),
+    (0.15, "EMP", "check noc"),
+    (0.15, "STU", "exam schedule"),
+    (0.005, "EMP", "sick leave 99999999999 days"),  # out of range dates: must not fail the rest of its chunk
+]
+
+
+def make_backlog(count, users, seed=5):
+    rng = random.Random(seed)
+    weights = [weight for weight, _, _ in QUERIES]
+    backlog = []
+    for _ in range(count):
+        _, prefix, template = rng.choices(QUERIES, weights)[0]
+        user_id = f"{prefix}{rng.randrange(users // 2):06d}"
+        backlog.append((user_id, template.format(n=rng.randrange(1, 4), m=rng.randrange(1, 13))))
+    return backlog
+
+
+def run(mode, backlog, users, chunk_size):
+    from master_agent import MasterAgent
+
+    with scratch_workdir():
+        seed_users("users.db", users)
+        master = MasterAgent()
+        started = time.perf_counter()
+        if mode == "sequential":
+            responses = [master.route_query(user_id, query) for user_id, query in backlog]
+        else:
+            responses = list(master.route_batch(backlog, chunk_size))
+        elapsed = time.perf_counter() - started
+    return elapsed, responses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    backlog = make_backlog(args.requests, args.users)
+    sequential_time, sequential = run("sequential", backlog, args.users, args.chunk_size)
+    batch_time, batched = run("batch", backlog, args.users, args.chunk_size)
+    if sequential != batched:
+        raise SystemExit("route_batch responses differ from route_query")
+
+    print(f"{args.requests} queued requests, {args.users} users")
+    for label, elapsed in (("route_query one at a time", sequential_time), ("route_batch", batch_time)):
+        print(f"{label:<28} {elapsed:7.2f} s   {args.requests / elapsed:>9.0f} requests/s")
+
+
+if __name__ == "__main__":
+    main()
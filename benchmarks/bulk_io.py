@@ -0,0 +1,83 @@
+"""Bulk import and export throughput with bulk_io.py.
+
+Writes synthetic CSV files (users, leave history, events) into a scratch
+directory, imports them into empty databases (indexes deferred), then imports a
+second leave file into the now non-empty table with indexes kept, and exports
+every table as JSONL. Reports rows/s; with --trace-memory also the peak Python
+memory of each step, which should stay flat as --rows grows.
+
+Usage: python -m benchmarks.bulk_io [--rows 1000000] [--chunk-size 50000] [--trace-memory]
+"""
+import argparse
+import csv
+import datetime
+import random
+import time
+import tracemalloc
+
+from benchmarks.common import scratch_workdir
+
+
+def write_csv(path, header, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def leave_rows(count, employees, rng):
+    first_day = datetime.date(2020, 1, 1)
+    for _ in range(count):
+        start = first_day + datetime.timedelta(days=rng.randrange(2000))
+        yield (f"EMP{rng.randrange(employees):07d}", rng.choice(("casual", "sick", "vacation")), start.isoformat(),
+               (start + datetime.timedelta(days=rng.choice((0, 0, 1, 2)))).isoformat(),
+               rng.choices(("Approved", "Rejected", "Revoked"), (0.8, 0.15, 0.05))[0])
+
+
+def measure(label, fn, trace_memory):
+    """Run fn() (returning a row count) and print its throughput, and its peak memory if traced."""
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    rows = fn()
+    elapsed = time.perf_counter() - started
+    line = f"{label:<40} {rows:>9} rows {elapsed:>7.2f} s {rows / elapsed:>12,.0f} rows/s"
+    if trace_memory:
+        line += f"   peak {tracemalloc.get_traced_memory()[1] / 1024:>8.0f} KB"
+        tracemalloc.stop()
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000, help="users and leave rows per file")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--trace-memory", action="store_true", help="report peak memory (tracemalloc slows every step)")
+    args = parser.parse_args()
+
+    import bulk_io
+
+    rng = random.Random(42)
+    employees = args.rows // 2
+    events = max(1, args.rows // 100)
+    with scratch_workdir():
+        write_csv("users.csv", bulk_io.COLUMNS["users"],
+                  ((f"EMP{i:07d}", f"Employee {i}", "Employee") if i < employees else
+                   (f"STU{i:07d}", f"Student {i}", "Student") for i in range(args.rows)))
+        write_csv("leave.csv", bulk_io.COLUMNS["leave_requests"], leave_rows(args.rows, employees, rng))
+        write_csv("leave_more.csv", bulk_io.COLUMNS["leave_requests"], leave_rows(args.rows // 10, employees, rng))
+        write_csv("events.csv", bulk_io.COLUMNS["academic_events"],
+                  ((f"Event {i} Campus {i % 40}", (datetime.date(2024, 1, 1) + datetime.timedelta(days=i % 730)).isoformat(),
+                    rng.choice(("Semester Exams", "Backlog Exams", "Workshop", "Holiday"))) for i in range(events)))
+
+        for label, table, path in (("import users (empty table)", "users", "users.csv"),
+                                   ("import leave_requests (empty, ledger)", "leave_requests", "leave.csv"),
+                                   ("import leave_requests (indexes kept)", "leave_requests", "leave_more.csv"),
+                                   ("import academic_events (FTS)", "academic_events", "events.csv")):
+            measure(label, lambda: bulk_io.import_file(table, path, chunk_size=args.chunk_size)["written"], args.trace_memory)
+        for table in bulk_io.COLUMNS:
+            measure(f"export {table} (jsonl)", lambda: bulk_io.export_file(table, f"{table}.jsonl"), args.trace_memory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Certificate burst: response latency with inline rendering vs the background queue.
+
+Seeds a scratch users table with students, then sends a burst of
+"generate bonafide" requests through MasterAgent.route_query twice: once
+rendering inline (the response waits for the PDF), once with a
+certificate_queue (the response carries a ticket). For the queued run it also
+reports how long the workers take to drain the burst.
+
+Usage: python -m benchmarks.certificate_queue [--requests 1000] [--workers 2]
+"""
+import argparse
+import time
+
+from benchmarks.common import print_summary, scratch_workdir, seed_users, summarize, timed_calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=2, help="queue worker threads")
+    args = parser.parse_args()
+
+    from certificate_queue import configure_certificate_queue, close_certificate_queue
+    from master_agent import MasterAgent
+    from metrics import set_request_logging
+
+    set_request_logging(False)
+    print(f"burst of {args.requests} bonafide requests")
+    for label in ("inline rendering", f"queued, {args.workers} workers"):
+        with scratch_workdir():
+            students = seed_users("users.db", args.requests, prefix_split=0)
+            queue = configure_certificate_queue(args.workers, poll_interval=0.1) if label.startswith("queued") else None
+            master = MasterAgent(preload=True)
+            started = time.perf_counter()
+            latencies, elapsed = timed_calls(master.route_query, [(user_id, "generate bonafide") for user_id in students])
+            print_summary(f"route_query, {label}", summarize(latencies, elapsed))
+            if queue:
+                while any(queue.depth()[state] for state in ("pending", "running")):
+                    time.sleep(0.01)
+                drained = time.perf_counter() - started
+                print(f"{'  all certificates rendered after':<40} {drained:.2f} s "
+                      f"({args.requests / drained:.0f} certificates/s)")
+                close_certificate_queue()
+            master.close()
+    set_request_logging(True)
+
+
+if __name__ == "__main__":
+    main()
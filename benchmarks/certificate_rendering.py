@@ -0,0 +1,50 @@
+"""Bonafide-rush throughput: certificates per second at 1, 4 and N render workers.
+
+Seeds a scratch users table with students, then times:
+  * CertificateAgent.generate_certificate called once per student (request path)
+  * CertificateAgent.generate_certificates bulk API with 1, 4 and N workers
+
+Usage: python -m benchmarks.certificate_rendering [--students 2000] [--workers 1,4,8]
+"""
+import argparse
+import os
+import time
+
+from benchmarks.common import scratch_workdir, seed_users
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--workers", default=f"1,4,{os.cpu_count() or 1}")
+    args = parser.parse_args()
+
+    from certificates_agent import CertificateAgent
+
+    worker_counts = sorted({int(w) for w in args.workers.split(",")})
+    print(f"{args.students} bonafide certificates")
+    with scratch_workdir():
+        students = [user_id for user_id in seed_users("users.db", args.students, prefix_split=0)]
+
+        agent = CertificateAgent(render_workers=1)
+        started = time.perf_counter()
+        for user_id in students:
+            agent.generate_certificate(user_id, "bonafide")
+        elapsed = time.perf_counter() - started
+        print(f"{'generate_certificate per request':<36} {args.students / elapsed:>9.0f} certificates/s")
+
+        for workers in worker_counts:
+            agent = CertificateAgent(render_workers=workers)
+            if workers > 1:
+                agent.generate_certificates(students[:workers * 2], "bonafide")  # start the pool
+            started = time.perf_counter()
+            responses = agent.generate_certificates(students, "bonafide")
+            elapsed = time.perf_counter() - started
+            agent.renderer.close()
+            failed = sum(1 for r in responses if not r.startswith("✅"))
+            print(f"{'generate_certificates, ' + str(workers) + ' workers':<36} {args.students / elapsed:>9.0f} "
+                  f"certificates/s" + (f"   ({failed} failed)" if failed else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import os
+import time
+import sqlite3
+import logging
+import tempfile
+from contextlib import contextmanager
+
+import database
+import response_cache
+import user_directory
+
+
+def percentile(samples, pct):
+    """Return the pct-th percentile of a list of samples (nearest rank)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples, elapsed=None):
+    """Summarize per-operation latencies (in seconds) as milliseconds."""
+    count = len(samples)
+    elapsed = elapsed if elapsed is not None else sum(samples)
+    return {
+        "count": count,
+        "mean_ms": round(sum(samples) / count * 1000, 4) if count else 0.0,
+        "p50_ms": round(percentile(samples, 50) * 1000, 4),
+        "p99_ms": round(percentile(samples, 99) * 1000, 4),
+        "per_second": round(count / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def timed_calls(fn, args_list):
+    """Call fn once per argument tuple, returning (latencies, total elapsed)."""
+    latencies = []
+    started = time.perf_counter()
+    for args in args_list:
+        t0 = time.perf_counter()
+        fn(*args)
+        latencies.append(time.perf_counter() - t0)
+    return latencies, time.perf_counter() - started
+
+
+def print_summary(label, summary):
+    print(f"{label:<40} mean {summary['mean_ms']:>9.4f} ms   p50 {summary['p50_ms']:>9.4f} ms   "
+          f"p99 {summary['p99_ms']:>9.4f} ms   {summary['per_second']:>10.1f}/s")
+
+
+@contextmanager
+def scratch_workdir():
+    """Run the block inside a temporary working directory with fresh database pools.
+
+    The agents open their databases relative to the working directory, so this
+    keeps benchmarks away from the real ``*.db`` files.
+    """
+    previous = os.getcwd()
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory(prefix="office-agent-bench-") as workdir:
+        os.chdir(workdir)
+        try:
+            yield workdir
+        finally:
+            database.close_all()
+            user_directory.clear_user_directories()
+            response_cache.clear_response_cache()
+            os.chdir(previous)
+            logging.disable(logging.NOTSET)
+
+
+def seed_users(path, count, prefix_split=0.5):
+    """Create the users table and insert `count` synthetic employees and students."""
+    conn = sqlite3.connect(path)
+    conn.execute('''CREATE TABLE IF NOT EXISTS users (
+                        user_id TEXT PRIMARY KEY,
+                        name TEXT NOT NULL,
+                        role TEXT CHECK(role IN ('Employee', 'Student')) NOT NULL
+                    )''')
+    employees = int(count * prefix_split)
+    rows = [(f"EMP{i:06d}", f"Employee {i}", "Employee") for i in range(employees)]
+    rows += [(f"STU{i:06d}", f"Student {i}", "Student") for i in range(count - employees)]
+    conn.executemany("INSERT OR IGNORE INTO users (user_id, name, role) VALUES (?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+    return [row[0] for row in rows]
@@ -0,0 +1,97 @@
+"""Synthetic, seeded datasets for the benchmark suite.
+
+build_dataset() fills the scratch working directory with the three agent
+databases at campus scale: tens of thousands of users, several years of leave
+history with a balance ledger to match, a multi-campus academic calendar and
+previously issued certificates (records only, no PDF files). The same seed
+always produces the same rows.
+"""
+import datetime
+import random
+import sqlite3
+from typing import NamedTuple
+
+from benchmarks.common import seed_users
+
+LEAVE_TYPES = ("casual", "sick", "vacation")
+EVENT_TYPES = ("semester exams", "backlog exams", "academic calendar", "workshop", "holiday", "sports")
+
+
+class Dataset(NamedTuple):
+    """Sizes of a generated dataset, recorded with the results."""
+    students: int
+    employees: int
+    leave_rows: int
+    events: int
+    certificates: int
+    seed: int
+
+
+def seed_leave_history(path, rows, employees, rng, years=3):
+    """Past leave requests: short ranges, mostly approved, spread over `years` before today."""
+    first_day = datetime.date.today() - datetime.timedelta(days=365 * years)
+
+    def generate():
+        for _ in range(rows):
+            start = first_day + datetime.timedelta(days=rng.randrange(365 * years))
+            end = start + datetime.timedelta(days=rng.choice((0, 0, 0, 1, 1, 2, 4)))
+            status = rng.choices(("Approved", "Rejected", "Revoked"), (0.8, 0.15, 0.05))[0]
+            yield (f"EMP{rng.randrange(employees):06d}", rng.choice(LEAVE_TYPES), start.isoformat(),
+                   end.isoformat(), status)
+
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.executemany("INSERT INTO leave_requests (employee_id, leave_type, start_date, end_date, status) "
+                         "VALUES (?, ?, ?, ?, ?)", generate())
+    conn.close()
+
+
+def seed_events(path, count, rng):
+    """Calendar events over the past and coming year, across 40 campuses."""
+    first_day = datetime.date.today() - datetime.timedelta(days=365)
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO academic_events (event_name, event_date, event_type) VALUES (?, ?, ?)",
+                         ((f"{event_type.title()} {i} Campus {i % 40}",
+                           (first_day + datetime.timedelta(days=rng.randrange(730))).isoformat(), event_type.title())
+                          for i, event_type in ((i, rng.choice(EVENT_TYPES)) for i in range(count))))
+    conn.close()
+
+
+def seed_certificates(path, count, students, employees, rng):
+    """Issued certificate records for a sample of users (bonafide for students, NOC for employees)."""
+    first_day = datetime.date.today() - datetime.timedelta(days=365)
+    rows = {}
+    for _ in range(count):
+        if rng.random() < 0.7:
+            user_id, certificate_type = f"STU{rng.randrange(students):06d}", "bonafide"
+        else:
+            user_id, certificate_type = f"EMP{rng.randrange(employees):06d}", "noc"
+        issue_date = (first_day + datetime.timedelta(days=rng.randrange(365))).isoformat()
+        rows[(user_id, certificate_type, issue_date)] = f"certificates/{user_id}_{certificate_type}_{issue_date}.pdf"
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO certificates (user_id, certificate_type, issue_date, certificate_path) "
+                         "VALUES (?, ?, ?, ?)", (key + (path,) for key, path in rows.items()))
+    conn.close()
+    return len(rows)
+
+
+def build_dataset(users=20000, employee_share=0.3, leave_rows=100000, events=5000, certificates=10000, seed=42):
+    """Create and fill the agent databases in the current (scratch) directory; returns a Dataset."""
+    from leave_agent import LeaveAgent
+    from certificates_agent import CertificateAgent
+    from academic_agent import AcademicAgent
+
+    rng = random.Random(seed)
+    employees = int(users * employee_share)
+    seed_users("users.db", users, prefix_split=employee_share)
+    # Let the agents create their schemas (indexes, triggers, FTS) before bulk loading
+    leave_agent = LeaveAgent()
+    CertificateAgent()
+    AcademicAgent()
+    seed_leave_history("leave_requests.db", leave_rows, employees, rng)
+    leave_agent.rebuild_leave_balances()
+    seed_events("academic_data.db", events, rng)
+    issued = seed_certificates("users.db", certificates, users - employees, employees, rng)
+    return Dataset(users - employees, employees, leave_rows, events, issued, seed)
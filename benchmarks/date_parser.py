@@ -0,0 +1,130 @@
+"""Throughput and coverage of date_parser.parse_period on leave queries.
+
+The corpus mixes the old "N days" and ISO-date requests with natural phrasings
+("next monday", "from 3rd to 5th march", "next week", "3 days starting
+friday"). "before" is the old extraction (parse_query slots: N days from today
+or two ISO dates); "uncached" parses every query from scratch; "cached" is
+parse_period as the leave agent calls it, where repeated phrasings (most of a
+real stream, --distinct of them here) are memoized. Each row reports how many
+queries yielded a period. The clock is pinned so runs are comparable, and
+CHECKS (phrasings with the period they must give on a pinned day) are verified
+before timing.
+
+Usage: python -m benchmarks.date_parser [--queries 200000] [--distinct 5000]
+"""
+import argparse
+import datetime
+import random
+import time
+
+import date_parser
+from intent_parser import parse_query
+
+TEMPLATES = [
+    "apply {n} days {leave} leave",
+    "{leave} leave from {iso1} to {iso2}",
+    "{leave} leave tomorrow",
+    "{leave} leave day after tomorrow",
+    "{leave} leave next {weekday}",
+    "{leave} leave on {weekday}",
+    "{leave} leave from {d1}{suffix} to {d2}{suffix} {month}",
+    "{leave} leave {d1}-{d2} {month}",
+    "{leave} leave {month} {d1} to {d2}",
+    "{leave} leave on {d1} {month} {year}",
+    "{leave} leave next week",
+    "{n} days {leave} leave starting {weekday}",
+    "{leave} leave for {w} weeks from next {weekday}",
+    "{leave} leave in {w} weeks",
+    "{leave} leave on the {d1}th",
+    "{leave} leave this week",
+    "{leave} leave next {weekday} to next {weekday}",
+]
+# (query, asked on, expected (start, end) or None); 2026-10-14 is a Wednesday, 2026-10-17 a Saturday
+CHECKS = [
+    ("casual leave next friday to next monday", "2026-10-14", ("2026-10-16", "2026-10-19")),
+    ("casual leave next friday to next monday", "2026-10-17", ("2026-10-23", "2026-10-26")),
+    ("sick leave tomorrow to friday", "2026-10-16", ("2026-10-17", "2026-10-23")),
+    ("vacation leave this week", "2026-10-14", ("2026-10-14", "2026-10-16")),
+    ("vacation leave this week", "2026-10-17", ("2026-10-19", "2026-10-23")),
+    ("vacation leave this week", "2026-10-18", ("2026-10-19", "2026-10-23")),
+    ("vacation leave next week", "2026-10-14", ("2026-10-19", "2026-10-23")),
+    ("casual leave from 3rd to 5th march", "2026-10-14", ("2027-03-03", "2027-03-05")),
+    ("casual leave 3 days starting friday", "2026-10-14", ("2026-10-16", "2026-10-18")),
+    ("casual leave 2026-10-20 to 2026-10-19", "2026-10-14", None),
+    ("sick leave 99999999999 days", "2026-10-14", None),
+    ("casual leave 10th to 2nd march", "2026-10-14", None),
+    ("casual leave march 10 to 2", "2026-10-14", None),
+    ("vacation leave 28th dec to 3rd jan", "2026-10-14", ("2026-12-28", "2027-01-03")),
+    ("vacation leave 30th nov to 2nd dec", "2026-10-14", ("2026-11-30", "2026-12-02")),
+    ("sick leave in 99999999999 weeks", "2026-10-14", None),
+]
+MONTH_NAMES = ("january", "february", "march", "april", "may", "june", "july", "august", "september", "october",
+               "november", "december")
+
+
+def make_corpus(count, distinct, seed=5):
+    rng = random.Random(seed)
+    phrasings = []
+    for _ in range(distinct):
+        month = rng.randrange(1, 13)
+        d1 = rng.randrange(1, 20)
+        phrasings.append(rng.choice(TEMPLATES).format(
+            n=rng.randrange(1, 10), w=rng.randrange(1, 3), leave=rng.choice(["casual", "sick", "vacation"]),
+            iso1=f"2027-{month:02d}-{d1:02d}", iso2=f"2027-{month:02d}-{d1 + rng.randrange(0, 5):02d}",
+            weekday=rng.choice(date_parser.WEEKDAYS), d1=d1, d2=d1 + rng.randrange(0, 5), suffix=rng.choice(["", "th"]),
+            month=rng.choice(MONTH_NAMES), year=2027,
+        ))
+    return [rng.choice(phrasings) for _ in range(count)]
+
+
+def legacy(query, today):
+    parsed = parse_query(query)
+    if parsed.days is not None:
+        return today, today + datetime.timedelta(days=parsed.days - 1)
+    if len(parsed.dates) == 2:
+        start, end = (datetime.datetime.strptime(date, "%Y-%m-%d").date() for date in parsed.dates)
+        return (start, end) if end >= start else None
+    return None
+
+
+def check():
+    """Raise SystemExit listing every CHECKS phrasing that parses to the wrong period."""
+    failures = []
+    for query, asked_on, expected in CHECKS:
+        expected = expected and tuple(datetime.date.fromisoformat(date) for date in expected)
+        period = date_parser.parse_period(query, datetime.date.fromisoformat(asked_on))
+        if period != expected:
+            failures.append(f"  {query!r} on {asked_on}: {period}, expected {expected}")
+    if failures:
+        raise SystemExit("date_parser checks failed:\n" + "\n".join(failures))
+    print(f"{len(CHECKS)} phrasing checks passed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200000)
+    parser.add_argument("--distinct", type=int, default=5000, help="distinct phrasings in the stream")
+    args = parser.parse_args()
+
+    check()
+    today = datetime.date(2026, 10, 14)
+    date_parser.set_clock(lambda: today)
+    corpus = make_corpus(args.queries, args.distinct)
+    texts = [query.lower() for query in corpus]
+    uncached = date_parser._parse.__wrapped__
+
+    print(f"{len(corpus)} leave queries, {len(set(corpus))} distinct")
+    for label, fn in (("parse_query slots (before)", lambda: [legacy(query, today) for query in corpus]),
+                      ("date_parser uncached", lambda: [uncached(text, today) for text in texts]),
+                      ("date_parser cached", lambda: [date_parser.parse_period(query) for query in corpus])):
+        started = time.perf_counter()
+        periods = fn()
+        elapsed = time.perf_counter() - started
+        understood = sum(period is not None for period in periods)
+        print(f"{label:<28} {elapsed / len(corpus) * 1e6:7.2f} us/query {len(corpus) / elapsed:>10.0f} queries/s"
+              f"   {understood / len(corpus):6.1%} understood")
+    print(f"cache: {date_parser.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Per-query latency of connect-per-query SQLite access vs the shared connection pool.
+
+A routed leave request touches SQLite three times: the role lookup in
+``MasterAgent.validate_user``, ``LeaveAgent.check_conflict`` and
+``LeaveAgent.store_leave_request``. This benchmark replays that pattern the old
+way (a fresh ``sqlite3.connect()`` per statement) and through ``database.Database``,
+then drives ``MasterAgent.route_query`` end to end.
+
+Usage: python -m benchmarks.db_pool [--requests 3000] [--users 5000]
+"""
+import argparse
+import datetime
+import random
+import sqlite3
+import time
+
+from benchmarks.common import scratch_workdir, seed_users, summarize, print_summary
+from database import get_database
+
+LEAVE_SCHEMA = '''CREATE TABLE IF NOT EXISTS leave_requests (
+                      id INTEGER PRIMARY KEY AUTOINCREMENT,
+                      employee_id TEXT,
+                      leave_type TEXT,
+                      start_date TEXT,
+                      end_date TEXT,
+                      status TEXT
+                  )'''
+SELECT_ROLE = "SELECT role FROM users WHERE user_id=?"
+SELECT_CONFLICT = '''SELECT * FROM leave_requests WHERE employee_id=? AND status='Approved'
+                     AND ((start_date BETWEEN ? AND ?) OR (end_date BETWEEN ? AND ?)
+                     OR (? BETWEEN start_date AND end_date))'''
+INSERT_LEAVE = '''INSERT INTO leave_requests (employee_id, leave_type, start_date, end_date, status)
+                  VALUES (?, ?, ?, ?, ?)'''
+
+
+def make_requests(user_ids, count):
+    rng = random.Random(42)
+    today = datetime.date(2025, 1, 1)
+    requests = []
+    for _ in range(count):
+        start = today + datetime.timedelta(days=rng.randrange(365))
+        end = start + datetime.timedelta(days=rng.randrange(3))
+        requests.append((rng.choice(user_ids), "casual", start.isoformat(), end.isoformat()))
+    return requests
+
+
+def connect_per_query(requests):
+    """The pre-pool access pattern: every statement opens and closes its own connection."""
+    latencies = []
+    for employee_id, leave_type, start, end in requests:
+        t0 = time.perf_counter()
+        conn = sqlite3.connect("users.db")
+        conn.execute(SELECT_ROLE, (employee_id,)).fetchone()
+        conn.close()
+        conn = sqlite3.connect("leave_requests.db")
+        conn.execute(SELECT_CONFLICT, (employee_id, start, end, start, end, start)).fetchall()
+        conn.close()
+        conn = sqlite3.connect("leave_requests.db")
+        conn.execute(INSERT_LEAVE, (employee_id, leave_type, start, end, "Approved"))
+        conn.commit()
+        conn.close()
+        latencies.append(time.perf_counter() - t0)
+    return latencies
+
+
+def pooled(requests):
+    """The same statements through the shared per-thread connection pool."""
+    users = get_database("users.db")
+    leaves = get_database("leave_requests.db")
+    latencies = []
+    for employee_id, leave_type, start, end in requests:
+        t0 = time.perf_counter()
+        users.fetchone(SELECT_ROLE, (employee_id,))
+        leaves.fetchall(SELECT_CONFLICT, (employee_id, start, end, start, end, start))
+        with leaves.transaction() as conn:
+            conn.execute(INSERT_LEAVE, (employee_id, leave_type, start, end, "Approved"))
+        latencies.append(time.perf_counter() - t0)
+    return latencies
+
+
+def routed(requests):
+    """End-to-end MasterAgent.route_query for leave requests."""
+    from master_agent import MasterAgent
+
+    master = MasterAgent()
+    latencies = []
+    for employee_id, leave_type, _, _ in requests:
+        t0 = time.perf_counter()
+        master.route_query(employee_id, f"apply 1 day {leave_type} leave")
+        latencies.append(time.perf_counter() - t0)
+    return latencies
+
+
+def run_in_scratch(fn, requests, users, schema_mode):
+    with scratch_workdir():
+        seed_users("users.db", users)
+        conn = sqlite3.connect("leave_requests.db")
+        conn.execute(f"PRAGMA journal_mode={schema_mode}")
+        conn.execute(LEAVE_SCHEMA)
+        conn.commit()
+        conn.close()
+        started = time.perf_counter()
+        latencies = fn(requests)
+        return summarize(latencies, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--users", type=int, default=5000)
+    args = parser.parse_args()
+
+    employees = [f"EMP{i:06d}" for i in range(args.users // 2)]
+    requests = make_requests(employees, args.requests)
+    print(f"{args.requests} routed leave requests, {args.users} users (latency per request)\n")
+    print_summary("connect-per-query (before)", run_in_scratch(connect_per_query, requests, args.users, "DELETE"))
+    print_summary("pooled connections (after)", run_in_scratch(pooled, requests, args.users, "WAL"))
+    print_summary("MasterAgent.route_query (after)", run_in_scratch(routed, requests, args.users, "WAL"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Instrumentation overhead: route_query with metrics off, sampled and on, and with per-request logs.
+
+Routes the same mix of cached academic lookups and leave balance checks (both
+sub-millisecond, where fixed per-call costs show most) under each setting.
+Rows with request logs write them to os.devnull so only formatting and handler
+cost is measured, not the terminal.
+
+Usage: python -m benchmarks.instrumentation [--requests 20000]
+"""
+import argparse
+import logging
+import os
+
+from benchmarks.common import scratch_workdir, seed_users, summarize, print_summary, timed_calls
+
+QUERIES = ["exam schedule", "check casual leave", "upcoming events", "check sick leave"]
+
+SETTINGS = [
+    ("metrics off, request log off", False, 1.0, False),
+    ("metrics sampled 5%, request log off", True, 0.05, False),
+    ("metrics on, request log off", True, 1.0, False),
+    ("metrics on, request log on", True, 1.0, True),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=1000)
+    args = parser.parse_args()
+
+    from master_agent import MasterAgent
+    from metrics import get_metrics, set_request_logging
+
+    metrics = get_metrics()
+    calls = [(f"EMP{i % (args.users // 2):06d}", QUERIES[i % len(QUERIES)]) for i in range(args.requests)]
+    with scratch_workdir(), open(os.devnull, "w") as devnull:
+        seed_users("users.db", args.users)
+        master = MasterAgent(preload=True)
+        timed_calls(master.route_query, calls[:1000])  # warm up caches and connections
+
+        handler = logging.StreamHandler(devnull)
+        root = logging.getLogger()
+        saved_handlers = root.handlers[:]
+        results = {}
+        for label, enabled, sample_rate, request_log in SETTINGS:
+            metrics.configure(sample_rate=sample_rate, enabled=enabled)
+            metrics.reset()
+            set_request_logging(request_log)
+            if request_log:
+                root.handlers = [handler]
+                logging.disable(logging.NOTSET)
+            latencies, elapsed = timed_calls(master.route_query, calls)
+            logging.disable(logging.INFO)
+            root.handlers = saved_handlers
+            results[label] = summarize(latencies, elapsed)
+            print_summary(label, results[label])
+        metrics.configure(sample_rate=1.0, enabled=True)
+        set_request_logging(True)
+        master.close()
+
+    baseline = results[SETTINGS[0][0]]["mean_ms"]
+    print()
+    for label, summary in results.items():
+        print(f"{label:<40} {summary['mean_ms'] - baseline:+.4f} ms per request vs metrics off")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Micro-benchmark of intent classification plus slot extraction.
+
+"before" reproduces the old path: MasterAgent.classify_intent rebuilding three
+keyword sets and scanning them, then the chosen agent lower-casing and scanning
+the query again (LeaveAgent.extract_leave_details, CertificateAgent.handle_query).
+"after" is one intent_parser.parse_query call. Both are checked to agree on
+every query of the synthetic corpus before timing.
+
+Usage: python -m benchmarks.intent_parser [--queries 200000]
+"""
+import argparse
+import random
+import re
+import time
+
+from intent_parser import parse_query
+
+TEMPLATES = [
+    "apply {n} days {leave} leave",
+    "I need {leave} leave from {d1} to {d2}",
+    "revoke leave {leave} {d1} {d2}",
+    "please apply for leave, {leave}, {n} days",
+    "generate {cert} certificate",
+    "verify my {cert} certificate",
+    "check {cert}",
+    "need a {cert} for my visa application",
+    "what is the exam schedule",
+    "show the academic calendar",
+    "when is the backlog exam date",
+    "syllabus for semester 3",
+    "hello there, how are you",
+    "what time does the library open on weekdays",
+]
+
+
+def make_corpus(count, seed=3):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        month = rng.randrange(1, 13)
+        corpus.append(rng.choice(TEMPLATES).format(
+            n=rng.randrange(1, 15),
+            leave=rng.choice(["Casual", "sick", "VACATION"]),
+            cert=rng.choice(["bonafide", "NOC"]),
+            d1=f"2025-{month:02d}-0{rng.randrange(1, 5)}",
+            d2=f"2025-{month:02d}-1{rng.randrange(0, 9)}",
+        ))
+    return corpus
+
+
+def legacy_classify(query):
+    query = query.lower()
+    leave_keywords = {"leave", "vacation", "sick", "casual", "apply for leave"}
+    certificate_keywords = {"certificate", "bonafide", "noc", "generate certificate"}
+    academic_keywords = {"academic calendar", "semester calendar", "backlog exam", "schedule", "exam date", "syllabus"}
+    if any(word in query for word in leave_keywords):
+        return "leave"
+    elif any(word in query for word in certificate_keywords):
+        return "certificate"
+    elif any(word in query for word in academic_keywords):
+        return "academic"
+    return None
+
+
+def legacy_leave_slots(query):
+    leave_type = next((lt for lt in ["casual", "sick", "vacation"] if lt in query.lower()), None)
+    if not leave_type:
+        return None, None, ()
+    days_match = re.search(r'(\d+)\s*(day|days)', query)
+    if days_match:
+        return leave_type, int(days_match.group(1)), ()
+    date_match = re.findall(r'(\d{4}-\d{2}-\d{2})', query)
+    if len(date_match) == 2:
+        return leave_type, None, tuple(date_match)
+    return None, None, ()
+
+
+def legacy_certificate_slots(query):
+    certificate_type = next((ct for ct in ["bonafide", "noc"] if ct in query), None)
+    return certificate_type, "verify" in query or "check" in query
+
+
+def legacy(query):
+    intent = legacy_classify(query)
+    query = query.lower()
+    if intent == "leave":
+        return intent, ("revoke leave" in query,) + legacy_leave_slots(query)
+    if intent == "certificate":
+        return intent, legacy_certificate_slots(query)
+    return intent, None
+
+
+def compiled(query):
+    parsed = parse_query(query)
+    if parsed.intent == "leave":
+        if not parsed.leave_type or (parsed.days is None and len(parsed.dates) != 2):
+            return parsed.intent, (parsed.revoke, None, None, ())
+        return parsed.intent, (parsed.revoke, parsed.leave_type, parsed.days,
+                               () if parsed.days is not None else parsed.dates)
+    if parsed.intent == "certificate":
+        return parsed.intent, (parsed.certificate_type, parsed.verify)
+    return parsed.intent, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200000)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.queries)
+    mismatches = [q for q in corpus[:20000] if legacy(q) != compiled(q)]
+    if mismatches:
+        raise SystemExit(f"parsers disagree on {len(mismatches)} queries, e.g. {mismatches[0]!r}")
+
+    print(f"{len(corpus)} synthetic queries")
+    for label, fn in (("keyword scan + agent re-scan (before)", legacy), ("compiled single pass (after)", compiled)):
+        started = time.perf_counter()
+        for query in corpus:
+            fn(query)
+        elapsed = time.perf_counter() - started
+        print(f"{label:<40} {elapsed / len(corpus) * 1e6:7.2f} us/query   {len(corpus) / elapsed:>10.0f} queries/s")
+
+
+if __name__ == "__main__":
+    main()
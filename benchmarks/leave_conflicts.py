@@ -0,0 +1,95 @@
+"""Leave conflict check latency against a large leave_requests history.
+
+Seeds a scratch leave_requests table with several years of history for many
+employees, then times the old unindexed three-way BETWEEN query (fetchall) and
+LeaveAgent.check_conflict (EXISTS over the composite index, which
+LeaveAgent.create_database adds to existing databases).
+
+Usage: python -m benchmarks.leave_conflicts [--rows 1000000] [--employees 20000]
+"""
+import argparse
+import datetime
+import random
+import sqlite3
+import time
+
+from benchmarks.common import scratch_workdir, summarize, print_summary
+
+LEGACY_QUERY = '''SELECT * FROM leave_requests WHERE employee_id=?
+                  AND status='Approved'
+                  AND ((start_date BETWEEN ? AND ?)
+                  OR (end_date BETWEEN ? AND ?)
+                  OR (? BETWEEN start_date AND end_date))'''
+
+
+def seed_history(path, rows, employees, years=5, seed=9):
+    rng = random.Random(seed)
+    first_day = datetime.date.today() - datetime.timedelta(days=365 * years)
+    conn = sqlite3.connect(path)
+    conn.execute('''CREATE TABLE leave_requests (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        employee_id TEXT, leave_type TEXT, start_date TEXT, end_date TEXT, status TEXT)''')
+
+    def generate():
+        for _ in range(rows):
+            start = first_day + datetime.timedelta(days=rng.randrange(365 * years))
+            end = start + datetime.timedelta(days=rng.randrange(5))
+            yield (f"EMP{rng.randrange(employees):06d}", rng.choice(("casual", "sick", "vacation")),
+                   start.isoformat(), end.isoformat(), "Approved" if rng.random() < 0.8 else "Rejected")
+
+    conn.executemany("INSERT INTO leave_requests (employee_id, leave_type, start_date, end_date, status) "
+                     "VALUES (?, ?, ?, ?, ?)", generate())
+    conn.commit()
+    conn.close()
+
+
+def make_checks(count, employees, seed=10):
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    checks = []
+    for _ in range(count):
+        start = today + datetime.timedelta(days=rng.randrange(-30, 90))
+        checks.append((f"EMP{rng.randrange(employees):06d}", start, start + datetime.timedelta(days=rng.randrange(3))))
+    return checks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--employees", type=int, default=20000)
+    parser.add_argument("--checks", type=int, default=20000)
+    parser.add_argument("--legacy-checks", type=int, default=50, help="the unindexed query is slow; sample fewer")
+    args = parser.parse_args()
+
+    from leave_agent import LeaveAgent
+
+    checks = make_checks(args.checks, args.employees)
+    with scratch_workdir():
+        started = time.perf_counter()
+        seed_history("leave_requests.db", args.rows, args.employees)
+        print(f"seeded {args.rows} leave rows for {args.employees} employees in {time.perf_counter() - started:.1f} s\n")
+
+        conn = sqlite3.connect("leave_requests.db")
+        latencies = []
+        for employee_id, start, end in checks[:args.legacy_checks]:
+            s, e = start.isoformat(), end.isoformat()
+            t0 = time.perf_counter()
+            len(conn.execute(LEGACY_QUERY, (employee_id, s, e, s, e, s)).fetchall()) > 0
+            latencies.append(time.perf_counter() - t0)
+        conn.close()
+        print_summary("BETWEEN/OR scan, no index (before)", summarize(latencies))
+
+        started = time.perf_counter()
+        agent = LeaveAgent()  # creates the index on the existing table
+        print(f"{'index migration':<40} {time.perf_counter() - started:.2f} s")
+
+        latencies = []
+        for employee_id, start, end in checks:
+            t0 = time.perf_counter()
+            agent.check_conflict(employee_id, start, end)
+            latencies.append(time.perf_counter() - t0)
+        print_summary("EXISTS over composite index (after)", summarize(latencies))
+
+
+if __name__ == "__main__":
+    main()
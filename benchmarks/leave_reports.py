@@ -0,0 +1,89 @@
+"""Leave report latency: ad-hoc scans of leave_requests vs the occupancy aggregates.
+
+Seeds several years of synthetic leave history (benchmarks/datasets.py),
+rebuilds the ledger and daily occupancy once (timed), then answers the same
+reports both ways for a week, a quarter and a year ending today:
+
+  * scan: select approved leave overlapping the range and expand every
+    request's string dates into per-day counts in Python (what a report had to
+    do before leave_reports.py)
+  * aggregates: LeaveReports.headcount / usage_by_type over leave_occupancy,
+    who_is_out over the (status, end_date) index, and team_occupancy for a
+    team of --team-size employees
+
+Both are checked to agree before timing.
+
+Usage: python -m benchmarks.leave_reports [--rows 1000000] [--employees 6000] [--years 5] [--repeat 20]
+"""
+import argparse
+import datetime
+import random
+import time
+
+from benchmarks.common import scratch_workdir, seed_users
+from benchmarks.datasets import seed_leave_history
+
+
+def scan_headcount(database, start_date, end_date):
+    """Per-day headcount and per-type person-days from the raw rows."""
+    counts = [0] * ((end_date - start_date).days + 1)
+    usage = {}
+    first, last = start_date.toordinal(), end_date.toordinal()
+    for leave_type, leave_start, leave_end in database.fetchall(
+            "SELECT leave_type, start_date, end_date FROM leave_requests "
+            "WHERE status='Approved' AND end_date >= ? AND start_date <= ?",
+            (start_date.isoformat(), end_date.isoformat())):
+        for ordinal in range(max(datetime.date.fromisoformat(leave_start).toordinal(), first),
+                             min(datetime.date.fromisoformat(leave_end).toordinal(), last) + 1):
+            counts[ordinal - first] += 1
+            usage[leave_type] = usage.get(leave_type, 0) + 1
+    return counts, usage
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - started) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--employees", type=int, default=6000)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--team-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    from leave_agent import LeaveAgent
+    from leave_reports import LeaveReports
+
+    rng = random.Random(7)
+    with scratch_workdir():
+        seed_users("users.db", args.employees, prefix_split=1)
+        agent = LeaveAgent()
+        seed_leave_history("leave_requests.db", args.rows, args.employees, rng, years=args.years)
+        started = time.perf_counter()
+        agent.rebuild_leave_balances()
+        print(f"{args.rows} leave rows over {args.years} years; ledger + occupancy rebuilt in "
+              f"{time.perf_counter() - started:.2f} s\n")
+
+        reports = LeaveReports(agent)
+        team = [f"EMP{i:06d}" for i in rng.sample(range(args.employees), args.team_size)]
+        today = datetime.date.today()
+        print(f"{'range':<10} {'scan':>10} {'headcount':>10} {'usage':>10} {'who_is_out':>11} {'team':>10}   (ms)")
+        for label, days in (("week", 7), ("quarter", 91), ("year", 365)):
+            start_date, end_date = today - datetime.timedelta(days=days - 1), today
+            scan_ms, (counts, usage) = timed(lambda: scan_headcount(agent.database, start_date, end_date), args.repeat)
+            headcount_ms, headcount = timed(lambda: reports.headcount(start_date, end_date), args.repeat)
+            usage_ms, usage_by_type = timed(lambda: reports.usage_by_type(start_date, end_date), args.repeat)
+            out_ms, _ = timed(lambda: reports.who_is_out(start_date, end_date), args.repeat)
+            team_ms, _ = timed(lambda: reports.team_occupancy(team, start_date, end_date), args.repeat)
+            if list(headcount) != counts or usage_by_type != usage:
+                raise SystemExit(f"aggregates disagree with the scan for the {label}")
+            print(f"{label:<10} {scan_ms:>10.2f} {headcount_ms:>10.2f} {usage_ms:>10.2f} {out_ms:>11.2f} {team_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
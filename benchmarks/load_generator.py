@@ -0,0 +1,161 @@
+"""Closed-loop HTTP load generator for server.py.
+
+Each of `--concurrency` clients keeps one keep-alive connection open and sends
+POST /query requests back to back, drawn from a mix of leave, certificate and
+academic queries. Reports throughput, p50/p99 latency and status counts.
+
+Point it at a running server with --host/--port, or pass --spawn to start
+server.py in a scratch directory seeded with synthetic users.
+
+Usage: python -m benchmarks.load_generator [--spawn] [--requests 5000] [--concurrency 64]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from benchmarks.common import percentile, seed_users
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+QUERY_MIX = [
+    (0.35, "Employee", "apply {n} days casual leave"),
+    (0.10, "Employee", "apply {n} days sick leave"),
+    (0.15, "Employee", "check noc"),
+    (0.05, "Employee", "generate noc certificate"),
+    (0.10, "Student", "verify bonafide certificate"),
+    (0.25, "Student", "exam schedule"),
+]
+
+
+def make_workload(count, users, seed=11):
+    rng = random.Random(seed)
+    employees = [f"EMP{i:06d}" for i in range(users // 2)]
+    students = [f"STU{i:06d}" for i in range(users - users // 2)]
+    weights = [weight for weight, _, _ in QUERY_MIX]
+    workload = []
+    for _ in range(count):
+        _, role, template = rng.choices(QUERY_MIX, weights)[0]
+        user_id = rng.choice(employees if role == "Employee" else students)
+        workload.append((user_id, template.format(n=rng.randrange(1, 4))))
+    return workload
+
+
+async def client(host, port, jobs, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while jobs:
+            user_id, query = jobs.pop()
+            body = json.dumps({"user_id": user_id, "query": query}).encode("utf-8")
+            request = (f"POST /query HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                       f"Content-Length: {len(body)}\r\n\r\n").encode("latin-1") + body
+            started = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            head = await reader.readuntil(b"\r\n\r\n")
+            status = int(head.split(b" ", 2)[1])
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - started)
+            statuses[status] += 1
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, workload, concurrency):
+    jobs = list(reversed(workload))
+    latencies = []
+    statuses = Counter()
+    started = time.perf_counter()
+    await asyncio.gather(*(client(host, port, jobs, latencies, statuses) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(max(latencies) * 1000, 3) if latencies else 0.0,
+        "statuses": dict(statuses),
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(host, port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"server exited with code {process.returncode}")
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise SystemExit("server did not start in time")
+
+
+@contextmanager
+def spawned_server(users, server_args=(), script="server.py"):
+    """Start a server script in a scratch directory seeded with `users` synthetic users."""
+    with tempfile.TemporaryDirectory(prefix="office-agent-load-") as workdir:
+        seed_users(os.path.join(workdir, "users.db"), users)
+        port = free_port()
+        env = dict(os.environ, PYTHONPATH=REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+        process = subprocess.Popen(
+            [sys.executable, os.path.join(REPO_ROOT, script), "--port", str(port), "--quiet", *server_args],
+            cwd=workdir, env=env,
+        )
+        try:
+            wait_for_port("127.0.0.1", port, process)
+            yield "127.0.0.1", port
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--users", type=int, default=2000, help="synthetic users (IDs EMP000000.., STU000000..)")
+    parser.add_argument("--spawn", action="store_true", help="start server.py in a scratch directory")
+    parser.add_argument("--server-workers", type=int, default=8, help="--workers for a spawned server")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    workload = make_workload(args.requests, args.users)
+    if args.spawn:
+        with spawned_server(args.users, ["--workers", str(args.server_workers)]) as (host, port):
+            report = asyncio.run(run_load(host, port, workload, args.concurrency))
+    else:
+        report = asyncio.run(run_load(args.host, args.port, workload, args.concurrency))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['requests']} requests, concurrency {report['concurrency']}: "
+              f"{report['throughput_rps']} req/s   p50 {report['p50_ms']} ms   p99 {report['p99_ms']} ms   "
+              f"max {report['max_ms']} ms   statuses {report['statuses']}")
+
+
+if __name__ == "__main__":
+    main()
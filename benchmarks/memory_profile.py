@@ -0,0 +1,169 @@
+"""Resident memory of in-process user, event and leave caches, by record layout.
+
+Seeds a scratch users table, academic calendar and leave history, then builds
+the same cache several ways, each in a fresh forked process so one layout's
+freed memory cannot hide another's growth, and reports the growth of the
+process's resident set size (from /proc/self/statm):
+
+  users (--users, keyed by user ID)
+    dicts         {"user_id": ..., "name": ..., "role": ...} per user
+    namedtuples   the NamedTuple UserRecord used before records.py
+    slotted       records.UserRecord, roles interned
+    directory     UserDirectory.get_many over every user (the real cache, LRU bookkeeping included)
+  events (--events, sorted list)
+    namedtuples   the NamedTuple CalendarEvent used before records.py
+    calendar      AcademicCalendar.events() (slotted, types interned, same-day dates shared)
+  leave rows (--leave-rows)
+    tuples        rows as sqlite3 returns them (ISO date strings)
+    records       records.LeaveRecord with date objects, types and statuses interned
+
+Usage: python -m benchmarks.memory_profile [--users 100000] [--events 50000] [--leave-rows 1000000]
+"""
+import argparse
+import datetime
+import gc
+import multiprocessing
+import os
+import random
+import resource
+import time
+from typing import NamedTuple
+
+from benchmarks.common import scratch_workdir, seed_users
+from benchmarks.datasets import seed_events, seed_leave_history
+
+
+class TupleUserRecord(NamedTuple):
+    user_id: str
+    name: str
+    role: str
+
+
+class TupleCalendarEvent(NamedTuple):
+    event_date: str
+    event_name: str
+    event_type: str
+
+
+def resident_bytes():
+    """Current resident set size (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def user_rows():
+    from database import get_database
+    return get_database("users.db").execute("SELECT user_id, name, role FROM users")
+
+
+def event_rows():
+    from database import get_database
+    return get_database("academic_data.db").execute(
+        "SELECT event_date, event_name, event_type_norm FROM academic_events ORDER BY event_date, id")
+
+
+def leave_rows():
+    from database import get_database
+    return get_database("leave_requests.db").execute(
+        "SELECT employee_id, leave_type, start_date, end_date, status FROM leave_requests ORDER BY id")
+
+
+def build_users_dicts():
+    return {user_id: {"user_id": user_id, "name": name, "role": role} for user_id, name, role in user_rows()}
+
+
+def build_users_namedtuples():
+    return {row[0]: TupleUserRecord(*row) for row in user_rows()}
+
+
+def build_users_slotted():
+    from records import UserRecord
+    return {row[0]: UserRecord(*row) for row in user_rows()}
+
+
+def build_users_directory():
+    from user_directory import UserDirectory
+    user_ids = [row[0] for row in user_rows()]
+    directory = UserDirectory(max_size=len(user_ids))
+    for start in range(0, len(user_ids), 1000):  # warmed the way batches of requests would
+        directory.get_many(user_ids[start:start + 1000])
+    del user_ids
+    return directory._entries
+
+
+def build_events_namedtuples():
+    return [TupleCalendarEvent(*row) for row in event_rows()]
+
+
+def build_events_calendar():
+    from academic_calendar import AcademicCalendar
+    calendar = AcademicCalendar()
+    calendar.events()
+    return calendar._events
+
+
+def build_leave_tuples():
+    return list(leave_rows())
+
+
+def build_leave_records():
+    from records import LeaveRecord
+    return [LeaveRecord(employee_id, leave_type, datetime.date.fromisoformat(start_date),
+                        datetime.date.fromisoformat(end_date), status)
+            for employee_id, leave_type, start_date, end_date, status in leave_rows()]
+
+
+SCENARIOS = {
+    "users": (("dicts", build_users_dicts), ("namedtuples", build_users_namedtuples),
+              ("slotted", build_users_slotted), ("directory", build_users_directory)),
+    "events": (("namedtuples", build_events_namedtuples), ("calendar", build_events_calendar)),
+    "leave rows": (("tuples", build_leave_tuples), ("records", build_leave_records)),
+}
+
+
+def measure(group, label):
+    """Build one layout in this (forked) process; returns (rows, RSS growth in bytes, build seconds)."""
+    build = dict(SCENARIOS[group])[label]
+    gc.collect()
+    before = resident_bytes()
+    started = time.perf_counter()
+    cache = build()
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    return len(cache), resident_bytes() - before, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--events", type=int, default=50000)
+    parser.add_argument("--leave-rows", type=int, default=1000000)
+    parser.add_argument("--employees", type=int, default=6000)
+    args = parser.parse_args()
+
+    from academic_agent import AcademicAgent
+    from leave_agent import LeaveAgent
+
+    rng = random.Random(7)
+    context = multiprocessing.get_context("fork")
+    with scratch_workdir():
+        seed_users("users.db", args.users)
+        AcademicAgent()
+        seed_events("academic_data.db", args.events, rng)
+        LeaveAgent()
+        seed_leave_history("leave_requests.db", args.leave_rows, args.employees, rng)
+
+        print(f"{'cache':<26} {'rows':>9} {'resident':>11} {'bytes/row':>10} {'build':>9}")
+        for group, layouts in SCENARIOS.items():
+            for label, _ in layouts:
+                with context.Pool(1) as pool:
+                    rows, grown, elapsed = pool.apply(measure, (group, label))
+                print(f"{group + ', ' + label:<26} {rows:>9} {grown / 2 ** 20:>8.1f} MB {grown / max(rows, 1):>10.1f} "
+                      f"{elapsed:>7.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Multi-intent latency: fan-out across agents vs answering each part in turn.
+
+Times MasterAgent.route_query for a leave, a certificate and an academic query on
+their own, then for one query mentioning all three. The combined query is routed
+twice: with the concurrent fan-out and with the agents called one after another.
+
+The bundled agents are SQLite- and CPU-bound, so under the GIL the fan-out mainly
+overlaps their database waits. --agent-latency-ms adds a sleep to every agent
+call to model agents backed by slower I/O (a remote HR system, a network drive);
+there the combined latency should track the slowest agent, not the sum.
+
+Usage: python -m benchmarks.multi_intent [--samples 500] [--agent-latency-ms 20]
+"""
+import argparse
+import time
+
+from benchmarks.common import scratch_workdir, seed_users, summarize, print_summary
+
+SINGLE = [
+    ("leave", "apply 1 days sick leave"),
+    ("certificate", "verify noc certificate"),
+    ("academic", "exam schedule"),
+]
+COMBINED = "apply 1 days sick leave, verify noc certificate and exam schedule"
+
+
+def add_latency(agent, seconds):
+    """Make every handle_query call on `agent` wait `seconds` first."""
+    handle_query = agent.handle_query
+
+    def delayed(*args):
+        time.sleep(seconds)
+        return handle_query(*args)
+
+    agent.handle_query = delayed
+
+
+def time_queries(route, user_ids, query):
+    latencies = []
+    started = time.perf_counter()
+    for user_id in user_ids:
+        t0 = time.perf_counter()
+        route(user_id, query)
+        latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--agent-latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    from master_agent import MasterAgent
+    from intent_parser import parse_query
+
+    with scratch_workdir():
+        seed_users("users.db", args.samples * 9, prefix_split=1.0)
+        master = MasterAgent(preload=True)
+        if args.agent_latency_ms:
+            for intent in master.agents:
+                add_latency(master.agents[intent], args.agent_latency_ms / 1000)
+
+        # Fresh employees per run so leave balances never run out
+        employees = iter(f"EMP{i:06d}" for i in range(args.samples * 9))
+
+        def next_users():
+            return [next(employees) for _ in range(args.samples)]
+
+        def route_in_turn(user_id, query):
+            parsed = parse_query(query)
+            return "\n".join(master.dispatch(intent, user_id, query, parsed) for intent in parsed.intents)
+
+        for _, query in SINGLE + [(None, COMBINED)]:  # warm up connections, caches and the fan-out pool
+            for user_id in next_users()[:50]:
+                master.route_query(user_id, query)
+
+        print(f"{args.samples} samples per row, added agent latency {args.agent_latency_ms} ms\n")
+        means = {}
+        for intent, query in SINGLE:
+            summary = time_queries(master.route_query, next_users(), query)
+            means[intent] = summary["mean_ms"]
+            print_summary(f"{intent} only", summary)
+        fanout = time_queries(master.route_query, next_users(), COMBINED)
+        in_turn = time_queries(route_in_turn, next_users(), COMBINED)
+        print_summary("all three, fan-out", fanout)
+        print_summary("all three, one after another", in_turn)
+        master.close()
+
+    print(f"\nslowest single agent {max(means.values()):.3f} ms, sum of agents {sum(means.values()):.3f} ms, "
+          f"fan-out {fanout['mean_ms']:.3f} ms ({fanout['mean_ms'] / max(means.values()):.2f}x the slowest)")
+
+
+if __name__ == "__main__":
+    main()
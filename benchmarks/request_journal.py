@@ -0,0 +1,83 @@
+"""Write throughput: request journal with group commit vs a commit per request.
+
+Stores leave requests and certificate records through the agents' store methods
+(the write half of route_query), from --threads threads at once, first with
+every write committing its own transaction and then through the journal. The
+journal run includes the final flush, so every row is in SQLite when the clock
+stops. A last row repeats the journal run with a barrier read per write, the
+worst case for read-your-writes.
+
+Usage: python -m benchmarks.request_journal [--writes 20000] [--threads 4] [--interval-ms 50]
+"""
+import argparse
+import datetime
+import threading
+import time
+
+from benchmarks.common import scratch_workdir, seed_users
+
+
+def run_writes(agents, writes, threads, barrier=False):
+    """Store `writes` leave/certificate rows from `threads` threads; returns elapsed seconds."""
+    leave_agent, certificate_agent = agents
+    start = datetime.date(2030, 1, 1)
+
+    def worker(offset):
+        for i in range(offset, writes, threads):
+            user_id = f"EMP{i:06d}"
+            if i % 2:
+                certificate_agent.store_certificate(user_id, "noc", "2030-01-01", f"certificates/{user_id}.pdf", "0" * 64)
+                if barrier:
+                    certificate_agent.verify_certificate(user_id, "noc")
+            else:
+                leave_agent.store_leave_request(user_id, "casual", start, start, "Approved")
+                if barrier:
+                    leave_agent.sync_writes(user_id)
+                    leave_agent.check_conflict(user_id, start, start)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(offset,)) for offset in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    if leave_agent.journal:
+        leave_agent.journal.flush()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writes", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--interval-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    import request_journal
+    from leave_agent import LeaveAgent
+    from certificates_agent import CertificateAgent
+
+    print(f"{args.writes} writes from {args.threads} threads (half leave requests, half certificate records)\n")
+    results = {}
+    for label, journal, barrier in (("commit per request", False, False),
+                                    ("journal, group commit", True, False),
+                                    ("journal, barrier read after each write", True, True)):
+        with scratch_workdir():
+            seed_users("users.db", args.writes)
+            if journal:
+                request_journal.configure_journal("request_journal.jsonl", flush_interval=args.interval_ms / 1000)
+            agents = (LeaveAgent(), CertificateAgent())
+            agents[1].evict_old_certificates = lambda force=False: []  # no certificates/ directory here
+            elapsed = run_writes(agents, args.writes, args.threads, barrier)
+            stats = agents[0].journal.stats() if journal else None
+            request_journal.close_journal()
+        results[label] = args.writes / elapsed
+        detail = f"   {stats['groups']} group commits" if stats else ""
+        print(f"{label:<42} {elapsed:>7.2f} s   {results[label]:>10.1f} writes/s{detail}")
+
+    baseline = results["commit per request"]
+    print(f"\ngroup commit: {results['journal, group commit'] / baseline:.1f}x the writes/s of a commit per request")
+
+
+if __name__ == "__main__":
+    main()
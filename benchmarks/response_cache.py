@@ -0,0 +1,58 @@
+"""Read-heavy traffic with and without the router response cache.
+
+Students repeat verification and calendar queries around deadlines: each
+request here picks a user from a small hot set most of the time and one of a
+few read queries, with an occasional certificate generation that invalidates
+that user's cached verification. The same request sequence is routed with
+MasterAgent(cache_responses=False) and with the cache on.
+
+Usage: python -m benchmarks.response_cache [--requests 20000] [--hot-users 200] [--write-ratio 0.01]
+"""
+import argparse
+import random
+
+from benchmarks.common import scratch_workdir, seed_users, summarize, print_summary, timed_calls
+
+READS = ("verify bonafide certificate", "check bonafide", "exam schedule", "academic calendar", "upcoming events",
+         "backlog exams")
+
+
+def make_requests(count, users, hot_users, write_ratio, seed=7):
+    rng = random.Random(seed)
+    requests = []
+    for _ in range(count):
+        user = rng.randrange(hot_users) if rng.random() < 0.9 else rng.randrange(users)
+        query = "generate bonafide" if rng.random() < write_ratio else rng.choice(READS)
+        requests.append((f"STU{user:06d}", query))
+    return requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--hot-users", type=int, default=200)
+    parser.add_argument("--write-ratio", type=float, default=0.01)
+    args = parser.parse_args()
+
+    from master_agent import MasterAgent
+
+    requests = make_requests(args.requests, args.users, args.hot_users, args.write_ratio)
+    results = {}
+    for label, cache_responses in (("no response cache", False), ("response cache", True)):
+        with scratch_workdir():
+            seed_users("users.db", args.users * 2)
+            master = MasterAgent(preload=True, cache_responses=cache_responses)
+            latencies, elapsed = timed_calls(master.route_query, requests)
+            results[label] = summarize(latencies, elapsed)
+            print_summary(label, results[label])
+            if master.response_cache:
+                print(f"  {master.response_cache.stats()}")
+            master.close()
+
+    speedup = results["no response cache"]["mean_ms"] / results["response cache"]["mean_ms"]
+    print(f"\nmean latency {speedup:.1f}x lower with the cache")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Throughput of ShardPool from 1 to N worker processes.
+
+Builds the suite's seeded dataset (benchmarks/datasets.py), then routes the
+same request stream with `--concurrency` requests in flight through a pool of
+1, 2, 4, ... `--max-processes` workers, and once through a single in-process
+MasterAgent for reference. The stream is the suite's route_mixed query mix
+(or --scenario): reads, leave applications and revocations, certificate
+generation, all writing to the same shared SQLite files.
+
+Scaling is bounded by the cores available (os.cpu_count() here) and by the
+single SQLite writer; --journal group-commits each worker's writes.
+
+Usage: python -m benchmarks.sharding [--max-processes 8] [--requests 20000] [--concurrency 64] [--journal]
+"""
+import argparse
+import os
+import time
+from collections import deque
+
+from benchmarks.common import scratch_workdir, summarize, timed_calls
+from benchmarks.datasets import build_dataset
+from benchmarks.suite import QueryMix, SCENARIOS
+
+
+def drive(pool, requests, concurrency):
+    """Submit requests keeping `concurrency` in flight; returns (latencies, elapsed)."""
+    latencies = []
+    in_flight = deque()
+    started = time.perf_counter()
+    for user_id, query in requests:
+        if len(in_flight) >= concurrency:
+            submitted, future = in_flight.popleft()
+            future.result()
+            latencies.append(time.perf_counter() - submitted)
+        in_flight.append((time.perf_counter(), pool.submit(user_id, query)))
+    for submitted, future in in_flight:
+        future.result()
+        latencies.append(time.perf_counter() - submitted)
+    return latencies, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=64, help="requests in flight")
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--leave-rows", type=int, default=100000)
+    parser.add_argument("--scenario", default="route_mixed", choices=[name for name, (target, _) in SCENARIOS.items()
+                                                                      if target == "route"])
+    parser.add_argument("--journal", action="store_true", help="group-commit each worker's writes")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from master_agent import MasterAgent
+    from metrics import set_request_logging
+    from shard_pool import ShardPool
+
+    counts = [1]
+    while counts[-1] * 2 <= args.max_processes:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != args.max_processes:
+        counts.append(args.max_processes)
+
+    settings = {"request_log": False, "log_level": "WARNING",
+                "journal": "request_journal.jsonl" if args.journal else None}
+    with scratch_workdir():
+        dataset = build_dataset(args.users, leave_rows=args.leave_rows, seed=args.seed)
+        mix = QueryMix(dataset, SCENARIOS[args.scenario][1], args.seed)
+        warmup = mix.take(max(100, args.requests // 20))
+
+        set_request_logging(False)
+        master = MasterAgent(preload=True)
+        timed_calls(master.route_query, warmup)
+        latencies, elapsed = timed_calls(master.route_query, mix.take(args.requests))
+        master.close()
+        set_request_logging(True)
+        baseline = summarize(latencies, elapsed)
+        print(f"{os.cpu_count()} CPUs, {args.requests} {args.scenario} requests, {args.concurrency} in flight\n")
+        print(f"{'workers':<14} {'req/s':>10} {'speedup':>8} {'mean':>10} {'p50':>10} {'p99':>10}")
+        print(f"{'in-process':<14} {baseline['per_second']:>10.1f} {'':>8} {baseline['mean_ms']:>8.3f}ms "
+              f"{baseline['p50_ms']:>8.3f}ms {baseline['p99_ms']:>8.3f}ms")
+
+        single = None
+        for processes in counts:
+            pool = ShardPool(processes, settings).start()
+            drive(pool, warmup, args.concurrency)
+            latencies, elapsed = drive(pool, mix.take(args.requests), args.concurrency)
+            pool.close()
+            result = summarize(latencies, elapsed)
+            single = single or result["per_second"]
+            print(f"{processes:<14} {result['per_second']:>10.1f} {result['per_second'] / single:>7.2f}x "
+                  f"{result['mean_ms']:>8.3f}ms {result['p50_ms']:>8.3f}ms {result['p99_ms']:>8.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
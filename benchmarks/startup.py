@@ -0,0 +1,77 @@
+"""Cold start: time from `import master_agent` to the first response, in fresh processes.
+
+Each sample is a new interpreter started in a scratch directory seeded with
+synthetic users, as a short-lived worker would be. The first start of a scratch
+directory creates every schema; later starts find the recorded schema versions
+and skip the checks. Compares lazy agent construction (the default) with
+MasterAgent(preload=True), which builds every agent as the old constructor did.
+
+Usage: python -m benchmarks.startup [--runs 10]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.common import scratch_workdir, seed_users
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+QUERIES = [
+    ("academic", "STU000000", "exam schedule"),
+    ("leave", "EMP000000", "check casual leave"),
+    ("certificate", "STU000000", "verify bonafide certificate"),
+]
+
+CHILD = """
+import time
+started = time.perf_counter()
+import json, logging, sys
+logging.disable(logging.INFO)
+from master_agent import MasterAgent
+imported = time.perf_counter()
+master = MasterAgent(preload={preload})
+master.route_query({user_id!r}, {query!r})
+done = time.perf_counter()
+print(json.dumps({{"import_ms": (imported - started) * 1000, "first_response_ms": (done - started) * 1000,
+                  "fpdf_imported": "fpdf" in sys.modules}}))
+"""
+
+
+def sample(workdir, user_id, query, preload):
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", CHILD.format(preload=preload, user_id=user_id, query=query)],
+                            cwd=workdir, env=env, capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process_ms"] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--users", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'':<34} {'import':>9} {'to 1st reply':>13} {'process':>10}   fpdf")
+    for preload in (False, True):
+        for intent, user_id, query in QUERIES:
+            with scratch_workdir() as workdir:
+                seed_users("users.db", args.users)
+                first = sample(workdir, user_id, query, preload)
+                runs = [sample(workdir, user_id, query, preload) for _ in range(args.runs)]
+            label = f"{'preload' if preload else 'lazy'}, {intent}"
+            print(f"{label + ' (first start)':<34} {first['import_ms']:>7.1f}ms {first['first_response_ms']:>11.1f}ms "
+                  f"{first['process_ms']:>8.1f}ms   {'yes' if first['fpdf_imported'] else 'no'}")
+            print(f"{label + ' (median)':<34} {statistics.median(r['import_ms'] for r in runs):>7.1f}ms "
+                  f"{statistics.median(r['first_response_ms'] for r in runs):>11.1f}ms "
+                  f"{statistics.median(r['process_ms'] for r in runs):>8.1f}ms   "
+                  f"{'yes' if runs[-1]['fpdf_imported'] else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
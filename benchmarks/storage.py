@@ -0,0 +1,100 @@
+"""Storage layout: one file per agent vs the consolidated database from storage.py.
+
+Seeds the legacy files (users.db, leave_requests.db, academic_data.db) with
+synthetic users and leave history, routes a query mix through MasterAgent, then
+migrates everything with storage.migrate_legacy_files (timed, rows/s) and
+routes the same mix against the consolidated file. Every leave query goes to a
+fresh employee, so each one is a user check plus a policy read plus an insert.
+
+Usage: python -m benchmarks.storage [--users 20000] [--leave-rows 100000] [--requests 3000]
+"""
+import argparse
+import datetime
+import sqlite3
+import time
+
+import database
+import user_directory
+from benchmarks.common import scratch_workdir, seed_users, summarize, print_summary, timed_calls
+
+MIX = ("apply 1 days sick leave", "verify noc certificate", "exam schedule")
+
+
+def seed_leave_history(path, employees, rows):
+    """Insert `rows` past approved leave requests spread over `employees`."""
+    conn = sqlite3.connect(path)
+    start = datetime.date(2020, 1, 1)
+    with conn:
+        conn.executemany("INSERT INTO leave_requests (employee_id, leave_type, start_date, end_date, status) "
+                         "VALUES (?, 'casual', ?, ?, 'Approved')",
+                         ((f"EMP{i % employees:06d}", (start + datetime.timedelta(days=i % 1500)).isoformat(),
+                           (start + datetime.timedelta(days=i % 1500)).isoformat()) for i in range(rows)))
+    conn.close()
+
+
+def run_mix(master, first_employee, requests):
+    """Route the query mix; returns {label: summary}."""
+    calls = {query: [] for query in MIX}
+    for i in range(requests):
+        query = MIX[i % len(MIX)]
+        user_id = f"EMP{first_employee + i:06d}" if "leave" in query else f"EMP{i % 1000:06d}"
+        calls[query].append((user_id, query))
+    results = {}
+    everything = []
+    for query, args in calls.items():
+        latencies, elapsed = timed_calls(master.route_query, args)
+        results[query] = summarize(latencies, elapsed)
+        everything.extend(latencies)
+    results["all"] = summarize(everything)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--leave-rows", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    import storage
+    from master_agent import MasterAgent
+
+    employees = args.users // 2
+    fresh = employees // 2  # employees from here on have no leave history
+    with scratch_workdir():
+        seed_users("users.db", args.users)
+        master = MasterAgent(preload=True)
+        seed_leave_history("leave_requests.db", fresh, args.leave_rows)
+        master.agents["leave"].rebuild_leave_balances()
+        run_mix(master, fresh, 300)  # warm up
+        legacy = run_mix(master, fresh + 300, args.requests)
+        master.close()
+        database.close_all()
+        user_directory.clear_user_directories()
+
+        started = time.perf_counter()
+        copied = storage.migrate_legacy_files(storage.STORAGE_PATH, ".", args.chunk_size)
+        migration_seconds = time.perf_counter() - started
+        database.close_all()
+
+        storage.configure_storage()
+        master = MasterAgent(preload=True)
+        master.agents["leave"].rebuild_leave_balances()
+        run_mix(master, fresh + 300 + args.requests, 300)
+        consolidated = run_mix(master, fresh + 600 + args.requests, args.requests)
+        master.close()
+        storage.reset_storage()
+
+    rows = sum(copied.values())
+    print(f"migration: {rows} rows in {migration_seconds:.2f} s ({rows / migration_seconds:,.0f} rows/s, "
+          f"chunks of {args.chunk_size})\n")
+    for label, results in (("one file per agent", legacy), ("consolidated", consolidated)):
+        print(label)
+        for query, summary in results.items():
+            print_summary(f"  {query}", summary)
+    print(f"\nmean request latency {legacy['all']['mean_ms']:.3f} ms -> {consolidated['all']['mean_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
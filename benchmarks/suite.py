@@ -0,0 +1,242 @@
+"""Reproducible end-to-end benchmark suite with JSON results and regression checks.
+
+Builds a seeded synthetic dataset (benchmarks/datasets.py) in a scratch
+directory, then runs each scenario: MasterAgent.route_query and route_batch
+with realistic query mixes, and each agent's handle_query on its own. For every
+scenario it reports throughput, mean/p50/p90/p99 latency and the peak Python
+memory allocated while it ran (a second, shorter pass under tracemalloc, so the
+tracing does not distort the timings). Per-request log lines are switched off.
+
+    python -m benchmarks.suite --output before.json
+    ... change something ...
+    python -m benchmarks.suite --output after.json --compare before.json
+
+With --compare, a scenario is flagged when its mean or p50 latency grows, or its
+throughput drops, by more than --threshold (default 15%); the exit status is 1
+if anything was flagged. Compare runs made on the same machine and dataset
+size: the seed fixes the data and the query sequence, not the hardware.
+
+Usage: python -m benchmarks.suite [--users 20000] [--requests 5000] [--scenarios route_mixed,agent_leave]
+"""
+import argparse
+import datetime
+import json
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from benchmarks.common import scratch_workdir, summarize, percentile
+from benchmarks.datasets import build_dataset, LEAVE_TYPES
+
+ACADEMIC_QUERIES = ("exam schedule", "academic calendar", "backlog exams", "semester start", "upcoming events",
+                    "events in the next 30 days", "workshop schedule", "sports event campus 7")
+NOISE_QUERIES = ("hello", "what can you do", "thanks")
+
+
+class QueryMix:
+    """Seeded generator of (user_id, query) pairs in the proportions of `weights`."""
+
+    def __init__(self, dataset, weights, seed):
+        self.dataset = dataset
+        self.kinds = list(weights)
+        self.weights = [weights[kind] for kind in self.kinds]
+        self.rng = random.Random(seed)
+        self.approved = []  # (employee_id, leave_type, start, end) applied for, candidates for revocation
+
+    def student(self):
+        return f"STU{self.rng.randrange(self.dataset.students):06d}"
+
+    def employee(self):
+        return f"EMP{self.rng.randrange(self.dataset.employees):06d}"
+
+    def leave_dates(self):
+        start = datetime.date.today() + datetime.timedelta(days=self.rng.randrange(30, 1500))
+        return start, start + datetime.timedelta(days=self.rng.choice((0, 0, 1, 2)))
+
+    def make(self, kind):
+        rng = self.rng
+        if kind == "academic":
+            return self.student(), rng.choice(ACADEMIC_QUERIES)
+        if kind == "verify":
+            if rng.random() < 0.7:
+                return self.student(), rng.choice(("verify bonafide certificate", "check bonafide"))
+            return self.employee(), rng.choice(("verify noc certificate", "check noc"))
+        if kind == "generate":
+            return self.student(), "generate bonafide certificate"
+        if kind == "revoke" and self.approved:
+            employee_id, leave_type, start, end = self.approved.pop(rng.randrange(len(self.approved)))
+            return employee_id, f"revoke leave {leave_type} {start} {end}"
+        if kind in ("apply", "revoke"):
+            employee_id, leave_type = self.employee(), rng.choice(LEAVE_TYPES)
+            start, end = self.leave_dates()
+            self.approved.append((employee_id, leave_type, start, end))
+            return employee_id, f"apply {leave_type} leave {start} {end}"
+        if kind == "multi":
+            return self.employee(), "apply 1 days sick leave and verify noc certificate"
+        if kind == "invalid_user":
+            return f"XYZ{rng.randrange(10 ** 6):06d}", rng.choice(ACADEMIC_QUERIES)
+        return self.student(), rng.choice(NOISE_QUERIES)
+
+    def take(self, count):
+        return [self.make(kind) for kind in self.rng.choices(self.kinds, self.weights, k=count)]
+
+
+# Scenario -> (target, query mix weights). Targets: "route", "batch" or an agent intent (handle_query).
+SCENARIOS = {
+    "route_mixed": ("route", {"academic": 0.35, "verify": 0.25, "apply": 0.15, "revoke": 0.04, "generate": 0.01,
+                              "multi": 0.05, "invalid_user": 0.05, "noise": 0.10}),
+    "route_student_reads": ("route", {"academic": 0.6, "verify": 0.4}),
+    "route_leave_writes": ("route", {"apply": 0.85, "revoke": 0.15}),
+    "route_batch_mixed": ("batch", {"academic": 0.4, "verify": 0.3, "apply": 0.25, "revoke": 0.05}),
+    "agent_leave": ("leave", {"apply": 0.85, "revoke": 0.15}),
+    "agent_certificate_verify": ("certificate", {"verify": 1.0}),
+    "agent_academic": ("academic", {"academic": 1.0}),
+}
+
+
+def scenario_calls(master, target, requests, batch_size):
+    """Return (callable, argument tuples, number of requests in each call) for a scenario target."""
+    if target == "route":
+        return master.route_query, requests, [1] * len(requests)
+    if target == "batch":
+        chunks = [(requests[i:i + batch_size],) for i in range(0, len(requests), batch_size)]
+        return (lambda chunk: list(master.route_batch(chunk, batch_size)), chunks,
+                [len(chunk) for chunk, in chunks])  # the last chunk may be short
+    agent = master.agents[target]
+    return agent.handle_query, requests, [1] * len(requests)
+
+
+def run_scenario(master, dataset, name, args, seed):
+    target, weights = SCENARIOS[name]
+    mix = QueryMix(dataset, weights, seed)
+    fn, calls, sizes = scenario_calls(master, target, mix.take(args.requests), args.batch_size)
+    if not calls:
+        raise SystemExit(f"{name}: no requests to time (--requests {args.requests})")
+    warmup = min(max(1, len(calls) // 20), len(calls) - 1)  # a single call (one batch) is timed cold
+    for call in calls[:warmup]:  # warm up caches and connections
+        fn(*call)
+
+    latencies = []
+    started = time.perf_counter()
+    for call, size in zip(calls[warmup:], sizes[warmup:]):
+        t0 = time.perf_counter()
+        fn(*call)
+        latencies.append((time.perf_counter() - t0) / size)
+    elapsed = time.perf_counter() - started
+    result = summarize(latencies, elapsed)
+    result["count"] = sum(sizes[warmup:])
+    result["per_second"] = round(result["count"] / elapsed, 1) if elapsed else 0.0
+    result["p90_ms"] = round(percentile(latencies, 90) * 1000, 4)
+
+    # Memory pass: fresh queries from the same mix, under tracemalloc
+    fn, calls, _ = scenario_calls(master, target, mix.take(args.memory_requests), args.batch_size)
+    tracemalloc.start()
+    for call in calls:
+        fn(*call)
+    result["peak_kb"] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    tracemalloc.stop()
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Print per-scenario changes against a baseline run; returns the names of regressed scenarios."""
+    regressions = []
+    print(f"\nCompared with {baseline['meta'].get('commit') or 'baseline'} "
+          f"({baseline['meta'].get('timestamp')}), threshold {threshold:.0%}:")
+    for name, current in results["scenarios"].items():
+        previous = baseline["scenarios"].get(name)
+        if not previous:
+            print(f"  {name:<28} (new scenario)")
+            continue
+        changes = {key: current[key] / previous[key] - 1 for key in ("mean_ms", "p50_ms", "p99_ms", "per_second",
+                                                                      "peak_kb") if previous.get(key)}
+        flagged = [key for key in ("mean_ms", "p50_ms") if changes.get(key, 0) > threshold]
+        if changes.get("per_second", 0) < -threshold:
+            flagged.append("per_second")
+        if flagged:
+            regressions.append(name)
+        print(f"  {name:<28} " + "  ".join(f"{key} {change:+.1%}" for key, change in changes.items())
+              + (f"   REGRESSION ({', '.join(flagged)})" if flagged else ""))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--leave-rows", type=int, default=100000)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--certificates", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=5000, help="requests timed per scenario")
+    parser.add_argument("--memory-requests", type=int, default=1000, help="requests traced for peak memory")
+    parser.add_argument("--batch-size", type=int, default=500, help="route_batch chunk size")
+    parser.add_argument("--scenarios", help=f"comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", metavar="JSON", help="write results here")
+    parser.add_argument("--compare", metavar="JSON", help="baseline results to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.15, help="relative change flagged as a regression")
+    args = parser.parse_args()
+
+    names = args.scenarios.split(",") if args.scenarios else list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    from master_agent import MasterAgent
+    from metrics import set_request_logging
+
+    results = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "scenarios": {},
+    }
+    with scratch_workdir():
+        started = time.perf_counter()
+        dataset = build_dataset(args.users, leave_rows=args.leave_rows, events=args.events,
+                                certificates=args.certificates, seed=args.seed)
+        results["dataset"] = dict(dataset._asdict(), build_seconds=round(time.perf_counter() - started, 2))
+        print(f"dataset: {dataset.students} students, {dataset.employees} employees, {dataset.leave_rows} leave rows, "
+              f"{dataset.events} events, {dataset.certificates} certificates "
+              f"({results['dataset']['build_seconds']} s)\n")
+        print(f"{'scenario':<28} {'req/s':>10} {'mean':>9} {'p50':>9} {'p90':>9} {'p99':>9} {'peak KB':>9}")
+        set_request_logging(False)  # invalid-user lines would flood the report
+        master = MasterAgent(preload=True)
+        for index, name in enumerate(names):
+            result = results["scenarios"][name] = run_scenario(master, dataset, name, args, args.seed + index)
+            print(f"{name:<28} {result['per_second']:>10.1f} {result['mean_ms']:>7.3f}ms {result['p50_ms']:>7.3f}ms "
+                  f"{result['p90_ms']:>7.3f}ms {result['p99_ms']:>7.3f}ms {result['peak_kb']:>9.1f}")
+        master.close()
+        set_request_logging(True)
+    results["meta"]["max_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} scenario(s) regressed: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\n✅ No regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Hit ratio and lookup latency of the user directory cache for a campus-sized user table.
+
+Lookups follow a skewed (Pareto) distribution: a minority of users generate most
+requests. Run with a few cache sizes to pick `max_size` for the deployment.
+
+Usage: python -m benchmarks.user_directory [--users 50000] [--lookups 200000]
+"""
+import argparse
+import random
+import time
+
+from benchmarks.common import scratch_workdir, seed_users
+from database import get_database
+from user_directory import UserDirectory
+
+
+def skewed_ids(user_ids, count, seed=7):
+    rng = random.Random(seed)
+    shuffled = list(user_ids)
+    rng.shuffle(shuffled)
+    last = len(shuffled) - 1
+    return [shuffled[min(last, int(rng.paretovariate(1.2)) - 1)] if rng.random() < 0.8 else rng.choice(shuffled)
+            for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument("--lookups", type=int, default=200000)
+    parser.add_argument("--sizes", default="1000,5000,20000,65536")
+    args = parser.parse_args()
+
+    with scratch_workdir():
+        user_ids = seed_users("users.db", args.users)
+        lookups = skewed_ids(user_ids, args.lookups)
+
+        users = get_database("users.db")
+        started = time.perf_counter()
+        for user_id in lookups:
+            users.fetchone("SELECT user_id, name, role FROM users WHERE user_id=?", (user_id,))
+        uncached = (time.perf_counter() - started) / len(lookups)
+        print(f"{args.users} users, {args.lookups} lookups")
+        print(f"{'uncached SELECT':<22} {uncached * 1e6:8.2f} us/lookup")
+
+        for size in (int(s) for s in args.sizes.split(",")):
+            directory = UserDirectory("users.db", max_size=size)
+            started = time.perf_counter()
+            for user_id in lookups:
+                directory.get(user_id)
+            elapsed = (time.perf_counter() - started) / len(lookups)
+            stats = directory.stats()
+            print(f"{'max_size=' + str(size):<22} {elapsed * 1e6:8.2f} us/lookup   hit ratio {stats['hit_ratio']:.3f}   "
+                  f"evictions {stats['evictions']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""Streaming bulk import and export for users, leave requests and academic events.
+
+    python bulk_io.py import users people.csv [--replace]
+    python bulk_io.py import leave_requests history.jsonl [--chunk-size 50000]
+    python bulk_io.py import academic_events calendar.csv
+    python bulk_io.py export leave_requests - --format jsonl > history.jsonl
+
+Files are CSV with a header row, or JSONL with one object per line, holding the
+table's columns (COLUMNS); the format follows the file extension unless
+--format is given. Input is read lazily and written `chunk_size` rows at a time
+with executemany, one transaction per chunk, through the same agent methods the
+service uses: imported leave is charged to the balance ledger in its own
+transaction (or, into an empty table, by one ledger rebuild at the end), event
+types are normalized, and user and calendar caches are invalidated. Rows that fail validation are skipped and counted. Memory use
+depends on the chunk size, not the file size.
+
+Secondary indexes (not the unique ones that decide conflicts) are dropped while
+loading into an empty table, or always with --defer-indexes, and rebuilt once
+at the end. Exports stream the same columns in insertion order, so an export
+can be imported again. --storage points both at the consolidated database.
+"""
+import argparse
+import csv
+import datetime
+import itertools
+import json
+import sqlite3
+import sys
+import time
+import logging
+from contextlib import contextmanager, nullcontext
+
+from user_directory import normalize_user_id
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Columns read on import and written on export, per table
+COLUMNS = {
+    "users": ("user_id", "name", "role"),
+    "leave_requests": ("employee_id", "leave_type", "start_date", "end_date", "status"),
+    "academic_events": ("event_name", "event_date", "event_type"),
+}
+
+# Database file holding each table (aliased to the consolidated file under --storage)
+TABLE_FILES = {
+    "users": "users.db",
+    "leave_requests": "leave_requests.db",
+    "academic_events": "academic_data.db",
+}
+
+ROLES = ("Employee", "Student")
+LEAVE_STATUSES = ("Approved", "Rejected", "Revoked")
+
+# Invalid rows reported individually before only being counted
+MAX_REPORTED_ERRORS = 10
+
+
+def user_row(record):
+    user_id, name, role = normalize_user_id(record["user_id"]), record["name"].strip(), record["role"].strip().title()
+    if not user_id or not name or role not in ROLES:
+        raise ValueError(f"needs a user_id, a name and a role in {ROLES}")
+    return user_id, name, role
+
+
+def leave_row(record):
+    start_date = datetime.date.fromisoformat(record["start_date"].strip())
+    end_date = datetime.date.fromisoformat(record["end_date"].strip())
+    status = record["status"].strip().title()
+    if end_date < start_date:
+        raise ValueError("end_date is before start_date")
+    if status not in LEAVE_STATUSES:
+        raise ValueError(f"status must be one of {LEAVE_STATUSES}")
+    return normalize_user_id(record["employee_id"]), record["leave_type"].strip().lower(), start_date, end_date, status
+
+
+def event_row(record):
+    event_name, event_date = record["event_name"].strip(), record["event_date"].strip()
+    datetime.date.fromisoformat(event_date)
+    if not event_name:
+        raise ValueError("event_name is empty")
+    return event_name, event_date, record["event_type"].strip()
+
+
+ROW_PARSERS = {
+    "users": user_row,
+    "leave_requests": leave_row,
+    "academic_events": event_row,
+}
+
+
+def file_format(path, fmt=None):
+    if fmt:
+        return fmt
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def read_records(source, fmt):
+    """Yield (line number, dict) from an open CSV or JSONL file."""
+    if fmt == "csv":
+        reader = csv.reader(source)
+        header = next(reader, [])
+        for row in reader:  # what csv.DictReader does, without its per-row overhead
+            yield reader.line_num, dict(zip(header, row))
+        return
+    for line_number, line in enumerate(source, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield line_number, record if isinstance(record, dict) else {}
+
+
+def valid_rows(table, records, report):
+    """Parse records into table rows, counting (and logging the first few) invalid ones in `report`."""
+    parse = ROW_PARSERS[table]
+    for line_number, record in records:
+        try:
+            yield parse(record)
+        except (KeyError, ValueError, TypeError, AttributeError) as e:
+            report["invalid"] += 1
+            if report["invalid"] <= MAX_REPORTED_ERRORS:
+                reason = f"missing column {e}" if isinstance(e, KeyError) else e
+                logging.warning(f"⚠️ Skipping line {line_number}: {reason}")
+
+
+def chunked(rows, size):
+    """Lists of up to `size` rows, read lazily."""
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+@contextmanager
+def deferred_indexes(database, table):
+    """Drop `table`'s non-unique indexes for the block and rebuild each once afterwards."""
+    indexes = []
+    for _, name, unique, origin, _ in database.fetchall(f"PRAGMA index_list({table})"):
+        if not unique and origin == "c":
+            indexes.append((name, database.fetchone("SELECT sql FROM sqlite_master WHERE type='index' AND name=?",
+                                                    (name,))[0]))
+    with database.transaction() as conn:
+        for name, _ in indexes:
+            conn.execute(f"DROP INDEX {name}")
+    try:
+        yield [name for name, _ in indexes]
+    finally:
+        started = time.perf_counter()
+        with database.transaction() as conn:
+            for _, sql in indexes:
+                conn.execute(sql)
+        if indexes:
+            logging.info(f"✅ Rebuilt {len(indexes)} {table} indexes in {time.perf_counter() - started:.2f} s.")
+
+
+class BulkLoader:
+    """Writes parsed rows through the agent that owns each table (creating its schema first)."""
+
+    def __init__(self, table):
+        self.table = table
+        self.rebuild_ledger = False  # leave loaded into an empty table: one ledger rebuild instead of upserts
+        if table == "users":
+            from master_agent import MasterAgent
+            self.users = MasterAgent().users  # creates the users table and its version triggers
+            self.database = self.users.database
+        elif table == "leave_requests":
+            from leave_agent import LeaveAgent
+            self.agent = LeaveAgent()
+            self.database = self.agent.database
+        else:
+            from academic_agent import AcademicAgent
+            self.agent = AcademicAgent()
+            self.database = self.agent.database
+
+    def is_empty(self):
+        return self.database.fetchone(f"SELECT 1 FROM {self.table} LIMIT 1") is None
+
+    def write(self, rows, replace=False):
+        """Write one chunk in one transaction; returns the rows written."""
+        if self.table == "users":
+            return self.users.add_users(rows, replace)
+        with self.database.transaction() as conn:
+            if self.table == "leave_requests":
+                return self.agent.write_leave_requests(conn, rows, charge_ledger=not self.rebuild_ledger)
+            return self.agent.add_events(conn, rows)
+
+    def finish(self):
+        if self.table == "academic_events":
+            self.agent.calendar.invalidate()
+        elif self.rebuild_ledger:
+            self.agent.rebuild_leave_balances()
+
+
+def import_rows(table, rows, chunk_size=50000, replace=False, defer_indexes=None):
+    """Load an iterable of parsed rows into `table`; returns {"written": n, "chunks": n}.
+
+    defer_indexes: True/False, or None to defer only when the table starts empty. Leave loaded into
+    an empty table is charged to the balance ledger by one rebuild at the end.
+    """
+    loader = BulkLoader(table)
+    empty = loader.is_empty()
+    if defer_indexes is None:
+        defer_indexes = empty
+    loader.rebuild_ledger = table == "leave_requests" and empty
+    report = {"written": 0, "chunks": 0}
+    with deferred_indexes(loader.database, table) if defer_indexes else nullcontext([]):
+        try:
+            for chunk in chunked(rows, chunk_size):
+                report["written"] += loader.write(chunk, replace)
+                report["chunks"] += 1
+        finally:
+            loader.finish()
+    return report
+
+
+def import_file(table, path, fmt=None, chunk_size=50000, replace=False, defer_indexes=None):
+    """Stream a CSV or JSONL file ('-' for stdin) into `table`; returns a report of rows read, written and skipped."""
+    fmt = file_format(path, fmt)
+    source = sys.stdin if path == "-" else open(path, encoding="utf-8-sig", newline="")
+    report = {"invalid": 0}
+    try:
+        rows = valid_rows(table, read_records(source, fmt), report)
+        report.update(import_rows(table, rows, chunk_size, replace, defer_indexes))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    return report
+
+
+def export_rows(table):
+    """Yield the table's COLUMNS for every row, in insertion order, without loading the table."""
+    from database import get_database
+    database = get_database(TABLE_FILES[table])
+    cursor = database.execute(f"SELECT {', '.join(COLUMNS[table])} FROM {table} ORDER BY rowid")
+    while True:
+        rows = cursor.fetchmany(1000)
+        if not rows:
+            return
+        yield from rows
+
+
+def export_file(table, path, fmt=None):
+    """Write the table to a CSV or JSONL file ('-' for stdout); returns the number of rows."""
+    fmt = file_format(path, fmt)
+    sink = sys.stdout if path == "-" else open(path, "w", encoding="utf-8", newline="")
+    count = 0
+    try:
+        if fmt == "csv":
+            writer = csv.writer(sink)
+            writer.writerow(COLUMNS[table])
+            for row in export_rows(table):
+                writer.writerow(row)
+                count += 1
+        else:
+            columns = COLUMNS[table]
+            for row in export_rows(table):
+                sink.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n")
+                count += 1
+    finally:
+        if sink is not sys.stdout:
+            sink.close()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("import", "export"))
+    parser.add_argument("table", choices=tuple(COLUMNS))
+    parser.add_argument("path", help="CSV or JSONL file ('-' for stdin/stdout)")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="default: from the file extension (jsonl for '-')")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="rows written per transaction")
+    parser.add_argument("--replace", action="store_true", help="users: overwrite existing IDs instead of skipping them")
+    parser.add_argument("--defer-indexes", action="store_true",
+                        help="rebuild secondary indexes after loading even if the table is not empty")
+    parser.add_argument("--storage", metavar="DB", help="consolidated database built by `python storage.py migrate`")
+    args = parser.parse_args()
+
+    if args.storage:
+        from storage import configure_storage
+        configure_storage(args.storage)
+    started = time.perf_counter()
+    try:
+        if args.command == "import":
+            report = import_file(args.table, args.path, args.format, args.chunk_size, args.replace,
+                                 True if args.defer_indexes else None)
+            elapsed = time.perf_counter() - started
+            print(f"✅ Imported {report['written']} {args.table} rows in {report['chunks']} chunks, "
+                  f"{elapsed:.2f} s ({report['written'] / elapsed:,.0f} rows/s); "
+                  f"{report['invalid']} invalid rows skipped.", file=sys.stderr)
+        else:
+            count = export_file(args.table, args.path, args.format)
+            elapsed = time.perf_counter() - started
+            print(f"✅ Exported {count} {args.table} rows in {elapsed:.2f} s ({count / elapsed:,.0f} rows/s).",
+                  file=sys.stderr)
+    except (OSError, sqlite3.Error) as e:
+        logging.error(f"❌ Bulk {args.command} failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""Background certificate rendering from a persistent SQLite job queue.
+
+    queue = configure_certificate_queue(workers=2)
+    queue.register(database, renderer, apply_records)   # CertificateAgent does this
+    ticket = queue.enqueue(job, digest)                 # returns at once
+    queue.status("STU001", "bonafide")                  # JobStatus of the latest job, or None
+
+With a queue configured, CertificateAgent answers a generation request with a
+ticket instead of rendering inline, and "check bonafide" reports the job as
+pending until it is done. Jobs live in the certificate_jobs table next to the
+certificates they produce, so they survive restarts and are visible to every
+process using that database (the shard workers of shard_pool.py included).
+
+Worker threads claim up to `batch_size` due jobs at a time under a lease,
+render them with the queue's own CertificateRenderer (one process per worker
+thread at most, each batch sent as one chunk), and store the certificate
+records in the same transaction that marks the jobs done. A failed render is
+retried after `retry_delay` seconds, doubling each time, until `max_attempts`;
+a worker that dies mid-job leaves a lease that expires after `lease_seconds`,
+and the job is claimed again. Enqueuing wakes a worker in the same process.
+
+A queue with an `owner` (shard_pool.py passes "shard<N>") only claims the jobs
+it enqueued itself, so the process whose response cache answered "still being
+generated" is the one that finishes the job and invalidates that answer. A
+restarted shard keeps its owner and resumes its predecessor's jobs; as with
+journals, restart with the same --processes count. Queues without an owner
+share the jobs that have none, picking up other processes' within `poll_interval`.
+"""
+import os
+import time
+import sqlite3
+import atexit
+import threading
+import logging
+from typing import NamedTuple
+
+from certificate_renderer import CertificateJob, CertificateRenderer
+from metrics import get_metrics
+from response_cache import invalidate_responses
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Bump when create_jobs_table changes
+CERTIFICATE_JOBS_SCHEMA_VERSION = 2
+
+# Finished jobs are deleted after this many days (tickets are only polled shortly after a request)
+JOB_RETENTION_DAYS = 7
+
+JOB_STATES = ("pending", "running", "done", "failed")
+
+METRICS = get_metrics()
+JOB_RESULTS = METRICS.counter("office_agent_certificate_jobs_total", "Certificate job attempts by result", ("result",))
+JOB_WAIT_SECONDS = METRICS.histogram("office_agent_certificate_job_wait_seconds",
+                                     "Time from enqueue to a finished certificate job")
+
+CLAIM_SQL = '''UPDATE certificate_jobs
+               SET status='running', attempts=attempts + 1, lease_until=?
+               WHERE id IN (SELECT id FROM certificate_jobs
+                            WHERE owner IS ? AND ((status='pending' AND available_at <= ?)
+                                                   OR (status='running' AND lease_until < ?))
+                            ORDER BY id LIMIT ?)
+               RETURNING id, user_id, certificate_type, name, issue_date, file_name, content_hash, attempts,
+                         created_at'''
+
+
+class JobStatus(NamedTuple):
+    """The latest job for a user's certificate type."""
+    ticket: int
+    status: str          # one of JOB_STATES
+    attempts: int
+    error: str = None    # last render error, if any
+    file_name: str = None
+
+
+class CertificateQueue:
+    """Persistent certificate job queue with a pool of worker threads."""
+
+    def __init__(self, workers=2, batch_size=8, max_attempts=3, retry_delay=2.0, lease_seconds=300,
+                 poll_interval=1.0, owner=None):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.owner = owner  # claims only jobs enqueued with the same owner (None: unowned jobs)
+        self.database = None
+        self.renderer = None
+        self.apply = None  # apply(conn, [(user_id, certificate_type, issue_date, file_name, content_hash)])
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._threads = []
+        self._closed = False
+        self.enqueued = 0
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+
+    def create_jobs_table(self, database):
+        """Create the job table with indexes for claiming due jobs and for status lookups."""
+        with database.transaction() as conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS certificate_jobs (
+                                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                user_id TEXT NOT NULL,
+                                certificate_type TEXT NOT NULL,
+                                name TEXT NOT NULL,
+                                issue_date TEXT NOT NULL,
+                                file_name TEXT NOT NULL,
+                                content_hash TEXT,
+                                status TEXT NOT NULL DEFAULT 'pending',
+                                attempts INTEGER NOT NULL DEFAULT 0,
+                                error TEXT,
+                                created_at REAL NOT NULL,
+                                available_at REAL NOT NULL,
+                                lease_until REAL,
+                                finished_at REAL,
+                                owner TEXT
+                            )''')
+            # Migrate tables created before jobs had an owner
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(certificate_jobs)")}
+            if "owner" not in columns:
+                conn.execute("ALTER TABLE certificate_jobs ADD COLUMN owner TEXT")
+            conn.execute("DROP INDEX IF EXISTS idx_certificate_jobs_status")
+            conn.execute('''CREATE INDEX IF NOT EXISTS idx_certificate_jobs_owner_status
+                            ON certificate_jobs (owner, status, available_at)''')
+            conn.execute('''CREATE INDEX IF NOT EXISTS idx_certificate_jobs_user_type
+                            ON certificate_jobs (user_id, certificate_type, id)''')
+
+    def register(self, database, renderer, apply):
+        """Render jobs and store their records with apply(conn, records) on `database`.
+
+        Creates the job table, drops finished jobs past JOB_RETENTION_DAYS and starts the
+        workers on first call; later calls (one per CertificateAgent) just update the handler.
+        The agent's `renderer` only caps the render processes: the queue keeps a pool of its
+        own sized to its worker threads, rather than one process per CPU for batches of 8.
+        """
+        database.ensure_schema("certificate_jobs", CERTIFICATE_JOBS_SCHEMA_VERSION,
+                               lambda: self.create_jobs_table(database))
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("certificate queue is closed")
+            self.database, self.apply = database, apply
+            if self._threads:
+                return
+            self.renderer = CertificateRenderer(workers=min(self.workers, renderer.workers), chunk_size=self.batch_size)
+            self._threads = [threading.Thread(target=self._run, name=f"certificate-worker-{i}", daemon=True)
+                             for i in range(self.workers)]
+        try:
+            with database.transaction() as conn:
+                conn.execute("DELETE FROM certificate_jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+                             (time.time() - JOB_RETENTION_DAYS * 86400,))
+        except sqlite3.Error as e:
+            logging.error(f"❌ Database error while pruning certificate jobs: {e}")
+        for thread in self._threads:
+            thread.start()
+
+    def enqueue(self, job, digest=None):
+        """Queue a CertificateJob; returns its ticket (an unfinished job for the same certificate is reused)."""
+        now = time.time()
+        with self.database.transaction() as conn:
+            active = conn.execute("SELECT id FROM certificate_jobs WHERE user_id=? AND certificate_type=? "
+                                  "AND issue_date=? AND status IN ('pending', 'running') ORDER BY id DESC LIMIT 1",
+                                  (job.user_id, job.certificate_type, job.issue_date)).fetchone()
+            if active:
+                return active[0]
+            ticket = conn.execute('''INSERT INTO certificate_jobs (user_id, certificate_type, name, issue_date,
+                                         file_name, content_hash, created_at, available_at, owner)
+                                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                                  (job.user_id, job.certificate_type, job.name, job.issue_date, job.file_name, digest,
+                                   now, now, self.owner)).lastrowid
+        invalidate_responses(("certificate", job.user_id))
+        with self._lock:
+            self.enqueued += 1
+            self._wakeup.notify()
+        return ticket
+
+    def status(self, user_id, certificate_type):
+        """JobStatus of the latest job for this user and certificate type, or None."""
+        row = self.database.fetchone("SELECT id, status, attempts, error, file_name FROM certificate_jobs "
+                                     "WHERE user_id=? AND certificate_type=? ORDER BY id DESC LIMIT 1",
+                                     (user_id, certificate_type))
+        return JobStatus(*row) if row else None
+
+    def claim(self):
+        """Lease up to batch_size of this owner's due jobs (expired leases included); returns their rows by ticket."""
+        now = time.time()
+        with self.database.transaction() as conn:
+            rows = conn.execute(CLAIM_SQL, (now + self.lease_seconds, self.owner, now, now,
+                                            self.batch_size)).fetchall()
+        return sorted(rows)
+
+    def process(self, rows):
+        """Render claimed jobs, then record the outcomes in one transaction."""
+        jobs = [CertificateJob(user_id, certificate_type, name, issue_date, file_name)
+                for _, user_id, certificate_type, name, issue_date, file_name, _, _, _ in rows]
+        errors = [error for _, error in self.renderer.render_many(jobs)]
+        now = time.time()
+        records, done, retries, failures = [], [], [], []
+        for (ticket, user_id, certificate_type, _, issue_date, file_name, digest, attempts, created_at), error in \
+                zip(rows, errors):
+            if error is None:
+                records.append((user_id, certificate_type, issue_date, file_name, digest))
+                done.append((now, ticket))
+                JOB_WAIT_SECONDS.observe(now - created_at)
+            elif attempts < self.max_attempts:
+                logging.warning(f"⚠️ Certificate job #{ticket} failed (attempt {attempts}), retrying: {error}")
+                retries.append((error, now + self.retry_delay * 2 ** (attempts - 1), ticket))
+            else:
+                logging.error(f"❌ Certificate job #{ticket} failed after {attempts} attempts: {error}")
+                failures.append((error, now, ticket))
+        with self.database.transaction() as conn:
+            self.apply(conn, records)
+            conn.executemany("UPDATE certificate_jobs SET status='done', error=NULL, lease_until=NULL, finished_at=? "
+                             "WHERE id=?", done)
+            conn.executemany("UPDATE certificate_jobs SET status='pending', error=?, available_at=?, lease_until=NULL "
+                             "WHERE id=?", retries)
+            conn.executemany("UPDATE certificate_jobs SET status='failed', error=?, lease_until=NULL, finished_at=? "
+                             "WHERE id=?", failures)
+        for user_id in {row[1] for row in rows}:
+            invalidate_responses(("certificate", user_id))
+        JOB_RESULTS.labels("done").inc(len(done))
+        JOB_RESULTS.labels("retried").inc(len(retries))
+        JOB_RESULTS.labels("failed").inc(len(failures))
+        with self._lock:
+            self.completed += len(done)
+            self.retried += len(retries)
+            self.failed += len(failures)
+        return len(done)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._closed:
+                    return
+            try:
+                rows = self.claim()
+                if rows:
+                    self.process(rows)
+                    continue
+            except sqlite3.Error as e:  # claimed jobs keep their lease and are retried once it expires
+                logging.error(f"❌ Database error in certificate worker: {e}")
+            except Exception as e:  # a render or storage failure must not end the worker; same lease retry
+                logging.error(f"❌ Unexpected error in certificate worker: {e}")
+            with self._lock:
+                if not self._closed:
+                    self._wakeup.wait(self.poll_interval)
+
+    def depth(self):
+        """Jobs per state in the queue table (pending + running is the backlog)."""
+        if self.database is None:  # no agent registered yet
+            return {}
+        counts = dict.fromkeys(JOB_STATES, 0)
+        counts.update(self.database.fetchall("SELECT status, COUNT(*) FROM certificate_jobs GROUP BY status"))
+        return counts
+
+    def stats(self):
+        with self._lock:
+            return {"workers": len(self._threads), "enqueued": self.enqueued, "completed": self.completed,
+                    "retried": self.retried, "failed": self.failed}
+
+    def close(self):
+        """Stop the workers after their current batch; unfinished jobs stay queued for the next start."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join()
+        if self.renderer is not None:
+            self.renderer.close()
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def configure_certificate_queue(workers=2, **options):
+    """Render certificates in the background for agents created from now on; returns the queue."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = CertificateQueue(workers, **options)
+            atexit.register(_queue.close)
+            get_metrics().gauge("office_agent_certificate_queue", "Certificate jobs by state", _queue.depth, "state")
+        return _queue
+
+
+def get_certificate_queue():
+    """Return the process queue, or None when certificates render inline."""
+    return _queue
+
+
+def close_certificate_queue():
+    """Stop the workers and go back to rendering inline."""
+    global _queue
+    with _queue_lock:
+        queue, _queue = _queue, None
+    if queue is not None:
+        queue.close()
+        atexit.unregister(queue.close)
+
+
+def _forget_after_fork():
+    """A forked child has no worker threads; it configures its own queue if it wants one."""
+    global _queue, _queue_lock
+    _queue = None
+    _queue_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_after_fork)
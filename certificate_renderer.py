@@ -0,0 +1,213 @@
+import os
+import time
+import hashlib
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import NamedTuple
+
+from metrics import get_metrics
+
+# Bump whenever the certificate layout changes so cached PDFs are re-rendered
+TEMPLATE_VERSION = 1
+
+# inline: one observation per certificate; bulk: one per render_many call (wall time across the pool)
+PDF_RENDER_SECONDS = get_metrics().histogram("office_agent_pdf_render_seconds", "PDF rendering time", ("mode",))
+INLINE_RENDER_SECONDS = PDF_RENDER_SECONDS.labels("inline")
+BULK_RENDER_SECONDS = PDF_RENDER_SECONDS.labels("bulk")
+
+
+class CertificateJob(NamedTuple):
+    """Everything needed to render one certificate PDF."""
+    user_id: str
+    certificate_type: str
+    name: str
+    issue_date: str
+    file_name: str
+
+
+class CertificateTemplate:
+    """Static layout of one certificate type, built once per process.
+
+    Only the holder's name and the issue date change between certificates, so
+    the title, body wording, fonts and spacing are prepared here and reused.
+    (Cloning a pre-rendered FPDF object was measured slower than redrawing the
+    three text runs: fpdf spends its time assembling the document in output().)
+    """
+
+    def __init__(self, certificate_type):
+        from fpdf import FPDF  # imported on first render: most processes never draw a PDF
+        self.document_class = FPDF
+        self.certificate_type = certificate_type
+        self.title = f"{certificate_type.upper()} CERTIFICATE"
+        self.body = "This is to certify that {name} has been issued a " + certificate_type + " certificate."
+
+    def render(self, name, issue_date, file_name):
+        pdf = self.document_class()
+        pdf.add_page()
+        pdf.set_font("Arial", style='B', size=16)
+        pdf.cell(200, 10, self.title, ln=True, align='C')
+        pdf.ln(20)
+
+        pdf.set_font("Arial", size=12)
+        pdf.multi_cell(0, 10, self.body.format(name=name))
+
+        pdf.ln(10)
+        pdf.cell(200, 10, f"Issue Date: {issue_date}", ln=True, align='L')
+        pdf.output(file_name)
+
+
+@lru_cache(maxsize=None)
+def get_template(certificate_type):
+    return CertificateTemplate(certificate_type)
+
+
+def content_hash(job):
+    """Fingerprint of everything that determines a certificate's content."""
+    fields = (str(TEMPLATE_VERSION), job.certificate_type, job.name, job.issue_date)
+    return hashlib.sha256("\x1f".join(fields).encode("utf-8")).hexdigest()
+
+
+def render_certificate(job):
+    """Render one certificate to job.file_name."""
+    directory = os.path.dirname(job.file_name)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    get_template(job.certificate_type).render(job.name, job.issue_date, job.file_name)
+
+
+def render_chunk(jobs):
+    """Render a list of jobs in a worker; returns an error message (or None) per job."""
+    errors = []
+    for job in jobs:
+        try:
+            render_certificate(job)
+            errors.append(None)
+        except Exception as e:  # report per job, keep rendering the rest
+            errors.append(str(e) or type(e).__name__)
+    return errors
+
+
+class CertificateRenderer:
+    """Renders certificates inline or across a pool of worker processes.
+
+    Bulk jobs are sent to workers in chunks of `chunk_size`. At most
+    `max_pending` chunks are in flight, so a huge job list never sits in the
+    pool's queue all at once. The pool starts on first bulk use; render_many
+    may be called from several threads (the certificate queue's workers).
+    """
+
+    def __init__(self, workers=None, chunk_size=32, max_pending=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.max_pending = max_pending or self.workers * 2
+        self._pool = None
+        self._pool_lock = threading.Lock()  # guards starting, replacing and closing the pool
+
+    def render(self, job):
+        """Render a single certificate in the calling process."""
+        with INLINE_RENDER_SECONDS.time():
+            render_certificate(job)
+
+    def render_many(self, jobs):
+        """Render jobs, yielding (job, error message or None) in input order."""
+        with BULK_RENDER_SECONDS.time():
+            yield from self._render_many(jobs)
+
+    def _render_many(self, jobs):
+        if self.workers <= 1:
+            for chunk in _chunks(jobs, self.chunk_size):
+                yield from zip(chunk, render_chunk(chunk))
+            return
+
+        pool = self._get_pool()
+        from concurrent.futures import BrokenExecutor
+        in_flight = deque()
+        try:
+            for chunk in _chunks(jobs, self.chunk_size):
+                if len(in_flight) >= self.max_pending:
+                    yield from _collect(*in_flight.popleft())
+                in_flight.append((chunk, pool.submit(render_chunk, chunk)))
+        except BrokenExecutor:
+            # A worker process died: the next bulk use starts a fresh pool (unless another thread already did)
+            with self._pool_lock:
+                if self._pool is pool:
+                    self._pool = None
+            pool.shutdown(wait=False)
+            raise
+        while in_flight:
+            yield from _collect(*in_flight.popleft())
+
+    def _get_pool(self):
+        """The worker pool, started once even when several threads bulk render at the same time."""
+        with self._pool_lock:
+            if self._pool is None:
+                # Imported here: multiprocessing is a large share of startup for processes that never bulk render
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+                # spawn: safe when the parent runs threads (server mode) and on Windows
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def close(self):
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+def evict_certificates(directory="certificates", max_bytes=None, max_age_days=None, managed=None):
+    """Bound disk use of rendered certificates; returns the removed paths.
+
+    PDFs not used for `max_age_days` are deleted first, then the least recently
+    used ones until the directory holds at most `max_bytes`. Reusing a cached PDF
+    touches its mtime, so mtime order is least-recently-used order. If `managed`
+    is given, only those paths (the files this cache rendered and recorded) are
+    counted or removed; anything else in the directory is left alone. Records stay
+    in the database; a removed file is simply rendered again on the next request.
+    """
+    if managed is not None:
+        managed = {os.path.normpath(path) for path in managed}
+    try:
+        with os.scandir(directory) as entries:
+            files = sorted((entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                           for entry in entries if entry.is_file() and entry.name.endswith(".pdf")
+                           and (managed is None or os.path.normpath(entry.path) in managed))
+    except FileNotFoundError:
+        return []
+
+    cutoff = time.time() - max_age_days * 86400 if max_age_days is not None else None
+    total = sum(size for _, size, _ in files)
+    removed = []
+    for mtime, size, path in files:
+        expired = cutoff is not None and mtime < cutoff
+        over_budget = max_bytes is not None and total > max_bytes
+        if not expired and not over_budget:
+            break  # everything after this file is newer
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed.append(path)
+    return removed
+
+
+def _collect(chunk, future):
+    """Pair a finished chunk's jobs with their errors; a crashed worker fails the whole chunk."""
+    try:
+        errors = future.result()
+    except Exception as e:
+        errors = [f"render worker failed: {e}"] * len(chunk)
+    return zip(chunk, errors)
+
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
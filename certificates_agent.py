@@ -1,126 +1,341 @@
-import sqlite3
 import datetime
 import os
+import time
 import logging
-from fpdf import FPDF
+from database import get_database
+from user_directory import get_user_directory, normalize_user_id
+from certificate_renderer import CertificateJob, CertificateRenderer, content_hash, evict_certificates
+from certificate_queue import get_certificate_queue
+from intent_parser import parse_query
+from metrics import get_metrics, request_log
+from request_journal import get_journal
+from response_cache import invalidate_responses
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+# One record per (user, type, issue date); re-rendering replaces the path and hash
+UPSERT_CERTIFICATE_SQL = '''INSERT INTO certificates (user_id, certificate_type, issue_date, certificate_path, content_hash)
+                              VALUES (?, ?, ?, ?, ?)
+                              ON CONFLICT (user_id, certificate_type, issue_date)
+                              DO UPDATE SET certificate_path = excluded.certificate_path,
+                                            content_hash = excluded.content_hash'''
+
+# Bump when create_certificates_table changes
+CERTIFICATES_SCHEMA_VERSION = 1
+
+METRICS = get_metrics()
+CERTIFICATES = METRICS.counter("office_agent_certificates_total", "Certificate requests by result", ("result",))
+AGENT_STAGE_SECONDS = METRICS.histogram("office_agent_agent_stage_seconds", "Time per stage inside an agent",
+                                        ("agent", "stage"))
+GENERATE_SECONDS = AGENT_STAGE_SECONDS.labels("certificate", "generate")
+VERIFY_SECONDS = AGENT_STAGE_SECONDS.labels("certificate", "verify")
+
+# Seconds between scans of the certificates/ directory for eviction
+EVICTION_INTERVAL = 60
+
 class CertificateAgent:
-    def __init__(self):
+    INTENTS = ("certificate",)
+
+    def __init__(self, render_workers=None, max_certificate_bytes=1 << 30, max_certificate_age_days=365):
         """Initialize the Certificate Agent with database setup."""
         self.db = "users.db"  # FIXED: Now using the correct database
-        self.create_certificates_table()
+        self.database = get_database(self.db)
+        self.renderer = CertificateRenderer(workers=render_workers)  # worker pool is only used for bulk jobs
+        self.max_certificate_bytes = max_certificate_bytes
+        self.max_certificate_age_days = max_certificate_age_days
+        self._next_eviction = 0.0
+        self.journal = get_journal()  # None: every record commits its own transaction
+        self.database.ensure_schema("certificates", CERTIFICATES_SCHEMA_VERSION, self.create_certificates_table)
+        self.users = get_user_directory(self.db)
+        if self.journal:
+            self.journal.register("certificate", self.database, self.apply_journal_entries)
+        self.jobs = get_certificate_queue()  # None: single requests render inline
+        if self.jobs:
+            self.jobs.register(self.database, self.renderer, self.apply_journal_entries)
 
     def create_certificates_table(self):
         """Ensure the certificates table exists in the database."""
-        conn = sqlite3.connect(self.db)
-        cursor = conn.cursor()
-
-        cursor.execute('''CREATE TABLE IF NOT EXISTS certificates (
+        with self.database.transaction() as conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS certificates (
                             id INTEGER PRIMARY KEY AUTOINCREMENT,
                             user_id TEXT,
                             certificate_type TEXT,
                             issue_date TEXT,
-                            certificate_path TEXT
+                            certificate_path TEXT,
+                            content_hash TEXT
                         )''')
-
-        conn.commit()
-        conn.close()
+            # Migrate tables created before certificates were deduplicated
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(certificates)")}
+            if "content_hash" not in columns:
+                conn.execute("ALTER TABLE certificates ADD COLUMN content_hash TEXT")
+            if not conn.execute("SELECT 1 FROM sqlite_master WHERE type='index' "
+                                "AND name='idx_certificates_user_type_date'").fetchone():
+                conn.execute('''DELETE FROM certificates WHERE id NOT IN (
+                                    SELECT MAX(id) FROM certificates GROUP BY user_id, certificate_type, issue_date)''')
+                conn.execute('''CREATE UNIQUE INDEX idx_certificates_user_type_date
+                                ON certificates (user_id, certificate_type, issue_date)''')
         logging.info("✅ Certificates table initialized successfully.")
 
     def fetch_user_details(self, user_id):
-        """Fetch user details dynamically from the users table."""
-        conn = sqlite3.connect(self.db)
-        cursor = conn.cursor()
-        cursor.execute("SELECT name, role FROM users WHERE user_id=?", (user_id,))
-        result = cursor.fetchone()
-        conn.close()
-
-        if result:
-            return {"name": result[0], "role": result[1]}  # 'Student' or 'Employee'
-        return None
+        """Fetch user details (a UserRecord) through the shared user directory cache."""
+        return self.users.get(user_id)
 
     def generate_certificate(self, user_id, certificate_type):
         """Generate a certificate in PDF format."""
-        user_details = self.fetch_user_details(user_id)
+        response, record = self.render_certificate(user_id, certificate_type)
+        if record:
+            # Store certificate record
+            self.store_certificate(*record)
+        return response
 
+    def check_eligibility(self, user_details, certificate_type):
+        """Return an error response if the user may not receive this certificate type, else None."""
         if not user_details:
             return "❌ User ID not found in database!"
 
         # Enforce certificate type rules
-        if certificate_type == "bonafide" and user_details["role"] != "Student":
+        if certificate_type == "bonafide" and user_details.role != "Student":
             return "❌ Bonafide certificates are only issued to students."
-        if certificate_type == "noc" and user_details["role"] != "Employee":
+        if certificate_type == "noc" and user_details.role != "Employee":
             return "❌ NOC certificates are only issued to employees."
+        return None
 
-        # Generate certificate
+    def certificate_job(self, user_details, certificate_type):
+        """Describe the PDF to render for a user issued today."""
         issue_date = datetime.date.today().strftime("%Y-%m-%d")
-        os.makedirs("certificates", exist_ok=True)
-        file_name = f"certificates/{user_id}_{certificate_type}_{issue_date}.pdf"
+        file_name = f"certificates/{user_details.user_id}_{certificate_type}_{issue_date}.pdf"
+        return CertificateJob(user_details.user_id, certificate_type, user_details.name, issue_date, file_name)
+
+    def reuse_certificate(self, issued, digest):
+        """True if an issued (certificate_path, content_hash) has unchanged content and its file still exists."""
+        if not issued or issued[1] != digest:
+            return False
+        try:
+            os.utime(issued[0])  # mark as recently used for eviction
+        except OSError:
+            return False
+        return True
+
+    def render_certificate(self, user_id, certificate_type):
+        """Write the certificate PDF unless an identical one exists; returns (response, record to store or None)."""
+        user_details = self.fetch_user_details(user_id)
+        error = self.check_eligibility(user_details, certificate_type)
+        if error:
+            CERTIFICATES.labels("rejected").inc()
+            return error, None
 
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_font("Arial", style='B', size=16)
-        pdf.cell(200, 10, f"{certificate_type.upper()} CERTIFICATE", ln=True, align='C')
-        pdf.ln(20)
+        job = self.certificate_job(user_details, certificate_type)
+        digest = content_hash(job)
+        self.sync_writes(job.user_id)
+        issued = self.database.fetchone("SELECT certificate_path, content_hash FROM certificates "
+                                        "WHERE user_id=? AND certificate_type=? AND issue_date=?",
+                                        (job.user_id, certificate_type, job.issue_date))
+        if self.reuse_certificate(issued, digest):
+            CERTIFICATES.labels("reused").inc()
+            request_log.info("♻️ Reusing unchanged certificate %s.", issued[0])
+            return self.generated_response(certificate_type, issued[0]), None
 
-        pdf.set_font("Arial", size=12)
-        pdf.multi_cell(0, 10, f"This is to certify that {user_details['name']} has been issued a {certificate_type} certificate.")
+        if self.jobs:
+            ticket = self.jobs.enqueue(job, digest)
+            CERTIFICATES.labels("queued").inc()
+            return self.queued_response(certificate_type, ticket), None
 
-        pdf.ln(10)
-        pdf.cell(200, 10, f"Issue Date: {issue_date}", ln=True, align='L')
-        pdf.output(file_name)
+        # Generate certificate
+        self.renderer.render(job)
+        CERTIFICATES.labels("rendered").inc()
+        return (self.generated_response(certificate_type, job.file_name),
+                (job.user_id, certificate_type, job.issue_date, job.file_name, digest))
 
-        # Store certificate record
-        self.store_certificate(user_id, certificate_type, issue_date, file_name)
+    def generated_response(self, certificate_type, file_name):
         return f"✅ {certificate_type.capitalize()} Certificate generated successfully! Saved as {file_name}"
 
-    def store_certificate(self, user_id, certificate_type, issue_date, file_path):
-        """Save certificate details in the database."""
-        conn = sqlite3.connect(self.db)
-        cursor = conn.cursor()
-        cursor.execute('''INSERT INTO certificates (user_id, certificate_type, issue_date, certificate_path)
-                          VALUES (?, ?, ?, ?)''',
-                       (user_id, certificate_type, issue_date, file_path))
-        conn.commit()
-        conn.close()
-        logging.info(f"✅ Certificate record stored for {user_id}.")
+    def queued_response(self, certificate_type, ticket):
+        return (f"🕒 {certificate_type.capitalize()} certificate queued (ticket #{ticket}). "
+                f"Say 'check {certificate_type}' to see when it is ready.")
+
+    def generate_certificates(self, user_ids, certificate_type):
+        """Generate one certificate type for many users, rendering across the worker pool.
+
+        Users are looked up with one directory call and the records are stored in
+        a single transaction. Returns one response per user ID, in order.
+        """
+        user_ids = list(user_ids)
+        users = self.users.get_many(user_ids)
+        self.sync_writes()
+        issue_date = datetime.date.today().strftime("%Y-%m-%d")
+        issued = self.issued_certificates(certificate_type, issue_date, users)
+        responses = [None] * len(user_ids)
+        jobs = []  # (index, CertificateJob, content hash) still to render
+        for index, user_id in enumerate(user_ids):
+            user_details = users.get(normalize_user_id(user_id))
+            error = self.check_eligibility(user_details, certificate_type)
+            if error:
+                responses[index] = error
+                CERTIFICATES.labels("rejected").inc()
+                continue
+            job = self.certificate_job(user_details, certificate_type)
+            digest = content_hash(job)
+            existing = issued.get(job.user_id)
+            if self.reuse_certificate(existing, digest):
+                responses[index] = self.generated_response(certificate_type, existing[0])
+                CERTIFICATES.labels("reused").inc()
+            else:
+                issued[job.user_id] = (job.file_name, digest)  # duplicate IDs in the list render once
+                jobs.append((index, job, digest))
+
+        records = []
+        rendered = self.renderer.render_many(job for _, job, _ in jobs)
+        for (index, _, digest), (job, error) in zip(jobs, rendered):
+            if error:
+                logging.error(f"❌ Failed to render certificate {job.file_name}: {error}")
+                responses[index] = "❌ Certificate generation failed, please try again."
+                CERTIFICATES.labels("failed").inc()
+            else:
+                records.append((job.user_id, job.certificate_type, job.issue_date, job.file_name, digest))
+                responses[index] = self.generated_response(certificate_type, job.file_name)
+                CERTIFICATES.labels("rendered").inc()
+        for index, response in enumerate(responses):
+            if response is None:  # duplicate of a job rendered above
+                responses[index] = self.generated_response(certificate_type, issued[normalize_user_id(user_ids[index])][0])
+        self.store_certificates(records)
+        return responses
+
+    def issued_certificates(self, certificate_type, issue_date, user_ids):
+        """Map user_id -> (certificate_path, content_hash) for certificates already issued on a date."""
+        user_ids = list(user_ids)
+        issued = {}
+        for start in range(0, len(user_ids), 500):
+            chunk = user_ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for user_id, path, digest in self.database.fetchall(
+                    f"SELECT user_id, certificate_path, content_hash FROM certificates WHERE certificate_type=? "
+                    f"AND issue_date=? AND user_id IN ({placeholders})", [certificate_type, issue_date, *chunk]):
+                issued[user_id] = (path, digest)
+        return issued
+
+    def store_certificate(self, user_id, certificate_type, issue_date, file_path, digest=None):
+        """Save certificate details in the database (through the request journal when one is configured)."""
+        record = (user_id, certificate_type, issue_date, file_path, digest)
+        if self.journal:
+            self.journal.append("certificate", user_id, record)
+        else:
+            with self.database.transaction() as conn:
+                conn.execute(UPSERT_CERTIFICATE_SQL, record)
+        invalidate_responses(("certificate", user_id))
+        request_log.info("✅ Certificate record stored for %s.", user_id)
+        self.evict_old_certificates()
+
+    def apply_journal_entries(self, conn, payloads):
+        """Upsert certificate records inside the caller's transaction (journal group commits, finished queue jobs)."""
+        conn.executemany(UPSERT_CERTIFICATE_SQL, payloads)
+
+    def sync_writes(self, user_id=None):
+        """Commit journaled records (only `user_id`'s, if given, and those queued with them) before a read."""
+        if self.journal:
+            if user_id is None:
+                self.journal.flush()
+            else:
+                self.journal.barrier("certificate", user_id)
+
+    def store_certificates(self, records):
+        """Save many (user_id, certificate_type, issue_date, file_path, content_hash) records in one transaction."""
+        if not records:
+            return
+        with self.database.transaction() as conn:
+            conn.executemany(UPSERT_CERTIFICATE_SQL, records)
+        for user_id in {record[0] for record in records}:
+            invalidate_responses(("certificate", user_id))
+        logging.info(f"✅ {len(records)} certificate records stored.")
+        self.evict_old_certificates()
+
+    def evict_old_certificates(self, force=False):
+        """Apply the size/age limits to certificates/ (at most once per EVICTION_INTERVAL unless forced)."""
+        now = time.monotonic()
+        if not force and now < self._next_eviction:
+            return []
+        self._next_eviction = now + EVICTION_INTERVAL
+        # Only PDFs rendered by this cache (recorded with a content hash) are evicted, never hand-placed ones
+        managed = [row[0] for row in self.database.fetchall(
+            "SELECT certificate_path FROM certificates WHERE content_hash IS NOT NULL")]
+        removed = evict_certificates("certificates", self.max_certificate_bytes, self.max_certificate_age_days,
+                                     managed)
+        if removed:
+            logging.info(f"🧹 Evicted {len(removed)} cached certificate files.")
+        return removed
 
     def verify_certificate(self, user_id, certificate_type):
         """Check if a certificate has been issued to the user."""
-        conn = sqlite3.connect(self.db)
-        cursor = conn.cursor()
-        cursor.execute("SELECT issue_date, certificate_path FROM certificates WHERE user_id=? AND certificate_type=?",
-                       (user_id, certificate_type))
-        record = cursor.fetchone()
-        conn.close()
+        user_id = normalize_user_id(user_id)
+        if self.jobs:
+            job = self.jobs.status(user_id, certificate_type)
+            if job and job.status in ("pending", "running"):
+                return f"🕒 Your {certificate_type} certificate is still being generated (ticket #{job.ticket})."
+            if job and job.status == "failed":
+                return (f"❌ Generating your {certificate_type} certificate failed (ticket #{job.ticket}). "
+                        f"Please request it again.")
+        self.sync_writes(user_id)
+        # Latest issue first; served by the unique (user_id, certificate_type, issue_date) index
+        record = self.database.fetchone("SELECT issue_date, certificate_path FROM certificates "
+                                        "WHERE user_id=? AND certificate_type=? ORDER BY issue_date DESC, id DESC LIMIT 1",
+                                        (user_id, certificate_type))
 
+        if record and not os.path.exists(record[1]):  # the cached PDF was evicted
+            return (f"✅ Certificate found! Issued on {record[0]}. The file has been archived; "
+                    f"request the {certificate_type} certificate again for a new copy.")
         if record:
             return f"✅ Certificate found! Issued on {record[0]}. File: {record[1]}"
         else:
             return "❌ No certificate found for the given user ID and type."
 
-    def handle_query(self, user_id, query):
-        """Process user queries related to certificates."""
-        query = query.lower()
-
+    def resolve_certificate_type(self, user_id, parsed):
+        """Return (certificate_type, None) or (None, error response) for a parsed query."""
         if not user_id:
-            return "❌ Please provide a valid User ID (e.g., STU001 for students, EMP001 for employees)."
+            return None, "❌ Please provide a valid User ID (e.g., STU001 for students, EMP001 for employees)."
+        if not parsed.certificate_type:
+            return None, "❌ Please specify the certificate type (Bonafide, NOC)."
+        return parsed.certificate_type, None
 
-        # Extract certificate type
-        certificate_types = ["bonafide", "noc"]
-        certificate_type = next((ct for ct in certificate_types if ct in query), None)
-        if not certificate_type:
-            return "❌ Please specify the certificate type (Bonafide, NOC)."
+    def handle_query(self, user_id, query, parsed=None):
+        """Process user queries related to certificates (`parsed` is the router's ParsedRequest, if any)."""
+        parsed = parsed or parse_query(query)
+        certificate_type, error = self.resolve_certificate_type(user_id, parsed)
+        if error:
+            return error
 
         # Handle verification requests
-        if "verify" in query or "check" in query:
-            return self.verify_certificate(user_id, certificate_type)
+        if parsed.verify:
+            with VERIFY_SECONDS.time():
+                return self.verify_certificate(user_id, certificate_type)
 
         # Generate the certificate
-        return self.generate_certificate(user_id, certificate_type)
+        with GENERATE_SECONDS.time():
+            return self.generate_certificate(user_id, certificate_type)
+
+    def handle_batch(self, items):
+        """Process (user_id, query, parsed) certificate queries in order, storing new records with executemany.
+
+        Records generated earlier in the batch are flushed before a verification so it sees them.
+        """
+        responses = []
+        records = []
+        self.sync_writes()
+        for user_id, query, parsed in items:
+            parsed = parsed or parse_query(query)
+            certificate_type, error = self.resolve_certificate_type(user_id, parsed)
+            if error:
+                responses.append(error)
+            elif parsed.verify:
+                self.store_certificates(records)
+                records = []
+                responses.append(self.verify_certificate(user_id, certificate_type))
+            else:
+                response, record = self.render_certificate(user_id, certificate_type)
+                if record:
+                    records.append(record)
+                responses.append(response)
+        self.store_certificates(records)
+        return responses
 
 
 # Run the Certificate Agent
@@ -0,0 +1,197 @@
+import os
+import sqlite3
+import threading
+import logging
+from contextlib import contextmanager
+
+from metrics import get_metrics
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Pragmas applied once to every pooled connection
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",      # readers no longer block the writer
+    "PRAGMA synchronous=NORMAL",    # safe with WAL, avoids an fsync per commit
+    "PRAGMA busy_timeout=5000",     # wait for locks instead of failing immediately
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",      # ~8 MB page cache per connection
+)
+
+# Size of the per-connection prepared statement cache
+STATEMENT_CACHE_SIZE = 256
+
+DB_SECONDS = get_metrics().histogram("office_agent_db_seconds", "SQLite call latency by database file and operation",
+                                     ("db", "op"))
+
+
+class Database:
+    """Pool of long-lived SQLite connections to one database file, one per thread."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self._schema_lock = threading.Lock()
+        self._schema_versions = None  # component -> version, read once per process
+        name = os.path.basename(path)
+        self._execute_seconds = DB_SECONDS.labels(name, "execute")
+        self._fetchone_seconds = DB_SECONDS.labels(name, "fetchone")
+        self._fetchall_seconds = DB_SECONDS.labels(name, "fetchall")
+        self._transaction_seconds = DB_SECONDS.labels(name, "transaction")
+
+    def connect(self):
+        """Open a new tuned connection to the database file."""
+        conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def connection(self):
+        """Return the calling thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self.connect()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def execute(self, sql, params=()):
+        """Execute a statement on the calling thread's connection."""
+        with self._execute_seconds.time():
+            return self.connection().execute(sql, params)
+
+    def fetchone(self, sql, params=()):
+        with self._fetchone_seconds.time():
+            return self.connection().execute(sql, params).fetchone()
+
+    def fetchall(self, sql, params=()):
+        with self._fetchall_seconds.time():
+            return self.connection().execute(sql, params).fetchall()
+
+    @contextmanager
+    def transaction(self):
+        """Run a block of writes in one transaction, committing on success (timed including the commit)."""
+        conn = self.connection()
+        with self._transaction_seconds.time(), conn:
+            yield conn
+
+    def ensure_schema(self, component, version, create):
+        """Run create() unless this database already records `version` for `component`.
+
+        Versions live in a schema_versions table that is read once per process, so
+        agents constructed after the first (and later processes, once the version
+        is recorded) skip their CREATE/ALTER checks. Returns True if create() ran;
+        on a database error nothing is recorded and the check runs again next time.
+        """
+        with self._schema_lock:
+            if self._recorded_versions().get(component) == version:
+                return False
+            try:
+                create()
+                with self.transaction() as conn:
+                    self.record_schema_version(conn, component, version)
+            except sqlite3.Error as e:
+                logging.error(f"❌ Database error while preparing the {component} schema: {e}")
+                return False
+            self._schema_versions[component] = version
+            return True
+
+    def migrate(self, component, migrations):
+        """Apply (version, description, apply(conn)) steps newer than the version recorded for `component`.
+
+        Each step runs and records its version in one transaction, so an interrupted
+        run resumes at the first step not applied. Returns the number of steps applied.
+        """
+        applied = 0
+        with self._schema_lock:
+            current = self._recorded_versions().get(component, 0)
+            for version, description, apply in migrations:
+                if version <= current:
+                    continue
+                with self.transaction() as conn:
+                    apply(conn)
+                    self.record_schema_version(conn, component, version)
+                self._schema_versions[component] = current = version
+                applied += 1
+                logging.info(f"✅ Migrated {component} schema to version {version}: {description}.")
+        return applied
+
+    def _recorded_versions(self):
+        """Component -> version from the schema_versions table, read once; caller holds _schema_lock."""
+        if self._schema_versions is None:
+            try:
+                self._schema_versions = dict(self.fetchall("SELECT component, version FROM schema_versions"))
+            except sqlite3.OperationalError:  # table not created yet
+                self._schema_versions = {}
+        return self._schema_versions
+
+    def record_schema_version(self, conn, component, version):
+        """Record `version` for `component` inside the caller's transaction."""
+        conn.execute('''CREATE TABLE IF NOT EXISTS schema_versions (
+                            component TEXT PRIMARY KEY,
+                            version INTEGER NOT NULL
+                        )''')
+        conn.execute('''INSERT INTO schema_versions (component, version) VALUES (?, ?)
+                        ON CONFLICT (component) DO UPDATE SET version = excluded.version''', (component, version))
+
+    def close(self):
+        """Close every connection opened through this pool."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    def forget(self):
+        """Drop connections inherited across fork() without closing them; they belong to the parent."""
+        self._lock = threading.Lock()
+        self._schema_lock = threading.Lock()
+        self._connections = []
+        self._local = threading.local()
+
+
+_databases = {}
+_databases_lock = threading.Lock()
+_aliases = {}  # legacy file name -> file actually opened (see storage.py)
+
+
+def get_database(path):
+    """Return the shared connection pool for a database file (or the file it is aliased to)."""
+    with _databases_lock:
+        path = _aliases.get(path, path)
+        database = _databases.get(path)
+        if database is None:
+            database = _databases[path] = Database(path)
+        return database
+
+
+def alias_database(path, target):
+    """Open `target` whenever `path` is asked for; pools already handed out are unaffected."""
+    with _databases_lock:
+        if target is None:
+            _aliases.pop(path, None)
+        else:
+            _aliases[path] = target
+
+
+def close_all():
+    """Close all pooled connections (e.g. before the process exits)."""
+    with _databases_lock:
+        databases = list(_databases.values())
+        _databases.clear()
+    for database in databases:
+        database.close()
+
+
+def _forget_after_fork():
+    """SQLite connections must not be used across fork(): a forked child reopens its own on first use."""
+    global _databases_lock
+    _databases_lock = threading.Lock()
+    for database in _databases.values():
+        database.forget()
+
+
+os.register_at_fork(after_in_child=_forget_after_fork)
@@ -0,0 +1,202 @@
+"""Natural-language leave periods: "tomorrow", "next monday", "from 3rd to 5th march",
+"next week", "3 days starting friday", "in 2 weeks", or two ISO dates.
+
+One compiled pattern scans the query for date tokens; the tokens are then
+resolved against today's date from a configurable clock (set_clock), so tests
+and replays can pin the date. Parses are memoized per (query, today), so repeated
+phrasings cost a dictionary lookup.
+
+Dates without a year fall in the next twelve months: "5 march" asked in
+October means March of next year. A range's end moves to the next year only
+when the months wrap ("28th dec to 3rd jan"); "10th to 2nd march" is rejected. A day without a month ("the 5th") borrows it
+from the other end of the range, else means the next such day. A weekday
+ending a range counts from its start: "next friday to next monday" asked on a
+Saturday is six days later to the Monday after. "this week" and "next week" are
+their working days, Monday to Friday; asked on a weekend, "this week" is the
+coming one.
+"""
+import re
+import datetime
+from functools import lru_cache
+
+MONTHS = ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+RELATIVE_DAYS = {"today": 0, "tomorrow": 1, "day after tomorrow": 2}
+
+_DAY = r"(\d{1,2})(?:st|nd|rd|th)?"
+_MONTH = (r"(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sep(?:t(?:ember)?)?"
+          r"|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\b")
+_YEAR = r"(?:,?\s+(\d{4})\b)?"
+_TO = r"\s*(?:-|to|till|until|through|and)\s*"
+_NOT_DURATION = r"(?!\s*(?:days?|weeks?)\b)"
+
+# (kind, pattern) in the order they are tried at each position; inner groups are the token's values
+TOKENS = (
+    ("iso", r"\b(\d{4}-\d\d-\d\d)\b"),
+    ("day_range", rf"\b{_DAY}{_TO}{_DAY}\s+(?:of\s+)?{_MONTH}{_YEAR}"),
+    ("month_range", rf"\b{_MONTH}\s+{_DAY}{_TO}{_DAY}\b{_NOT_DURATION}{_YEAR}"),
+    ("day_month", rf"\b{_DAY}\s+(?:of\s+)?{_MONTH}{_YEAR}"),
+    ("month_day", rf"\b{_MONTH}\s+{_DAY}\b{_NOT_DURATION}{_YEAR}"),
+    ("ordinal", r"\b(\d{1,2})(?:st|nd|rd|th)\b"),
+    ("offset", r"\b(?:in|after)\s+(\d+)\s*(days?|weeks?)\b"),
+    ("span", r"\b(\d+)\s*(days?|weeks?)\b"),
+    ("relative", r"\b(day after tomorrow|tomorrow|today)\b"),
+    ("weekday", rf"\b(?:(this|next|coming)\s+)?({'|'.join(WEEKDAYS)})\b"),
+    ("week", r"\b(this|next)\s+week\b"),
+)
+# Every token starts a word with a digit or one of these letters; checking that once per
+# position spares trying each alternative in turn
+DATE_PATTERN = re.compile(r"\b(?=[\dacdfijmnostw])(?:"
+                          + "|".join(f"(?P<{kind}>{pattern})" for kind, pattern in TOKENS) + ")")
+# Capturing groups inside each token, read back by position after its own group
+_WIDTHS = {kind: re.compile(pattern).groups for kind, pattern in TOKENS}
+
+_clock = datetime.date.today
+
+
+def set_clock(clock=None):
+    """Anchor relative dates to clock() instead of the system date (None restores it)."""
+    global _clock
+    _clock = clock or datetime.date.today
+
+
+def today():
+    return _clock()
+
+
+def scan(text):
+    """(kind, values) for every date token in a lower-cased query, in order."""
+    tokens = []
+    for match in DATE_PATTERN.finditer(text):
+        index = match.lastindex
+        kind = match.lastgroup
+        tokens.append((kind, match.groups()[index:index + _WIDTHS[kind]]))
+    return tuple(tokens)
+
+
+def _weekday(qualifier, name, today):
+    ahead = (WEEKDAYS.index(name) - today.weekday()) % 7
+    if qualifier == "next" and ahead == 0:
+        ahead = 7
+    return today + datetime.timedelta(days=ahead)
+
+
+def _week(qualifier, today):
+    monday = today - datetime.timedelta(days=today.weekday())
+    if qualifier == "next" or today.weekday() >= 5:  # on a weekend "this week" has no working days left
+        monday += datetime.timedelta(days=7)
+    return max(monday, today), monday + datetime.timedelta(days=4)
+
+
+def _days(count, unit):
+    return int(count) * (7 if unit.startswith("week") else 1)
+
+
+def _points(tokens, today):
+    """Split tokens into dates, partial (day, month, year) dates or (qualifier, weekday) pairs, and the
+    first duration in days."""
+    points = []
+    span = None
+    for kind, values in tokens:
+        if kind == "iso":
+            points.append(datetime.date.fromisoformat(values[0]))
+        elif kind == "day_range":
+            day, last_day, month, year = values
+            points += [(int(day), month, year), (int(last_day), month, year)]
+        elif kind == "month_range":
+            month, day, last_day, year = values
+            points += [(int(day), month, year), (int(last_day), month, year)]
+        elif kind == "day_month":
+            points.append((int(values[0]), values[1], values[2]))
+        elif kind == "month_day":
+            points.append((int(values[1]), values[0], values[2]))
+        elif kind == "ordinal":
+            points.append((int(values[0]), None, None))
+        elif kind == "offset":
+            points.append(today + datetime.timedelta(days=_days(*values)))
+        elif kind == "span":
+            span = span or _days(*values)
+        elif kind == "relative":
+            points.append(today + datetime.timedelta(days=RELATIVE_DAYS[values[0]]))
+        elif kind == "weekday":
+            points.append((values[0], values[1]))  # resolved from the previous date, see _complete
+        else:
+            points += _week(values[0], today)
+    return points, span
+
+
+def _complete(points, today):
+    """Resolve partial dates, borrowing a missing month or year from the other end of the range.
+
+    Weekdays count from the previous date, so the end of a range falls on or after its start.
+    """
+    partial = [point if isinstance(point, tuple) and len(point) == 3 else (None, None, None) for point in points]
+    months = [month for _, month, _ in partial]
+    years = [year for _, _, year in partial if year]
+    dates = []
+    for i, point in enumerate(points):
+        previous = dates[-1] if dates else today
+        if not isinstance(point, tuple):
+            dates.append(point)
+            continue
+        if len(point) == 2:
+            dates.append(_weekday(*point, previous))
+            continue
+        day, month, year = point
+        if month is None:  # the next month named, else the previous one
+            month = next((m for m in months[i:] + months[:i][::-1] if m), None)
+        year = year or (years[0] if years else None)
+        if month is None:  # "the 5th": the next 5th on or after the previous date
+            date = previous.replace(day=day)
+            if date < previous:
+                date = (date.replace(day=1) + datetime.timedelta(days=32)).replace(day=day)
+        elif year:
+            date = datetime.date(int(year), MONTHS.index(month[:3]) + 1, day)
+        else:  # no year: the next such date on or after the previous one
+            date = datetime.date(previous.year, MONTHS.index(month[:3]) + 1, day)
+            if date < previous:
+                if dates and date.month >= previous.month:  # "10th to 2nd march" is backwards, not a year long
+                    raise ValueError(f"range ends before it starts: {date} < {previous}")
+                date = date.replace(year=previous.year + 1)  # "28th dec to 3rd jan"
+        dates.append(date)
+    return dates
+
+
+@lru_cache(maxsize=16384)
+def _parse(text, today):
+    try:
+        return _resolve(text, today)
+    except (ValueError, OverflowError):  # "2025-02-30", "31st june", "99999999999 days"
+        return None
+
+
+def _resolve(text, today):
+    """(start, end) for a lower-cased query, or None; raises on dates out of range."""
+    points, span = _points(scan(text), today)
+    dates = _complete(points, today)
+    if len(dates) == 2:
+        start, end = dates
+    elif len(dates) == 1:
+        start = dates[0]
+        end = start + datetime.timedelta(days=span - 1) if span else start
+    elif not dates and span:
+        start = today
+        end = start + datetime.timedelta(days=span - 1)
+    else:
+        return None
+    if end < start or (span is not None and span < 1):
+        return None
+    return start, end
+
+
+def parse_period(query, today=None):
+    """Return the (start_date, end_date) a query asks for, inclusive, or None.
+
+    Two dates make a range; one date with "N days"/"N weeks" starts there; a duration
+    alone starts today; a single date is one day. Other combinations are ambiguous.
+    """
+    return _parse(query.lower(), today or _clock())
+
+
+def cache_info():
+    return _parse.cache_info()
@@ -1,11 +1,7 @@
-import sqlite3
+from user_directory import get_user_directory
 
 db_path = "users.db"
 
-# Connect to the database
-conn = sqlite3.connect(db_path)
-cursor = conn.cursor()
-
 # Insert sample users (Modify as needed)
 users = [
     ("STU001", "Rahul Sharma", "Student"),
@@ -15,12 +11,7 @@ users = [
     ("EMP002", "Priya Singh", "Employee")
 ]
 
-# Insert users if they do not exist
-for user in users:
-    cursor.execute("INSERT OR IGNORE INTO users (user_id, name, role) VALUES (?, ?, ?)", user)
-
-# Commit and close
-conn.commit()
-conn.close()
+# Insert users if they do not exist (also invalidates their cached directory entries)
+get_user_directory(db_path).add_users(users)
 
 print("✅ Sample users added successfully!")
@@ -0,0 +1,133 @@
+import re
+from typing import NamedTuple
+
+# Intents in routing priority order (the first one found in a query wins)
+INTENTS = ("leave", "certificate", "academic")
+
+# Slot values in the order the agents have always preferred them
+LEAVE_TYPES = ("casual", "sick", "vacation")
+CERTIFICATE_TYPES = ("bonafide", "noc")
+
+# keyword -> tags it contributes (intents, slot values, "verify"/"revoke" verbs).
+# Matching is by substring, like the old `word in query` checks.
+KEYWORDS = {
+    # Leave
+    "revoke leave": ("leave", "revoke"),
+    "apply for leave": ("leave",),
+    "leave": ("leave",),
+    "casual": ("leave", "casual"),
+    "sick": ("leave", "sick"),
+    "vacation": ("leave", "vacation"),
+    # Certificates
+    "generate certificate": ("certificate",),
+    "certificate": ("certificate",),
+    "bonafide": ("certificate", "bonafide"),
+    "noc": ("certificate", "noc"),
+    "verify": ("verify",),
+    "check": ("verify",),
+    # Academic
+    "academic calendar": ("academic",),
+    "semester calendar": ("academic",),
+    "backlog exam": ("academic",),
+    "exam date": ("academic",),
+    "schedule": ("academic",),
+    "syllabus": ("academic",),
+    "upcoming": ("academic",),
+    "event": ("academic",),
+}
+
+
+def _trie_pattern(words):
+    """Build a regex alternation factored by common prefixes.
+
+    `re` tries every branch of a flat alternation at each position of the query;
+    a prefix tree lets it reject most positions after one character. Longer
+    words win over their prefixes ("revoke leave" before "leave").
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def render(node):
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        optional = "" in node
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")" + ("?" if optional else "")
+
+    return render(trie)
+
+
+_KEYWORD_PATTERN = _trie_pattern(KEYWORDS)
+_FIRST_CHARS = re.escape("".join(sorted({keyword[0] for keyword in KEYWORDS})))
+
+# One pattern scanned once per query for keywords, ISO dates (YYYY-MM-DD) and
+# "N day(s)". The lookahead skips positions that cannot start any token.
+QUERY_PATTERN = re.compile(
+    rf"(?=[{_FIRST_CHARS}\d])(?:{_KEYWORD_PATTERN}|\d{{4}}-\d\d-\d\d|\d+\s*days?)"
+)
+
+
+class ParsedRequest(NamedTuple):
+    """Intent and slots extracted from a user query in one pass."""
+    text: str                 # lower-cased query
+    intent: str = None        # highest-priority intent, or None
+    intents: tuple = ()       # every intent mentioned, in priority order
+    leave_type: str = None
+    certificate_type: str = None
+    days: int = None          # first "N days" mention
+    dates: tuple = ()         # ISO dates (YYYY-MM-DD) in order of appearance
+    verify: bool = False      # "verify" / "check"
+    revoke: bool = False      # "revoke leave"
+
+
+# Every tag gets one bit; a query's keyword hits OR together into a mask
+TAGS = INTENTS + LEAVE_TYPES + CERTIFICATE_TYPES + ("verify", "revoke")
+_TAG_BITS = {tag: 1 << i for i, tag in enumerate(TAGS)}
+_KEYWORD_MASKS = {keyword: sum(_TAG_BITS[tag] for tag in tags) for keyword, tags in KEYWORDS.items()}
+
+
+def _decode(mask):
+    """Resolve a tag mask to (intent, intents, leave_type, certificate_type, verify, revoke)."""
+    tags = {tag for tag, bit in _TAG_BITS.items() if mask & bit}
+    intents = tuple(i for i in INTENTS if i in tags)
+    return (
+        intents[0] if intents else None,
+        intents,
+        next((lt for lt in LEAVE_TYPES if lt in tags), None),
+        next((ct for ct in CERTIFICATE_TYPES if ct in tags), None),
+        "verify" in tags,
+        "revoke" in tags,
+    )
+
+
+# Decoded slots per mask, filled in as masks are first seen (decoding all of them slowed startup)
+_DECODED = [None] * (1 << len(TAGS))
+
+
+def parse_query(query):
+    """Classify a query and extract its slots with a single regex scan."""
+    text = query.lower()
+    mask = 0
+    days = None
+    dates = []
+
+    for token in QUERY_PATTERN.findall(text):
+        keyword_mask = _KEYWORD_MASKS.get(token)
+        if keyword_mask:
+            mask |= keyword_mask
+        elif token[4:5] == "-":
+            dates.append(token)
+        elif days is None:
+            days = int(token.partition("d")[0])
+
+    decoded = _DECODED[mask]
+    if decoded is None:
+        decoded = _DECODED[mask] = _decode(mask)
+    intent, intents, leave_type, certificate_type, verify, revoke = decoded
+    return ParsedRequest(text, intent, intents, leave_type, certificate_type, days, tuple(dates), verify, revoke)
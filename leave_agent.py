@@ -1,69 +1,194 @@
+import argparse
 import datetime
 import sqlite3
-import re
 import logging
+from database import get_database
+from user_directory import normalize_user_id
+from intent_parser import parse_query
+from date_parser import parse_period
+from leave_reports import (PRUNE_OCCUPANCY_SQL, UPSERT_OCCUPANCY_SQL, create_occupancy_table, mark_leave,
+                           occupancy_deltas, occupancy_rows)
+from metrics import get_metrics, request_log
+from records import LeaveRecord
+from request_journal import get_journal
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+INSERT_LEAVE_SQL = '''INSERT INTO leave_requests (employee_id, leave_type, start_date, end_date, status)
+                        VALUES (?, ?, ?, ?, ?)'''
+REVOKE_LEAVE_SQL = '''UPDATE leave_requests 
+                        SET status='Revoked' 
+                        WHERE employee_id=? AND leave_type=? 
+                        AND start_date=? AND end_date=? AND status='Approved' '''
+# Adds (or with a negative count, returns) used days to an employee's yearly ledger row
+UPSERT_BALANCE_SQL = '''INSERT INTO leave_balances (employee_id, leave_type, year, used_days)
+                          VALUES (?, ?, ?, ?)
+                          ON CONFLICT (employee_id, leave_type, year)
+                          DO UPDATE SET used_days = used_days + excluded.used_days'''
+
+# Bump when create_database changes so existing databases run it again
+LEAVE_SCHEMA_VERSION = 4
+
+METRICS = get_metrics()
+AGENT_STAGE_SECONDS = METRICS.histogram("office_agent_agent_stage_seconds", "Time per stage inside an agent",
+                                        ("agent", "stage"))
+POLICY_SECONDS = AGENT_STAGE_SECONDS.labels("leave", "policy")
+STORE_SECONDS = AGENT_STAGE_SECONDS.labels("leave", "store")
+LEAVE_DECISIONS = METRICS.counter("office_agent_leave_decisions_total", "Leave requests by decision", ("status",))
+
+# Annual entitlement in days per leave type
+LEAVE_ENTITLEMENTS = {
+    "casual": 10,
+    "sick": 5,
+    "vacation": 15
+}
+
+
+def leave_days_by_year(start_date, end_date):
+    """Split an inclusive date range into {year: number of days}."""
+    days = {}
+    for year in range(start_date.year, end_date.year + 1):
+        first = max(start_date, datetime.date(year, 1, 1))
+        last = min(end_date, datetime.date(year, 12, 31))
+        days[year] = (last - first).days + 1
+    return days
+
+
+def ledger_deltas(rows, sign=1):
+    """Aggregate approved (employee_id, leave_type, start, end, status) rows into ledger upserts."""
+    deltas = {}
+    for employee_id, leave_type, start_date, end_date, status in rows:
+        if status != "Approved":
+            continue
+        if start_date.year == end_date.year:  # nearly every request
+            key = (employee_id, leave_type, start_date.year)
+            deltas[key] = deltas.get(key, 0) + sign * ((end_date - start_date).days + 1)
+            continue
+        for year, days in leave_days_by_year(start_date, end_date).items():
+            key = (employee_id, leave_type, year)
+            deltas[key] = deltas.get(key, 0) + sign * days
+    return [key + (days,) for key, days in deltas.items()]
+
+
 class LeaveAgent:
+    INTENTS = ("leave",)
+
     def __init__(self):
         self.db = "leave_requests.db"
-        self.create_database()
+        self.database = get_database(self.db)
+        # With consolidated storage (storage.py) the users table is on the same connection,
+        # so inserts re-check the user inside their own transaction
+        self.users_in_database = self.database is get_database("users.db")
+        self.journal = get_journal()  # None: every request commits its own transaction
+        self.database.ensure_schema("leave", LEAVE_SCHEMA_VERSION, self.create_database)
+        if self.journal:
+            self.journal.register("leave", self.database, self.apply_journal_entries)
 
     def create_database(self):
         """Creates the leave request database if it does not exist."""
-        try:
-            conn = sqlite3.connect(self.db)
-            cursor = conn.cursor()
-            cursor.execute('''CREATE TABLE IF NOT EXISTS leave_requests (
-                                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                                employee_id TEXT,
-                                leave_type TEXT,
-                                start_date TEXT,
-                                end_date TEXT,
-                                status TEXT
-                            )''')
-            conn.commit()
-            conn.close()
-            logging.info("✅ Database verified: 'leave_requests' table is ready.")
-        except sqlite3.Error as e:
-            logging.error(f"❌ Database error: {e}")
+        with self.database.transaction() as conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS leave_requests (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            employee_id TEXT,
+                            leave_type TEXT,
+                            start_date TEXT,
+                            end_date TEXT,
+                            status TEXT
+                        )''')
+            # Serves overlap checks (end_date >= new start skips past leave) and revocation lookups.
+            # IF NOT EXISTS also migrates databases created before the index existed.
+            conn.execute('''CREATE INDEX IF NOT EXISTS idx_leave_requests_employee_status_end_start
+                            ON leave_requests (employee_id, status, end_date, start_date)''')
+            # Serves "who is out" reports: approved leave ending on or after a date
+            conn.execute('''CREATE INDEX IF NOT EXISTS idx_leave_requests_status_end_start
+                            ON leave_requests (status, end_date, start_date)''')
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table' "
+                                                     "AND name IN ('leave_balances', 'leave_occupancy')")}
+            conn.execute('''CREATE TABLE IF NOT EXISTS leave_balances (
+                            employee_id TEXT NOT NULL,
+                            leave_type TEXT NOT NULL,
+                            year INTEGER NOT NULL,
+                            used_days INTEGER NOT NULL DEFAULT 0,
+                            PRIMARY KEY (employee_id, leave_type, year)
+                        ) WITHOUT ROWID''')
+            create_occupancy_table(conn)  # daily headcount of approved leave, for leave_reports.py
+            conn.execute("DELETE FROM leave_occupancy WHERE absent = 0")  # left by revocations before pruning
+            # Requests stored before IDs were normalized at the agent ('emp001 ' -> 'EMP001')
+            renamed = conn.execute("UPDATE leave_requests SET employee_id = UPPER(TRIM(employee_id)) "
+                                   "WHERE employee_id != UPPER(TRIM(employee_id))").rowcount
+        logging.info("✅ Database verified: 'leave_requests' table is ready.")
+        if len(tables) < 2 or renamed:
+            self.rebuild_leave_balances()  # Existing databases: account for leave approved so far
+
+    def check_leave_balance(self, employee_id, leave_type, year=None):
+        """Return the days of leave left this year (or `year`) from the balance ledger."""
+        employee_id = normalize_user_id(employee_id)
+        year = year or datetime.date.today().year
+        entitlement = LEAVE_ENTITLEMENTS.get(leave_type.lower(), 0)
+        row = self.database.fetchone("SELECT used_days FROM leave_balances WHERE employee_id=? AND leave_type=? AND year=?",
+                                     (employee_id, leave_type.lower(), year))
+        return entitlement - (row[0] if row else 0)
+
+    def rebuild_leave_balances(self):
+        """Recompute the balance ledger and daily occupancy from approved leave_requests in one streaming pass."""
+        self.sync_writes()
+        cursor = self.database.execute("SELECT employee_id, leave_type, start_date, end_date FROM leave_requests "
+                                       "WHERE status='Approved'")
 
-    def check_leave_balance(self, employee_id, leave_type):
-        """Fetch leave balance from HRMS (for now, using a static dictionary)."""
-        leave_balances = {
-            "casual": 10,
-            "sick": 5,
-            "vacation": 15
-        }
-        return leave_balances.get(leave_type.lower(), 0)
+        changes = {}  # occupancy difference counts, see leave_reports.mark_leave
+
+        def approved_rows():
+            for employee_id, leave_type, start_date, end_date in cursor:
+                try:
+                    row = (employee_id, (leave_type or "").lower(), datetime.date.fromisoformat(start_date),
+                           datetime.date.fromisoformat(end_date), "Approved")
+                except (TypeError, ValueError):
+                    logging.error(f"❌ Skipping leave with invalid dates: {employee_id}, {start_date} to {end_date}")
+                    continue
+                mark_leave(changes, row[1], row[2], row[3])
+                yield row
+
+        used = sorted(ledger_deltas(approved_rows()))
+        occupancy = occupancy_rows(changes)
+        with self.database.transaction() as conn:
+            conn.execute("DELETE FROM leave_balances")
+            conn.executemany("INSERT INTO leave_balances (employee_id, leave_type, year, used_days) VALUES (?, ?, ?, ?)",
+                             used)
+            conn.execute("DELETE FROM leave_occupancy")
+            conn.executemany("INSERT INTO leave_occupancy (day, leave_type, absent) VALUES (?, ?, ?)", occupancy)
+        logging.info(f"✅ Leave balance ledger rebuilt: {len(used)} employee/type/year rows, "
+                     f"{len(occupancy)} day/type occupancy rows.")
+        return len(used)
 
     def check_conflict(self, employee_id, start_date, end_date):
         """Check if an employee has overlapping leave requests."""
+        employee_id = normalize_user_id(employee_id)
         try:
-            conn = sqlite3.connect(self.db)
-            cursor = conn.cursor()
-            cursor.execute('''SELECT * FROM leave_requests WHERE employee_id=? 
-                              AND status='Approved' 
-                              AND ((start_date BETWEEN ? AND ?) 
-                              OR (end_date BETWEEN ? AND ?) 
-                              OR (? BETWEEN start_date AND end_date))''',
-                           (employee_id, start_date, end_date, start_date, end_date, start_date))
-            conflicts = cursor.fetchall()
-            conn.close()
-            return len(conflicts) > 0
+            # Two ranges overlap when each starts on or before the other ends
+            conflict = self.database.fetchone('''SELECT EXISTS (
+                                                    SELECT 1 FROM leave_requests WHERE employee_id=?
+                                                    AND status='Approved'
+                                                    AND end_date >= ? AND start_date <= ?)''',
+                                              (employee_id, start_date.isoformat(), end_date.isoformat()))
+            return bool(conflict[0])
         except sqlite3.Error as e:
             logging.error(f"❌ Database error while checking conflicts: {e}")
             return True  # Assume conflict in case of an error
 
-    def apply_leave_policies(self, employee_id, leave_type, start_date, end_date):
-        """Apply leave rules before approving the request."""
-        leave_days = (end_date - start_date).days + 1
-        available_balance = self.check_leave_balance(employee_id, leave_type)
+    def apply_leave_policies(self, employee_id, leave_type, start_date, end_date, pending_used=None):
+        """Apply leave rules before approving the request.
 
-        if leave_days > available_balance:
-            return "❌ Leave request denied: Not enough balance."
+        `pending_used` maps (employee_id, leave_type, year) to days approved but not yet written (batches).
+        """
+        employee_id = normalize_user_id(employee_id)
+        self.sync_writes(employee_id)
+        for year, leave_days in leave_days_by_year(start_date, end_date).items():
+            available_balance = self.check_leave_balance(employee_id, leave_type, year)
+            if pending_used:
+                available_balance -= pending_used.get((employee_id, leave_type, year), 0)
+            if leave_days > available_balance:
+                return "❌ Leave request denied: Not enough balance."
 
         if self.check_conflict(employee_id, start_date, end_date):
             return "❌ Leave request denied: Overlapping leave found."
@@ -71,94 +196,220 @@ class LeaveAgent:
         return "✅ Leave approved."
 
     def store_leave_request(self, employee_id, leave_type, start_date, end_date, status):
-        """Save the leave request in the database."""
+        """Save the leave request in the database (through the request journal when one is configured).
+
+        Returns the number of rows written (0 if the user no longer exists), or None on a database error.
+        """
+        employee_id = normalize_user_id(employee_id)
         try:
-            conn = sqlite3.connect(self.db)
-            cursor = conn.cursor()
-            cursor.execute('''INSERT INTO leave_requests (employee_id, leave_type, start_date, end_date, status)
-                              VALUES (?, ?, ?, ?, ?)''', 
-                           (employee_id, leave_type, start_date, end_date, status))
-            conn.commit()
-            conn.close()
-            logging.info(f"📌 Leave request stored: {employee_id}, {leave_type}, {start_date} to {end_date}, {status}")
-        except sqlite3.Error as e:
+            if self.journal:
+                self.journal.append("leave", employee_id, [employee_id, leave_type, start_date.isoformat(),
+                                                           end_date.isoformat(), status])
+                written = 1
+            else:
+                with self.database.transaction() as conn:
+                    written = self.write_leave_requests(
+                        conn, [LeaveRecord(employee_id, leave_type, start_date, end_date, status)])
+            request_log.info("📌 Leave request stored: %s, %s, %s to %s, %s",
+                             employee_id, leave_type, start_date, end_date, status)
+            return written
+        except (sqlite3.Error, OSError) as e:
             logging.error(f"❌ Database error while storing leave request: {e}")
+            return None
+
+    def apply_journal_entries(self, conn, payloads):
+        """Write journaled [employee_id, leave_type, start, end, status] requests inside the journal's transaction."""
+        self.write_leave_requests(conn, [LeaveRecord(employee_id, leave_type, datetime.date.fromisoformat(start_date),
+                                                     datetime.date.fromisoformat(end_date), status)
+                                         for employee_id, leave_type, start_date, end_date, status in payloads])
+
+    def sync_writes(self, employee_id=None):
+        """Commit journaled requests (only `employee_id`'s, if given, and those queued with them) before a read."""
+        if self.journal:
+            if employee_id is None:
+                self.journal.flush()
+            else:
+                self.journal.barrier("leave", employee_id)
 
     def revoke_leave(self, employee_id, leave_type, start_date, end_date):
         """Revoke an approved leave request."""
+        employee_id = normalize_user_id(employee_id)
+        self.sync_writes(employee_id)
         try:
-            conn = sqlite3.connect(self.db)
-            cursor = conn.cursor()
-            cursor.execute('''UPDATE leave_requests 
-                              SET status='Revoked' 
-                              WHERE employee_id=? AND leave_type=? 
-                              AND start_date=? AND end_date=? AND status='Approved' ''',
-                           (employee_id, leave_type, start_date, end_date))
-            conn.commit()
-            rows_updated = cursor.rowcount
-            conn.close()
+            with self.database.transaction() as conn:
+                rows_updated = self.write_revocation(conn, employee_id, leave_type, start_date, end_date)
 
             if rows_updated > 0:
+                LEAVE_DECISIONS.labels("Revoked").inc()
                 return "✅ Leave revoked successfully."
             return "❌ No approved leave found for revocation."
         except sqlite3.Error as e:
             logging.error(f"❌ Database error while revoking leave: {e}")
             return "❌ Error processing leave revocation."
 
-    def extract_leave_details(self, query):
-        """Extract leave type and duration or specific dates using regex."""
-        leave_types = ["casual", "sick", "vacation"]
-        leave_type = next((lt for lt in leave_types if lt in query.lower()), None)
+    def write_leave_requests(self, conn, rows, charge_ledger=True):
+        """Insert leave rows and charge approved ones to the ledger, inside the caller's transaction.
+
+        Returns the number of rows written; rows of users missing from a shared users table are dropped.
+        Approved rows are also counted in the daily occupancy aggregates. Bulk loads pass
+        charge_ledger=False and call rebuild_leave_balances() once at the end.
+        """
+        if self.users_in_database and rows:
+            user_ids = sorted({normalize_user_id(row[0]) for row in rows})
+            known = set()
+            for start in range(0, len(user_ids), 500):
+                chunk = user_ids[start:start + 500]
+                known.update(row[0] for row in conn.execute(
+                    f"SELECT user_id FROM users WHERE user_id IN ({','.join('?' * len(chunk))})", chunk))
+            if len(known) < len(user_ids):
+                rows = [row for row in rows if normalize_user_id(row[0]) in known]
+                logging.warning(f"⚠️ Dropped leave requests of unknown users: {', '.join(sorted(set(user_ids) - known))}")
+        # Dates bound as ISO text directly: sqlite3's implicit date adapter is deprecated and warns on every row
+        conn.executemany(INSERT_LEAVE_SQL, ((employee_id, leave_type, start_date.isoformat(), end_date.isoformat(), status)
+                                            for employee_id, leave_type, start_date, end_date, status in rows))
+        if charge_ledger:
+            conn.executemany(UPSERT_BALANCE_SQL, sorted(ledger_deltas(rows)))  # key order: neighbouring ledger pages
+            conn.executemany(UPSERT_OCCUPANCY_SQL, occupancy_deltas(rows))
+        return len(rows)
+
+    def write_revocation(self, conn, employee_id, leave_type, start_date, end_date):
+        """Revoke matching approved leave and refund its days, inside the caller's transaction."""
+        cursor = conn.execute(REVOKE_LEAVE_SQL, (employee_id, leave_type, start_date.isoformat(), end_date.isoformat()))
+        revoked = cursor.rowcount
+        if revoked > 0:
+            revoked_rows = [LeaveRecord(employee_id, leave_type, start_date, end_date, "Approved")] * revoked
+            conn.executemany(UPSERT_BALANCE_SQL, ledger_deltas(revoked_rows, sign=-1))
+            occupancy = occupancy_deltas(revoked_rows, sign=-1)
+            conn.executemany(UPSERT_OCCUPANCY_SQL, occupancy)
+            conn.executemany(PRUNE_OCCUPANCY_SQL, [(day, leave_type) for day, leave_type, _ in occupancy])
+        return revoked
+
+    def extract_leave_details(self, query, parsed=None):
+        """Extract leave type and the requested period ("3 days from monday", "5th to 7th march", ...)."""
+        parsed = parsed or parse_query(query)
+        leave_type = parsed.leave_type
 
         if not leave_type:
             return None, None, None
 
-        # Check for number of days
-        days_match = re.search(r'(\d+)\s*(day|days)', query)
-        if days_match:
-            leave_days = int(days_match.group(1))
-            start_date = datetime.date.today()
-            end_date = start_date + datetime.timedelta(days=leave_days - 1)
-            return leave_type, start_date, end_date
-
-        # Check for specific start and end dates (YYYY-MM-DD format)
-        date_match = re.findall(r'(\d{4}-\d{2}-\d{2})', query)
-        if len(date_match) == 2:
-            start_date = datetime.datetime.strptime(date_match[0], "%Y-%m-%d").date()
-            end_date = datetime.datetime.strptime(date_match[1], "%Y-%m-%d").date()
-            if end_date < start_date:
-                return None, None, None  # Invalid date range
-            return leave_type, start_date, end_date
-
-        return None, None, None
-
-    def handle_query(self, user_id, query):
-        """Process leave queries."""
-        query = query.lower()
-
-        if "revoke leave" in query:
-            leave_type, start_date, end_date = self.extract_leave_details(query)
+        period = parse_period(parsed.text)
+        if not period:
+            return None, None, None  # No dates, or an ambiguous or invalid range
+        return (leave_type,) + period
+
+    def handle_query(self, user_id, query, parsed=None):
+        """Process leave queries (`parsed` is the router's ParsedRequest, if any)."""
+        user_id = normalize_user_id(user_id)  # ledger, occupancy and journal rows are keyed by the normalized ID
+        parsed = parsed or parse_query(query)
+
+        if parsed.revoke:
+            leave_type, start_date, end_date = self.extract_leave_details(query, parsed)
             if not leave_type or not start_date or not end_date:
                 return "❌ Please specify leave type and valid duration for revocation."
-            return self.revoke_leave(user_id, leave_type, start_date, end_date)
+            with STORE_SECONDS.time():
+                return self.revoke_leave(user_id, leave_type, start_date, end_date)
 
-        leave_type, start_date, end_date = self.extract_leave_details(query)
+        leave_type, start_date, end_date = self.extract_leave_details(query, parsed)
         if not leave_type or not start_date or not end_date:
             return "❌ Please specify leave type (Casual, Sick, Vacation) and a valid duration."
 
         # Apply leave policies
-        result = self.apply_leave_policies(user_id, leave_type, start_date, end_date)
+        with POLICY_SECONDS.time():
+            result = self.apply_leave_policies(user_id, leave_type, start_date, end_date)
 
         # Store request in the database if approved
         status = "Approved" if "approved" in result else "Rejected"
-        self.store_leave_request(user_id, leave_type, start_date, end_date, status)
+        LEAVE_DECISIONS.labels(status).inc()
+        with STORE_SECONDS.time():
+            written = self.store_leave_request(user_id, leave_type, start_date, end_date, status)
+        if written == 0:
+            return "❌ Access denied: Invalid user ID."
 
         return result
 
+    def handle_batch(self, items):
+        """Process (user_id, query, parsed) leave queries in order inside one transaction.
+
+        New requests are decided against the database plus the approvals earlier in
+        the batch, and inserted together (with their ledger updates) using
+        executemany. Pending inserts are flushed before each revocation so it sees them.
+        An item that fails for any reason but a database error fails alone.
+        """
+        responses = []
+        pending_rows = []
+        pending_approved = {}  # employee_id -> [(start_date, end_date)] approved earlier in this batch
+        pending_used = {}  # (employee_id, leave_type, year) -> days approved earlier in this batch
+        self.sync_writes()
+        try:
+            with self.database.transaction() as conn:
+                for user_id, query, parsed in items:
+                    try:
+                        responses.append(self.batch_item(conn, normalize_user_id(user_id), query, parsed,
+                                                         pending_rows, pending_approved, pending_used))
+                    except sqlite3.Error:
+                        raise
+                    except Exception as e:  # nothing of this item was written or counted as pending
+                        logging.error(f"❌ Unexpected error in leave request '{query}': {e}")
+                        responses.append("❌ An unexpected error occurred.")
+
+                self.write_leave_requests(conn, pending_rows)
+        except sqlite3.Error as e:
+            logging.error(f"❌ Database error while processing leave batch: {e}")
+            return ["❌ Error processing leave request."] * len(items)
+
+        logging.info(f"📌 Leave batch processed: {len(items)} queries.")
+        return responses
+
+    def batch_item(self, conn, user_id, query, parsed, pending_rows, pending_approved, pending_used):
+        """Decide one handle_batch query; the pending collections are only updated once it has been decided."""
+        parsed = parsed or parse_query(query)
+        leave_type, start_date, end_date = self.extract_leave_details(query, parsed)
+
+        if parsed.revoke:
+            if not leave_type or not start_date or not end_date:
+                return "❌ Please specify leave type and valid duration for revocation."
+            self.write_leave_requests(conn, pending_rows)
+            pending_rows.clear()
+            pending_approved.clear()
+            pending_used.clear()
+            revoked = self.write_revocation(conn, user_id, leave_type, start_date, end_date)
+            if revoked > 0:
+                LEAVE_DECISIONS.labels("Revoked").inc()
+            return "✅ Leave revoked successfully." if revoked > 0 else "❌ No approved leave found for revocation."
+
+        if not leave_type or not start_date or not end_date:
+            return "❌ Please specify leave type (Casual, Sick, Vacation) and a valid duration."
+
+        with POLICY_SECONDS.time():
+            result = self.apply_leave_policies(user_id, leave_type, start_date, end_date, pending_used)
+        approved_here = pending_approved.get(user_id, [])
+        if "approved" in result and any(s <= end_date and e >= start_date for s, e in approved_here):
+            result = "❌ Leave request denied: Overlapping leave found."
+        status = "Approved" if "approved" in result else "Rejected"
+        days_by_year = leave_days_by_year(start_date, end_date) if status == "Approved" else {}
+        LEAVE_DECISIONS.labels(status).inc()
+        if status == "Approved":
+            pending_approved.setdefault(user_id, []).append((start_date, end_date))
+            for year, days in days_by_year.items():
+                key = (user_id, leave_type, year)
+                pending_used[key] = pending_used.get(key, 0) + days
+        pending_rows.append(LeaveRecord(user_id, leave_type, start_date, end_date, status))
+        return result
+
 
 # Run the Leave Agent (Standalone Mode)
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Leave agent (interactive unless an option is given).")
+    parser.add_argument("--rebuild-balances", action="store_true",
+                        help="recompute the leave balance ledger from leave_requests and exit")
+    args = parser.parse_args()
+
     leave_agent = LeaveAgent()
+    if args.rebuild_balances:
+        rows = leave_agent.rebuild_leave_balances()
+        print(f"✅ Rebuilt {rows} leave balance rows.")
+        raise SystemExit(0)
+
     while True:
         user_id = input("\n🔑 Enter Employee ID (or type 'exit' to quit): ").strip()
         if user_id.lower() == "exit":
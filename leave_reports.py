@@ -0,0 +1,223 @@
+"""Leave analytics: who is out, daily headcount, usage per type and team overlaps.
+
+LeaveAgent keeps a leave_occupancy table with the number of employees on
+approved leave per (day, leave type). It is adjusted in the same transaction
+as every approval and revocation, and rebuilt with the balance ledger. Reports
+read the days they need from it (or, for a team, that team's leave) into
+compact day-indexed arrays and compute with slices and C-level sum/max, instead
+of scanning leave_requests and expanding string dates in Python.
+
+    reports = LeaveReports()
+    reports.who_is_out(start, end)                  # approved leave overlapping the range
+    reports.headcount(start, end, "sick")           # array('i') of people out per day
+    reports.usage_by_type(start, end)               # {"casual": person-days, ...}
+    reports.team_occupancy(["EMP001", ...], start, end)
+    reports.overlaps(["EMP001", ...], start, end)   # days when 2+ of the team are out
+
+    python leave_reports.py out next week
+    python leave_reports.py headcount from 1st to 31st march --type sick
+    python leave_reports.py usage 2025-01-01 2025-12-31
+    python leave_reports.py team next week --employees EMP001,EMP002,EMP003
+
+Periods are read with date_parser.parse_period, like leave requests.
+"""
+import argparse
+import datetime
+import itertools
+import sqlite3
+import sys
+import logging
+from array import array
+
+from date_parser import parse_period
+from user_directory import normalize_user_id
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Adds (or with a negative count, removes) employees out on a day
+UPSERT_OCCUPANCY_SQL = '''INSERT INTO leave_occupancy (day, leave_type, absent) VALUES (?, ?, ?)
+                            ON CONFLICT (day, leave_type) DO UPDATE SET absent = absent + excluded.absent'''
+# Drops a day's row once revocations bring its count back to zero (rebuilds never write zero rows)
+PRUNE_OCCUPANCY_SQL = "DELETE FROM leave_occupancy WHERE day=? AND leave_type=? AND absent=0"
+
+
+def create_occupancy_table(conn):
+    conn.execute('''CREATE TABLE IF NOT EXISTS leave_occupancy (
+                        day TEXT NOT NULL,
+                        leave_type TEXT NOT NULL,
+                        absent INTEGER NOT NULL DEFAULT 0,
+                        PRIMARY KEY (day, leave_type)
+                    ) WITHOUT ROWID''')
+
+
+def mark_leave(changes, leave_type, start_date, end_date, sign=1):
+    """Record a leave range in {(leave_type, ordinal): change} difference counts: +1 on its
+    first day, -1 the day after its last, so a long leave costs the same as a short one."""
+    start_key = (leave_type, start_date.toordinal())
+    end_key = (leave_type, end_date.toordinal() + 1)
+    changes[start_key] = changes.get(start_key, 0) + sign
+    changes[end_key] = changes.get(end_key, 0) - sign
+
+
+def occupancy_rows(changes):
+    """Turn difference counts into sorted (day, leave_type, absent) rows for days whose count changed."""
+    by_type = {}
+    for (leave_type, ordinal), change in changes.items():
+        by_type.setdefault(leave_type, {})[ordinal] = change
+    rows = []
+    for leave_type, type_changes in sorted(by_type.items()):
+        first = min(type_changes)
+        steps = array("i", bytes(4 * (max(type_changes) - first + 1)))
+        for ordinal, change in type_changes.items():
+            steps[ordinal - first] = change
+        for offset, absent in enumerate(itertools.accumulate(steps)):
+            if absent:
+                rows.append((datetime.date.fromordinal(first + offset).isoformat(), leave_type, absent))
+    rows.sort()
+    return rows
+
+
+def occupancy_deltas(rows, sign=1):
+    """Aggregate approved (employee_id, leave_type, start, end, status) rows into occupancy upserts."""
+    changes = {}
+    for _, leave_type, start_date, end_date, status in rows:
+        if status == "Approved":
+            mark_leave(changes, leave_type, start_date, end_date, sign)
+    return occupancy_rows(changes)
+
+
+def day_array(start_date, end_date):
+    """A zeroed array('i') with one slot per day from start_date to end_date inclusive."""
+    return array("i", bytes(4 * ((end_date - start_date).days + 1)))
+
+
+class LeaveReports:
+    """Read-only reports over approved leave."""
+
+    def __init__(self, agent=None):
+        if agent is None:
+            from leave_agent import LeaveAgent
+            agent = LeaveAgent()  # creates the tables, and rebuilds the aggregates of older databases
+        self.agent = agent
+        self.database = agent.database
+
+    def who_is_out(self, start_date, end_date):
+        """Approved (employee_id, leave_type, start_date, end_date) overlapping the range, by start date."""
+        self.agent.sync_writes()
+        return self.database.fetchall('''SELECT employee_id, leave_type, start_date, end_date FROM leave_requests
+                                         WHERE status='Approved' AND end_date >= ? AND start_date <= ?
+                                         ORDER BY start_date, employee_id''',
+                                      (start_date.isoformat(), end_date.isoformat()))
+
+    def headcount(self, start_date, end_date, leave_type=None):
+        """Employees on approved leave each day (of `leave_type`, or any), as an array indexed from start_date."""
+        self.agent.sync_writes()
+        counts = day_array(start_date, end_date)
+        first = start_date.toordinal()
+        sql = "SELECT day, SUM(absent) FROM leave_occupancy WHERE day BETWEEN ? AND ?"
+        params = [start_date.isoformat(), end_date.isoformat()]
+        if leave_type:
+            sql += " AND leave_type=?"
+            params.append(leave_type.lower())
+        for day, absent in self.database.fetchall(sql + " GROUP BY day", params):
+            counts[datetime.date.fromisoformat(day).toordinal() - first] = absent
+        return counts
+
+    def usage_by_type(self, start_date, end_date):
+        """Person-days of approved leave per leave type within the range."""
+        self.agent.sync_writes()
+        return dict(self.database.fetchall("SELECT leave_type, SUM(absent) FROM leave_occupancy "
+                                           "WHERE day BETWEEN ? AND ? GROUP BY leave_type ORDER BY leave_type",
+                                           (start_date.isoformat(), end_date.isoformat())))
+
+    def summary(self, start_date, end_date, leave_type=None):
+        """Totals of headcount(): person-days, daily average, and the busiest day."""
+        counts = self.headcount(start_date, end_date, leave_type)
+        peak = max(counts)
+        return {
+            "days": len(counts),
+            "person_days": sum(counts),
+            "average": round(sum(counts) / len(counts), 2),
+            "peak": peak,
+            "peak_day": start_date + datetime.timedelta(days=counts.index(peak)),
+        }
+
+    def team_occupancy(self, employee_ids, start_date, end_date):
+        """Members of a team (a list of employee IDs) on approved leave each day, indexed from start_date."""
+        self.agent.sync_writes()
+        employee_ids = sorted({normalize_user_id(employee_id) for employee_id in employee_ids})
+        first, last = start_date.toordinal(), end_date.toordinal()
+        steps = array("i", bytes(4 * (last - first + 2)))
+        for start in range(0, len(employee_ids), 500):
+            chunk = employee_ids[start:start + 500]
+            for leave_start, leave_end in self.database.fetchall(
+                    f"SELECT start_date, end_date FROM leave_requests WHERE employee_id IN ({','.join('?' * len(chunk))}) "
+                    f"AND status='Approved' AND end_date >= ? AND start_date <= ?",
+                    chunk + [start_date.isoformat(), end_date.isoformat()]):
+                steps[max(datetime.date.fromisoformat(leave_start).toordinal(), first) - first] += 1
+                steps[min(datetime.date.fromisoformat(leave_end).toordinal(), last) - first + 1] -= 1
+        return array("i", itertools.accumulate(steps[:-1]))
+
+    def utilization(self, employee_ids, start_date, end_date):
+        """Share of the team's person-days in the range not lost to approved leave."""
+        counts = self.team_occupancy(employee_ids, start_date, end_date)
+        team_size = len({normalize_user_id(employee_id) for employee_id in employee_ids})
+        return 1 - sum(counts) / (team_size * len(counts)) if team_size else 1.0
+
+    def overlaps(self, employee_ids, start_date, end_date, min_absent=2):
+        """(day, members out) for the days when at least `min_absent` of the team are on leave together."""
+        counts = self.team_occupancy(employee_ids, start_date, end_date)
+        return [(start_date + datetime.timedelta(days=offset), absent)
+                for offset, absent in enumerate(counts) if absent >= min_absent]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("report", choices=("out", "headcount", "usage", "team"))
+    parser.add_argument("period", nargs="+", help='e.g. "next week", "from 3rd to 5th march", two ISO dates')
+    parser.add_argument("--type", help="headcount: only this leave type")
+    parser.add_argument("--employees", help="team: comma-separated employee IDs")
+    parser.add_argument("--storage", metavar="DB", help="consolidated database built by `python storage.py migrate`")
+    args = parser.parse_args()
+
+    period = parse_period(" ".join(args.period))
+    if not period:
+        parser.error(f"could not read a period from {' '.join(args.period)!r}")
+    if args.report == "team" and not args.employees:
+        parser.error("team needs --employees")
+    if args.storage:
+        from storage import configure_storage
+        configure_storage(args.storage)
+    start_date, end_date = period
+
+    try:
+        reports = LeaveReports()
+        print(f"📅 {start_date} to {end_date}")
+        if args.report == "out":
+            rows = reports.who_is_out(start_date, end_date)
+            for employee_id, leave_type, leave_start, leave_end in rows:
+                print(f"🏖️ {employee_id}: {leave_type}, {leave_start} to {leave_end}")
+            print(f"✅ {len(rows)} approved leave requests.")
+        elif args.report == "headcount":
+            counts = reports.headcount(start_date, end_date, args.type)
+            for offset, absent in enumerate(counts):
+                print(f"{start_date + datetime.timedelta(days=offset)}  {absent}")
+            summary = reports.summary(start_date, end_date, args.type)
+            print(f"✅ {summary['person_days']} person-days, {summary['average']} out per day on average, "
+                  f"peak {summary['peak']} on {summary['peak_day']}.")
+        elif args.report == "usage":
+            for leave_type, days in reports.usage_by_type(start_date, end_date).items():
+                print(f"{leave_type:<10} {days} person-days")
+        else:
+            team = [employee_id for employee_id in args.employees.split(",") if employee_id.strip()]
+            for day, absent in reports.overlaps(team, start_date, end_date):
+                print(f"⚠️ {day}: {absent} of {len(team)} out")
+            print(f"✅ Team utilization {reports.utilization(team, start_date, end_date):.1%}.")
+    except sqlite3.Error as e:
+        logging.error(f"❌ Leave report failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
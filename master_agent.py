@@ -1,56 +1,90 @@
+import argparse
+import json
 import logging
 import sqlite3
-from leave_agent import LeaveAgent
-from certificates_agent import CertificateAgent
-from academic_agent import AcademicAgent
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from agent_registry import AgentRegistry
+from database import get_database
+from user_directory import get_user_directory, normalize_user_id
+from intent_parser import parse_query
+from metrics import get_metrics, request_log, set_request_logging
+from request_journal import configure_journal
+from certificate_queue import configure_certificate_queue
+from storage import configure_storage
+from response_cache import get_response_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+# Bump when verify_database changes
+USERS_SCHEMA_VERSION = 1
+
+METRICS = get_metrics()
+ROUTE_SECONDS = METRICS.histogram("office_agent_route_query_seconds", "End-to-end route_query latency")
+STAGE_SECONDS = METRICS.histogram("office_agent_route_stage_seconds", "Router time per stage", ("stage",))
+VALIDATE_SECONDS = STAGE_SECONDS.labels("validate_user")
+CLASSIFY_SECONDS = STAGE_SECONDS.labels("classify_intent")
+AGENT_SECONDS = METRICS.histogram("office_agent_agent_seconds", "Agent handle_query latency by intent", ("intent",))
+AGENT_BATCH_SECONDS = METRICS.histogram("office_agent_agent_batch_seconds", "Agent time per route_batch group",
+                                        ("intent",))
+AGENT_ERRORS = METRICS.counter("office_agent_agent_errors_total", "Agent exceptions by intent", ("intent",))
+REQUESTS = METRICS.counter("office_agent_requests_total", "Routed requests by outcome", ("outcome",))
+OUTCOMES = {outcome: REQUESTS.labels(outcome)
+            for outcome in ("routed", "cached", "multi_intent", "denied", "not_understood", "no_agent", "invalid")}
+
+
+def merge_responses(responses):
+    """Combine the answers to a multi-intent query, in intent priority order."""
+    return "\n".join(responses)
+
+
 class MasterAgent:
-    def __init__(self):
-        """Initialize sub-agents and verify database connectivity."""
-        self.agents = {
-            "leave": LeaveAgent(),
-            "certificate": CertificateAgent(),
-            "academic": AcademicAgent()
-        }
+    def __init__(self, preload=False, registry=None, fanout_workers=4, cache_responses=True):
+        """Verify database connectivity; sub-agents are created on first use unless preloaded.
+
+        Multi-intent queries run their agents on `fanout_workers` threads (1: one after another).
+        Answers to read-only queries are served from the shared response cache unless
+        `cache_responses` is False.
+        """
         self.db_path = "users.db"
-        self.verify_database()
+        self.database = get_database(self.db_path)
+        self.database.ensure_schema("users", USERS_SCHEMA_VERSION, self.verify_database)
+        self.users = get_user_directory(self.db_path)
+        self.agents = registry or AgentRegistry()
+        self.response_cache = get_response_cache() if cache_responses else None
+        self.fanout_workers = fanout_workers
+        self._executor = None  # started on the first multi-intent query
+        self._executor_lock = threading.Lock()
+        if preload:
+            self.agents.preload()
 
     def verify_database(self):
         """Ensure the users table exists in the database."""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('''
+        with self.database.transaction() as conn:
+            conn.execute('''
                 CREATE TABLE IF NOT EXISTS users (
                     user_id TEXT PRIMARY KEY,
                     name TEXT NOT NULL,
                     role TEXT CHECK(role IN ('Employee', 'Student')) NOT NULL
                 )
             ''')
-            conn.commit()
-            conn.close()
-            logging.info("✅ Database verified: 'users' table is ready.")
-        except sqlite3.Error as e:
-            logging.error(f"❌ Database error: {e}")
+        logging.info("✅ Database verified: 'users' table is ready.")
 
     def validate_user(self, user_id):
         """Check if the user exists in the database and return their role."""
         try:
-            user_id = user_id.strip().upper()  # Normalize user ID format
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT role FROM users WHERE user_id=?", (user_id,))
-            result = cursor.fetchone()
-            conn.close()
-
-            if result:
-                logging.info(f"✅ User '{user_id}' found as {result[0]}.")
-                return result[0]  # Return role (Employee/Student)
+            user_id = normalize_user_id(user_id)
+            with VALIDATE_SECONDS.time():
+                user = self.users.get(user_id)
+
+            if user:
+                request_log.info("✅ User '%s' found as %s.", user_id, user.role)
+                return user.role  # Return role (Employee/Student)
             else:
-                logging.error(f"❌ User ID '{user_id}' not found in database!")
+                request_log.error("❌ User ID '%s' not found in database!", user_id)
                 return None  # Invalid user ID
         except sqlite3.Error as e:
             logging.error(f"❌ Database error while validating user: {e}")
@@ -58,48 +92,236 @@ class MasterAgent:
 
     def classify_intent(self, query):
         """Determine which agent should handle the query based on keywords."""
-        query = query.lower()
-
-        leave_keywords = {"leave", "vacation", "sick", "casual", "apply for leave"}
-        certificate_keywords = {"certificate", "bonafide", "noc", "generate certificate"}
-        academic_keywords = {"academic calendar", "semester calendar", "backlog exam", "schedule", "exam date", "syllabus"}
-
-        if any(word in query for word in leave_keywords):
-            return "leave"
-        elif any(word in query for word in certificate_keywords):
-            return "certificate"
-        elif any(word in query for word in academic_keywords):
-            return "academic"
-        else:
-            return None  # No valid intent detected
+        return parse_query(query).intent  # None if no valid intent detected
+
+    def classify_intents(self, query):
+        """Every intent mentioned in the query, in priority order."""
+        return parse_query(query).intents
+
+    def executor(self):
+        """Thread pool that runs the agents of a multi-intent query side by side."""
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.fanout_workers, thread_name_prefix="fanout")
+        return self._executor
+
+    def dispatch(self, intent, user_id, query, parsed):
+        """Run one agent's handle_query, turning its failures into responses."""
+        return self.call_agent(intent, user_id, query, parsed)[0]
+
+    def call_agent(self, intent, user_id, query, parsed):
+        """Run one agent's handle_query; returns (response, True if the agent did not fail)."""
+        try:
+            with AGENT_SECONDS.labels(intent).time():
+                return self.agents[intent].handle_query(user_id, query, parsed), True  # ✅ Agents reuse the parsed slots
+        except TypeError as e:
+            AGENT_ERRORS.labels(intent).inc()
+            logging.error(f"❌ Agent function error: {e}")
+            return "❌ Internal error: Agent method received incorrect parameters.", False
+        except Exception as e:
+            AGENT_ERRORS.labels(intent).inc()
+            logging.error(f"❌ Unexpected error: {e}")
+            return "❌ An unexpected error occurred.", False
 
     def route_query(self, user_id, query):
         """Validate user and route the query to the appropriate agent."""
+        with ROUTE_SECONDS.time():
+            return self._route_query(user_id, query)
+
+    def _route_query(self, user_id, query):
+        user_id = normalize_user_id(user_id)  # agents key their rows by the ID that was validated
         role = self.validate_user(user_id)
         if not role:
+            OUTCOMES["denied"].inc()
             return "❌ Access denied: Invalid user ID."
 
-        intent = self.classify_intent(query)
-        if not intent:
+        cache = self.response_cache
+        if cache is not None:
+            response = cache.get(user_id, role, query)
+            if response is not None:
+                OUTCOMES["cached"].inc()
+                request_log.info("✅ Answering query '%s' from the response cache for %s.", query, role)
+                return response
+            stamp = cache.stamp()
+
+        with CLASSIFY_SECONDS.time():
+            parsed = parse_query(query)
+        if not parsed.intent:
+            OUTCOMES["not_understood"].inc()
             return "❌ Sorry, I couldn't understand your request. Please rephrase."
 
-        agent = self.agents.get(intent)
-        if agent:
-            logging.info(f"✅ Routing query '{query}' to {intent} agent for {role}.")
-            try:
-                return agent.handle_query(user_id, query)  # ✅ Ensure (user_id, query) is passed correctly
-            except TypeError as e:
-                logging.error(f"❌ Agent function error: {e}")
-                return "❌ Internal error: Agent method received incorrect parameters."
-            except Exception as e:
-                logging.error(f"❌ Unexpected error: {e}")
-                return "❌ An unexpected error occurred."
+        intents = [intent for intent in parsed.intents if intent in self.agents]
+        if len(intents) == 1:
+            OUTCOMES["routed"].inc()
+            request_log.info("✅ Routing query '%s' to %s agent for %s.", query, intents[0], role)
+            response, ok = self.call_agent(intents[0], user_id, query, parsed)
+            if cache is not None and ok:
+                cache.put(user_id, role, query, parsed, response, stamp)
+            return response
+        if intents:
+            # "apply 2 days sick leave and generate noc": every agent answers its part concurrently
+            OUTCOMES["multi_intent"].inc()
+            request_log.info("✅ Routing query '%s' to %s agents for %s.", query, ", ".join(intents), role)
+            if self.fanout_workers <= 1:
+                return merge_responses([self.dispatch(intent, user_id, query, parsed) for intent in intents])
+            futures = [self.executor().submit(self.dispatch, intent, user_id, query, parsed) for intent in intents]
+            return merge_responses([future.result() for future in futures])
 
+        OUTCOMES["no_agent"].inc()
         return "❌ No suitable agent found for your request."
 
+    def route_batch(self, requests, chunk_size=1000):
+        """Route an iterable of (user_id, query) pairs, yielding responses in input order.
+
+        Input is consumed lazily in chunks. Each chunk's user IDs are validated with
+        one IN (...) lookup, and its queries are grouped per agent and passed to the
+        agent's handle_batch, so each agent commits its writes once per chunk.
+        """
+        chunk = []
+        for request in requests:
+            chunk.append(request)
+            if len(chunk) >= chunk_size:
+                yield from self._route_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield from self._route_chunk(chunk)
+
+    def _route_chunk(self, chunk):
+        """Route one chunk of (user_id, query) pairs; returns responses in input order."""
+        user_ids = [user_id for user_id, _ in chunk if isinstance(user_id, str)]
+        with VALIDATE_SECONDS.time():
+            users = self.users.get_many(user_ids)
+        responses = [None] * len(chunk)
+        groups = {}  # intent -> [(index, user_id, query, parsed)]
+        multi = {}   # index -> (intents, {intent: response}) for multi-intent queries
+
+        for index, (user_id, query) in enumerate(chunk):
+            if not isinstance(user_id, str) or not isinstance(query, str):
+                OUTCOMES["invalid"].inc()
+                responses[index] = "❌ Invalid request: 'user_id' and 'query' must be strings."
+            elif not users.get(normalize_user_id(user_id)):
+                OUTCOMES["denied"].inc()
+                responses[index] = "❌ Access denied: Invalid user ID."
+            else:
+                user_id = normalize_user_id(user_id)
+                with CLASSIFY_SECONDS.time():
+                    parsed = parse_query(query)
+                intents = [intent for intent in parsed.intents if intent in self.agents]
+                if not parsed.intent or not intents:
+                    OUTCOMES["not_understood"].inc()
+                    responses[index] = "❌ Sorry, I couldn't understand your request. Please rephrase."
+                    continue
+                if len(intents) > 1:
+                    OUTCOMES["multi_intent"].inc()
+                    multi[index] = (intents, {})
+                else:
+                    OUTCOMES["routed"].inc()
+                for intent in intents:
+                    groups.setdefault(intent, []).append((index, user_id, query, parsed))
+
+        # Agents are independent of each other, so their groups run side by side
+        if len(groups) > 1 and self.fanout_workers > 1:
+            results = list(self.executor().map(self._route_group, groups, groups.values()))
+        else:
+            results = [self._route_group(intent, items) for intent, items in groups.items()]
+        for (intent, items), group_results in zip(groups.items(), results):
+            for (index, *_), result in zip(items, group_results):
+                if index in multi:
+                    multi[index][1][intent] = result
+                else:
+                    responses[index] = result
+        for index, (intents, answers) in multi.items():
+            responses[index] = merge_responses([answers[intent] for intent in intents])
+
+        logging.info(f"✅ Routed batch of {len(chunk)} queries ({', '.join(f'{k}: {len(v)}' for k, v in groups.items())}).")
+        return responses
+
+    def _route_group(self, intent, items):
+        """Pass one agent its (index, user_id, query, parsed) items; returns its responses in order."""
+        batch = [(user_id, query, parsed) for _, user_id, query, parsed in items]
+        try:
+            with AGENT_BATCH_SECONDS.labels(intent).time():
+                agent = self.agents[intent]
+                if hasattr(agent, "handle_batch"):
+                    return agent.handle_batch(batch)
+                return [agent.handle_query(*item) for item in batch]
+        except Exception as e:
+            AGENT_ERRORS.labels(intent).inc()
+            logging.error(f"❌ Unexpected error in {intent} batch: {e}")
+            return ["❌ An unexpected error occurred."] * len(items)
+
+    def close(self):
+        """Stop the fan-out thread pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+def run_batch(master_agent, input_path, output_path="-", chunk_size=1000):
+    """Stream JSONL requests ({"user_id": ..., "query": ...} per line) through route_batch.
+
+    Each output line echoes the input object with a "response" field added, in
+    input order. Memory use is bounded by the chunk size, not the file size.
+    """
+    records = deque()  # input objects routed but not yet written
+
+    def read_requests(lines):
+        for line_number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            if not isinstance(record, dict):
+                record = {"line": line_number}
+            records.append(record)
+            yield record.get("user_id"), record.get("query")
+
+    source = sys.stdin if input_path == "-" else open(input_path, encoding="utf-8")
+    sink = sys.stdout if output_path == "-" else open(output_path, "w", encoding="utf-8")
+    try:
+        for response in master_agent.route_batch(read_requests(source), chunk_size):
+            record = records.popleft()
+            record["response"] = response
+            sink.write(json.dumps(record, ensure_ascii=False) + "\n")
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Route office queries interactively or in bulk.")
+    parser.add_argument("--batch", metavar="JSONL", help="route {\"user_id\", \"query\"} lines from a JSONL file ('-' for stdin)")
+    parser.add_argument("--output", metavar="JSONL", default="-", help="where to write batch results (default: stdout)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="requests grouped per batch transaction")
+    parser.add_argument("--metrics-json", metavar="PATH", help="write latency/counter metrics as JSON after a batch")
+    parser.add_argument("--no-request-log", action="store_true", help="skip per-request log lines")
+    parser.add_argument("--journal", metavar="JSONL", help="journal leave/certificate writes here and group-commit them")
+    parser.add_argument("--storage", metavar="DB", help="consolidated database built by `python storage.py migrate`")
+    parser.add_argument("--certificate-workers", type=int, default=0,
+                        help="render certificates on N background threads, answering with a ticket (0: inline)")
+    args = parser.parse_args()
+
+    if args.no_request_log:
+        set_request_logging(False)
+    if args.storage:
+        configure_storage(args.storage)
+    if args.journal:
+        configure_journal(args.journal)
+    if args.certificate_workers:
+        configure_certificate_queue(args.certificate_workers)
     master_agent = MasterAgent()
-    
+
+    if args.batch:
+        run_batch(master_agent, args.batch, args.output, args.chunk_size)
+        if args.metrics_json:
+            METRICS.dump_json(args.metrics_json)
+        sys.exit(0)
+
     while True:
         user_id = input("\n🔑 Enter User ID (or type 'exit' to quit): ").strip()
         if user_id.lower() == "exit":
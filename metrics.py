@@ -0,0 +1,305 @@
+"""In-process metrics: counters and latency histograms for the request hot path.
+
+    from metrics import get_metrics
+    ROUTE_SECONDS = get_metrics().histogram("office_agent_route_query_seconds", "route_query latency")
+    with ROUTE_SECONDS.time():
+        ...
+
+Counters are always exact. Timers honour the registry's `sample_rate`: with
+sample_rate=0.05 only one call in twenty reads the clock and takes a histogram
+lock, so histogram counts are a sample while their shapes stay representative.
+`enabled=False` turns every timer into a no-op.
+
+Export as Prometheus text (render_prometheus, served by server.py at GET /metrics)
+or as JSON (snapshot / dump_json).
+
+Per-request log lines go through `request_log` with lazy %-style arguments, so
+they cost nothing when switched off with set_request_logging(False).
+"""
+import bisect
+import json
+import random
+import threading
+import time
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Logger for lines written once per request (validation, routing, stores)
+request_log = logging.getLogger("office_agent.requests")
+
+# Histogram bucket upper bounds in seconds; most stages finish well under a millisecond
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def set_request_logging(enabled):
+    """Switch per-request log lines on or off; when off their messages are never formatted."""
+    request_log.setLevel(logging.NOTSET if enabled else logging.CRITICAL + 1)
+
+
+class Counter:
+    """A monotonically increasing count."""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def reset(self):
+        with self._lock:
+            self.value = 0
+
+
+class _Timer:
+    """Context manager observing the elapsed time of its block into a histogram."""
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+class _NullTimer:
+    """Stands in for a timer when metrics are disabled or the call is not sampled."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Histogram:
+    """Latency distribution over fixed buckets, plus sum and count."""
+
+    def __init__(self, registry, buckets):
+        self.registry = registry
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot: above the largest bucket
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def reset(self):
+        with self._lock:
+            self.counts = [0] * (len(self.buckets) + 1)
+            self.sum = 0.0
+            self.count = 0
+
+    def time(self):
+        """Time a block: `with histogram.time(): ...` (subject to sampling)."""
+        registry = self.registry
+        if not registry.enabled or (registry.sample_rate < 1.0 and random.random() >= registry.sample_rate):
+            return _NULL_TIMER
+        return _Timer(self)
+
+    def quantile(self, q):
+        """Estimate a quantile (0..1) by linear interpolation within its bucket."""
+        with self._lock:
+            counts, count = list(self.counts), self.count
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+
+class MetricFamily:
+    """A named metric with one child per combination of label values."""
+
+    def __init__(self, registry, kind, name, help_text, labelnames, buckets=None):
+        self.registry = registry
+        self.kind = kind  # "counter" or "histogram"
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = buckets
+        self.children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Return the child for these label values (create it once, then keep the reference)."""
+        child = self.children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self.children.get(values)
+                if child is None:
+                    child = Counter() if self.kind == "counter" else Histogram(self.registry, self.buckets)
+                    self.children[values] = child
+        return child
+
+    # Unlabelled families act as their only child
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+
+class MetricsRegistry:
+    """All metrics of a process, by name."""
+
+    def __init__(self, sample_rate=1.0, enabled=True):
+        self.sample_rate = sample_rate
+        self.enabled = enabled
+        self.families = {}
+        self.gauges = {}  # name -> (help, callable returning a number or {label value: number}, label name)
+        self._lock = threading.Lock()
+
+    def _family(self, kind, name, help_text, labelnames, buckets=None):
+        with self._lock:
+            family = self.families.get(name)
+            if family is None:
+                family = self.families[name] = MetricFamily(self, kind, name, help_text, labelnames, buckets)
+            elif family.kind != kind or family.labelnames != tuple(labelnames):
+                raise ValueError(f"metric {name} already registered as a {family.kind} with {family.labelnames}")
+            return family
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._family("counter", name, help_text, labelnames)
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._family("histogram", name, help_text, labelnames, tuple(buckets))
+
+    def gauge(self, name, help_text, read, labelname=None):
+        """Register a value read at export time, e.g. a queue depth or cache size."""
+        with self._lock:
+            self.gauges[name] = (help_text, read, labelname)
+
+    def configure(self, sample_rate=None, enabled=None):
+        if sample_rate is not None:
+            self.sample_rate = min(1.0, max(0.0, sample_rate))
+        if enabled is not None:
+            self.enabled = enabled
+
+    def reset(self):
+        """Zero every metric in place (families, children and gauges stay registered).
+
+        Modules bind children once at import (e.g. OUTCOMES in master_agent.py), so
+        dropping them would leave those objects counting outside the registry.
+        """
+        with self._lock:
+            for family in self.families.values():
+                for child in list(family.children.values()):
+                    child.reset()
+
+    def _read_gauges(self):
+        for name, (help_text, read, labelname) in list(self.gauges.items()):
+            try:
+                value = read()
+            except Exception as e:  # a broken gauge must not break the export
+                logging.error(f"❌ Could not read gauge {name}: {e}")
+                continue
+            yield name, help_text, labelname, value
+
+    def render_prometheus(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for family in list(self.families.values()):
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for values, child in sorted(family.children.items()):
+                labels = list(zip(family.labelnames, values))
+                if family.kind == "counter":
+                    lines.append(f"{family.name}{_labels(labels)} {child.value}")
+                    continue
+                with child._lock:
+                    counts, total, count = list(child.counts), child.sum, child.count
+                cumulative = 0
+                for bound, bucket_count in zip(family.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{family.name}_bucket{_labels(labels + [('le', le)])} {cumulative}")
+                lines.append(f"{family.name}_sum{_labels(labels)} {total!r}")
+                lines.append(f"{family.name}_count{_labels(labels)} {count}")
+        for name, help_text, labelname, value in self._read_gauges():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            if isinstance(value, dict):
+                for label, item in sorted(value.items()):
+                    lines.append(f"{name}{_labels([(labelname or 'key', label)])} {item}")
+            else:
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """Metrics as a JSON-friendly dict; histograms include p50/p90/p99 estimates in milliseconds."""
+        result = {"sample_rate": self.sample_rate, "enabled": self.enabled, "metrics": {}}
+        for family in list(self.families.values()):
+            samples = []
+            for values, child in sorted(family.children.items()):
+                sample = {"labels": dict(zip(family.labelnames, values))}
+                if family.kind == "counter":
+                    sample["value"] = child.value
+                else:
+                    sample.update({
+                        "count": child.count,
+                        "sum_s": round(child.sum, 6),
+                        "mean_ms": round(child.sum / child.count * 1000, 4) if child.count else 0.0,
+                        "p50_ms": round(child.quantile(0.5) * 1000, 4),
+                        "p90_ms": round(child.quantile(0.9) * 1000, 4),
+                        "p99_ms": round(child.quantile(0.99) * 1000, 4),
+                    })
+                samples.append(sample)
+            result["metrics"][family.name] = {"type": family.kind, "help": family.help, "samples": samples}
+        for name, help_text, labelname, value in self._read_gauges():
+            result["metrics"][name] = {"type": "gauge", "help": help_text, "value": value}
+        return result
+
+    def dump_json(self, path):
+        """Write snapshot() to a file ('-' for stdout)."""
+        text = json.dumps(self.snapshot(), indent=2, ensure_ascii=False)
+        if path == "-":
+            print(text)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics():
+    """Return the process-wide metrics registry."""
+    return _registry
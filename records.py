@@ -0,0 +1,73 @@
+"""Compact record types shared by the agents.
+
+SQLite hands back a new str object for every column of every row, so a cache
+of 100k users holds 100k copies of "Student". Records here use __slots__ (no
+per-instance dict, and smaller than a NamedTuple) and intern their
+low-cardinality fields (role, leave type, status and event type), so every
+record shares one string object per value. They still unpack, index and compare
+like the tuples they replace.
+"""
+import sys
+
+
+def _intern(value):
+    """sys.intern for the low-cardinality fields, which may also be NULL."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Record:
+    """Base for slotted records: tuple-style unpacking, indexing, equality and repr over the slots."""
+    __slots__ = ()
+
+    def __iter__(self):
+        for field in self.__slots__:
+            yield getattr(self, field)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __getitem__(self, index):
+        return getattr(self, self.__slots__[index])
+
+    def __eq__(self, other):
+        if isinstance(other, (Record, tuple)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{field}={getattr(self, field)!r}' for field in self.__slots__)})"
+
+
+class UserRecord(Record):
+    """A row of the users table."""
+    __slots__ = ("user_id", "name", "role")
+
+    def __init__(self, user_id, name, role):
+        self.user_id = user_id
+        self.name = name
+        self.role = _intern(role)  # 'Student' or 'Employee'
+
+
+class CalendarEvent(Record):
+    """A row of the academic_events table."""
+    __slots__ = ("event_date", "event_name", "event_type")
+
+    def __init__(self, event_date, event_name, event_type):
+        self.event_date = event_date  # YYYY-MM-DD
+        self.event_name = event_name
+        self.event_type = _intern(event_type)  # normalized, see academic_calendar.normalize_event_type()
+
+
+class LeaveRecord(Record):
+    """A leave request: employee, type, inclusive dates and status."""
+    __slots__ = ("employee_id", "leave_type", "start_date", "end_date", "status")
+
+    def __init__(self, employee_id, leave_type, start_date, end_date, status):
+        self.employee_id = employee_id
+        self.leave_type = _intern(leave_type)
+        self.start_date = start_date
+        self.end_date = end_date
+        self.status = _intern(status)
@@ -0,0 +1,274 @@
+"""Write-behind journal for agent writes, group-committed to SQLite.
+
+    journal = configure_journal("request_journal.jsonl")
+    journal.register("leave", database, apply_leave_rows)   # replays unapplied entries
+    journal.append("leave", "EMP001", row)                  # returns once the line is written
+    journal.barrier("leave", "EMP001")                      # before reading EMP001's rows
+
+Each append writes one JSON line to the journal file and returns; a background
+thread applies pending entries every `flush_interval` seconds (or as soon as
+`max_batch` are waiting) in one transaction per component, recording the last
+applied sequence number in the same transaction. On startup, register() replays
+entries newer than that number, so a process that dies between append and
+commit loses nothing. The journal file is fsynced once per group: like
+`synchronous=NORMAL`, an OS crash can lose the last window, a process crash cannot.
+
+Reads that must see a user's own writes call barrier(kind, key) first, which
+commits that key's pending entries (and everything queued with them) right away.
+A journal file belongs to one process. Processes sharing a database (the
+shard workers of shard_pool.py) each get their own file and a `name`, which
+keeps their applied sequence numbers apart in request_journal_state.
+"""
+import json
+import os
+import sqlite3
+import atexit
+import threading
+import logging
+
+from metrics import get_metrics
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Bump when create_state_table changes
+JOURNAL_SCHEMA_VERSION = 1
+
+# Rewrite the journal as a single checkpoint line once it grows past this and everything is applied
+COMPACT_BYTES = 4 << 20
+
+GROUP_COMMIT_SECONDS = get_metrics().histogram("office_agent_journal_group_commit_seconds",
+                                               "Time to apply one group of journal entries", ("kind",))
+
+
+class RequestJournal:
+    """Append-only JSONL journal with a background group-commit writer."""
+
+    def __init__(self, path="request_journal.jsonl", flush_interval=0.05, max_batch=512, name=None):
+        self.path = path
+        self.name = name
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.handlers = {}       # kind -> (database, apply(conn, payloads))
+        self._pending = []       # [(seq, kind, key, payload)] appended, not yet applied
+        self._pending_keys = {}  # (kind, key) -> number of pending entries
+        self._recovered = []     # entries read at startup for kinds not registered yet
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._closed = False
+        self.seq = 0
+        self.appended = 0
+        self.applied = 0
+        self.groups = 0
+        self.replayed = 0
+        self._load()
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._writer = threading.Thread(target=self._run, name="journal-writer", daemon=True)
+        self._writer.start()
+
+    def _load(self):
+        """Read entries left by a previous run; a torn last line is ignored."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+        for line_number, line in enumerate(lines, 1):
+            try:
+                entry = json.loads(line)
+                seq = entry["seq"]
+            except (ValueError, KeyError, TypeError):
+                logging.warning(f"⚠️ Skipping unreadable journal line {line_number} in {self.path}.")
+                continue
+            self.seq = max(self.seq, seq)
+            if entry.get("kind") != "checkpoint":
+                self._recovered.append((seq, entry["kind"], entry.get("key"), entry.get("payload")))
+
+    def create_state_table(self, database):
+        """Create the table recording the last journal entry applied to a database, per component."""
+        with database.transaction() as conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS request_journal_state (
+                                kind TEXT PRIMARY KEY,
+                                last_applied_seq INTEGER NOT NULL
+                            )''')
+
+    def state_key(self, kind):
+        """Row of request_journal_state holding this journal's progress for `kind`."""
+        return f"{self.name}/{kind}" if self.name else kind
+
+    def register(self, kind, database, apply):
+        """Route `kind` entries to apply(conn, payloads) on `database`, replaying any not yet applied."""
+        database.ensure_schema("request_journal", JOURNAL_SCHEMA_VERSION, lambda: self.create_state_table(database))
+        with self._flush_lock:
+            self.handlers[kind] = (database, apply)
+            with self._lock:
+                entries = [entry for entry in self._recovered if entry[1] == kind]
+                self._recovered = [entry for entry in self._recovered if entry[1] != kind]
+            if not entries:
+                return
+            row = database.fetchone("SELECT last_applied_seq FROM request_journal_state WHERE kind=?",
+                                     (self.state_key(kind),))
+            entries = [entry for entry in entries if entry[0] > (row[0] if row else 0)]
+            if not entries:
+                return
+            try:
+                self._apply(kind, entries)
+            except sqlite3.Error as e:
+                logging.error(f"❌ Database error while replaying {kind} journal entries: {e}")
+                with self._lock:
+                    self._recovered.extend(entries)  # kept in the file until a later start applies them
+                return
+            self.replayed += len(entries)
+            logging.info(f"🔁 Replayed {len(entries)} {kind} journal entries from {self.path}.")
+
+    def append(self, kind, key, payload):
+        """Journal one write; it reaches the database with the next group commit. Returns its sequence number."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("request journal is closed")
+            self.seq += 1
+            self._file.write(json.dumps({"seq": self.seq, "kind": kind, "key": key, "payload": payload},
+                                        ensure_ascii=False) + "\n")
+            self._file.flush()
+            self._pending.append((self.seq, kind, key, payload))
+            self._pending_keys[(kind, key)] = self._pending_keys.get((kind, key), 0) + 1
+            self.appended += 1
+            if len(self._pending) >= self.max_batch:
+                self._wakeup.notify()
+            return self.seq
+
+    def barrier(self, kind, key):
+        """Commit pending writes now if `key` has any, so a following read sees them."""
+        if self._pending_keys.get((kind, key)):
+            self.flush()
+
+    def flush(self):
+        """Apply every pending entry, one transaction per kind."""
+        with self._flush_lock:
+            with self._lock:
+                entries, self._pending = self._pending, []
+            if not entries:
+                return 0
+            os.fsync(self._file.fileno())  # appends already flushed their lines; compaction needs _flush_lock
+            by_kind = {}
+            for entry in entries:
+                by_kind.setdefault(entry[1], []).append(entry)
+            failed = []
+            for kind, group in by_kind.items():
+                if kind not in self.handlers:
+                    logging.error(f"❌ No journal handler registered for {kind}; keeping {len(group)} entries.")
+                    failed.extend(group)
+                    continue
+                try:
+                    self._apply(kind, group)
+                except sqlite3.Error as e:
+                    logging.error(f"❌ Database error while applying {kind} journal entries: {e}")
+                    failed.extend(group)
+            failed_kinds = {entry[1] for entry in failed}
+            with self._lock:
+                for _, kind, key, _ in entries:
+                    if kind in failed_kinds:
+                        continue
+                    count = self._pending_keys[(kind, key)] - 1
+                    if count:
+                        self._pending_keys[(kind, key)] = count
+                    else:
+                        del self._pending_keys[(kind, key)]
+                self._pending[:0] = failed  # retried with the next group
+                if not self._pending and not self._recovered and self._file.tell() > COMPACT_BYTES:
+                    self._compact()
+            self.applied += len(entries) - len(failed)
+            self.groups += 1
+            return len(entries) - len(failed)
+
+    def _apply(self, kind, entries):
+        database, apply = self.handlers[kind]
+        with GROUP_COMMIT_SECONDS.labels(kind).time(), database.transaction() as conn:
+            apply(conn, [payload for _, _, _, payload in entries])
+            conn.execute('''INSERT INTO request_journal_state (kind, last_applied_seq) VALUES (?, ?)
+                            ON CONFLICT (kind) DO UPDATE SET last_applied_seq = excluded.last_applied_seq''',
+                         (self.state_key(kind), entries[-1][0]))
+
+    def _compact(self):
+        """Replace the fully applied journal with one checkpoint line keeping the sequence number; caller holds the lock."""
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"seq": self.seq, "kind": "checkpoint"}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        os.replace(temp_path, self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._closed:
+                    return
+                if len(self._pending) < self.max_batch:
+                    self._wakeup.wait(self.flush_interval)
+            self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "appended": self.appended,
+                "applied": self.applied,
+                "groups": self.groups,
+                "replayed": self.replayed,
+                "recovered_unregistered": len(self._recovered),
+            }
+
+    def close(self):
+        """Stop the writer and commit whatever is still pending."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wakeup.notify()
+        self._writer.join()
+        self.flush()
+        with self._lock:
+            self._file.close()
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def configure_journal(path="request_journal.jsonl", flush_interval=0.05, max_batch=512, name=None):
+    """Turn on write-behind journaling for agents created from now on; returns the journal."""
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = RequestJournal(path, flush_interval, max_batch, name)
+            atexit.register(_journal.close)
+            get_metrics().gauge("office_agent_journal", "Request journal entries by state", _journal.stats, "state")
+        return _journal
+
+
+def get_journal():
+    """Return the process journal, or None when writes go straight to the database."""
+    return _journal
+
+
+def close_journal():
+    """Commit pending entries and turn journaling off again."""
+    global _journal
+    with _journal_lock:
+        journal, _journal = _journal, None
+    if journal is not None:
+        journal.close()
+        atexit.unregister(journal.close)
+
+
+def _forget_after_fork():
+    """A forked child has no writer thread; the parent's journal and its pending entries stay the parent's."""
+    global _journal, _journal_lock
+    _journal = None
+    _journal_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_after_fork)
@@ -0,0 +1,202 @@
+"""Router-level cache of responses to read-only queries.
+
+Certificate verifications and calendar lookups are pure reads that users repeat
+(students check the same thing many times around a deadline). MasterAgent
+looks each query up here after validating the user, so a repeated read skips
+classification, the agent and SQLite:
+
+- Entries are keyed by the normalized slots that decide the answer:
+  ("certificate", role, user_id, certificate type) for verifications, and
+  ("academic", role, query text, today's date) for calendar queries, since
+  "upcoming" answers move with the date. The text -> slots mapping is memoized
+  too, which is what lets a hit skip parse_query.
+- Each intent has its own TTL (DEFAULT_TTLS).
+- Writes invalidate by tag: CertificateAgent stores ("certificate", user_id),
+  and AcademicCalendar reloads ("academic",). Writes made by other processes
+  show up within the TTL, or sooner when an uncached calendar query notices
+  the new calendar version.
+- The cache is an LRU bounded by entry count and by approximate bytes.
+
+Leave queries, certificate generation and multi-intent queries are never cached.
+"""
+import datetime
+import threading
+import time
+import logging
+from collections import OrderedDict
+
+from metrics import get_metrics
+from user_directory import normalize_user_id
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Seconds a cached response stays valid, per intent
+DEFAULT_TTLS = {
+    "certificate": 30,
+    "academic": 300,
+}
+
+# Rough per-entry cost of the key, tuple and dict slots besides the response text
+ENTRY_OVERHEAD_BYTES = 200
+
+# Memo value for query texts whose answers must not be cached
+_UNCACHEABLE = ("", (), False)
+
+
+def describe(parsed):
+    """Return (intent, slots, per_user) for a cacheable read-only query, or _UNCACHEABLE."""
+    if len(parsed.intents) != 1:
+        return _UNCACHEABLE
+    if parsed.intent == "certificate" and parsed.verify and parsed.certificate_type:
+        return "certificate", (parsed.certificate_type,), True
+    if parsed.intent == "academic":
+        return "academic", (parsed.text.strip(),), False
+    return _UNCACHEABLE
+
+
+class ResponseCache:
+    """LRU of (expires_at, response, tag, size) by normalized request key, with tag invalidation."""
+
+    def __init__(self, ttls=None, max_entries=10000, max_bytes=16 << 20):
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, response, tag, size)
+        self._tags = {}                # tag -> set of keys
+        self._queries = OrderedDict()  # lower-cased query -> describe() result
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.generation = 0  # bumped by every invalidation; see stamp()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _key(self, description, user_id, role):
+        intent, slots, per_user = description
+        if per_user:
+            return (intent, role, normalize_user_id(user_id)) + slots, (intent, normalize_user_id(user_id))
+        return (intent, role) + slots + (datetime.date.today(),), (intent,)
+
+    def get(self, user_id, role, query):
+        """Return the cached response for this user's query, or None."""
+        now = time.monotonic()
+        with self._lock:
+            description = self._queries.get(query.lower())
+            if description is _UNCACHEABLE:
+                return None
+            if description is None:
+                self.misses += 1
+                return None
+            key, _ = self._key(description, user_id, role)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= now:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def stamp(self):
+        """Take before answering a query; put() skips the store if anything was invalidated since."""
+        return self.generation
+
+    def put(self, user_id, role, query, parsed, response, stamp):
+        """Cache an agent's response to a parsed query if the query is a read."""
+        description = describe(parsed)
+        with self._lock:
+            self._queries[query.lower()] = description
+            self._queries.move_to_end(query.lower())
+            while len(self._queries) > self.max_entries:
+                self._queries.popitem(last=False)
+            if description is _UNCACHEABLE or stamp != self.generation:
+                return False
+            key, tag = self._key(description, user_id, role)
+            if key in self._entries:
+                self._remove(key)
+            size = len(response) + ENTRY_OVERHEAD_BYTES
+            self._entries[key] = (time.monotonic() + self.ttls.get(description[0], 0), response, tag, size)
+            self._tags.setdefault(tag, set()).add(key)
+            self.bytes += size
+            self.stores += 1
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+            return True
+
+    def _remove(self, key):
+        """Drop one entry and its tag index; caller holds the lock."""
+        _, _, tag, size = self._entries.pop(key)
+        keys = self._tags.get(tag)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._tags[tag]
+        self.bytes -= size
+
+    def invalidate(self, tag):
+        """Drop every entry carrying `tag`, e.g. ("certificate", "STU001") or ("academic",)."""
+        with self._lock:
+            self.generation += 1
+            keys = self._tags.pop(tag, ())
+            for key in keys:
+                _, _, _, size = self._entries.pop(key)
+                self.bytes -= size
+            self.invalidations += len(keys)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._tags.clear()
+            self._queries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Return the process-wide response cache, creating it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+            get_metrics().gauge("office_agent_response_cache", "Response cache statistics", _cache.stats, "stat")
+        return _cache
+
+
+def invalidate_responses(tag):
+    """Tell the response cache (if one exists) that data behind `tag` changed."""
+    if _cache is not None:
+        _cache.invalidate(tag)
+
+
+def clear_response_cache():
+    """Forget every cached response (e.g. after switching working directory)."""
+    if _cache is not None:
+        _cache.clear()
@@ -0,0 +1,251 @@
+"""Asynchronous HTTP front end for MasterAgent.route_query.
+
+    POST /query         {"user_id": "EMP001", "query": "apply 2 days sick leave"}
+                        -> 200 {"response": "..."}
+    GET  /health        -> 200 {"status": "ok", ...}
+    GET  /metrics       -> Prometheus text format (latency histograms and counters)
+    GET  /metrics.json  -> the same metrics as JSON, with p50/p90/p99 estimates
+
+Requests are handed to a bounded thread pool so SQLite and PDF work never block
+the event loop. When `max_pending` requests are already queued or running, new
+ones are rejected with 503 and a Retry-After header instead of piling up.
+
+With --processes N, requests go to N worker processes instead, by user ID
+(shard_pool.py). SIGHUP then restarts the workers one at a time. With
+--certificate-workers N, certificate requests are answered with a ticket and
+rendered in the background (certificate_queue.py).
+
+Usage: python server.py [--host 127.0.0.1] [--port 8080] [--workers 8] [--max-pending 256]
+                        [--metrics-sample-rate 1.0] [--no-request-log] [--journal request_journal.jsonl]
+                        [--storage office_agent.db] [--no-response-cache] [--processes 4]
+                        [--certificate-workers 2]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import signal
+from concurrent.futures import ThreadPoolExecutor
+
+from master_agent import MasterAgent
+from metrics import get_metrics, set_request_logging
+from request_journal import configure_journal, close_journal
+from certificate_queue import configure_certificate_queue, close_certificate_queue
+from shard_pool import ShardPool
+from storage import configure_storage
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 64 * 1024
+KEEPALIVE_TIMEOUT = 30
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 503: "Service Unavailable"}
+
+
+class AgentServer:
+    """Serves concurrent (user_id, query) requests over HTTP/1.1 with keep-alive."""
+
+    def __init__(self, master_agent=None, workers=8, max_pending=256, shards=None):
+        self.shards = shards  # a started ShardPool answers requests instead of master_agent
+        self.master = master_agent or (None if shards else MasterAgent())
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="agent-worker")
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.served = 0
+        self.rejected = 0
+        self.metrics = get_metrics()
+        self.metrics.gauge("office_agent_server_requests", "HTTP requests pending, served and rejected",
+                           lambda: {"pending": self.pending, "served": self.served, "rejected": self.rejected}, "state")
+
+    async def route(self, user_id, query):
+        """Run route_query on the worker pool, or reject if the queue is full."""
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            return 503, {"error": "Server busy, retry later."}
+        self.pending += 1
+        try:
+            if self.shards:
+                response = await asyncio.wrap_future(self.shards.submit(user_id, query))
+            else:
+                loop = asyncio.get_running_loop()
+                response = await loop.run_in_executor(self.executor, self.master.route_query, user_id, query)
+        finally:
+            self.pending -= 1
+        self.served += 1
+        return 200, {"response": response}
+
+    async def dispatch(self, method, path, body):
+        """Map a parsed HTTP request to (status, JSON payload)."""
+        if path == "/health":
+            health = {"status": "ok", "pending": self.pending, "served": self.served,
+                      "rejected": self.rejected, "workers": self.workers}
+            if self.shards:
+                health["shards"] = self.shards.stats()
+            return 200, health
+        if path == "/metrics":
+            return 200, self.metrics.render_prometheus()
+        if path == "/metrics.json":
+            return 200, self.metrics.snapshot()
+        if path != "/query":
+            return 404, {"error": f"Unknown path {path}"}
+        if method != "POST":
+            return 405, {"error": "Use POST /query"}
+        try:
+            request = json.loads(body or b"{}")
+            user_id = request["user_id"]
+            query = request["query"]
+        except (ValueError, KeyError, TypeError):
+            return 400, {"error": "Body must be JSON with 'user_id' and 'query'."}
+        if not isinstance(user_id, str) or not isinstance(query, str):
+            return 400, {"error": "'user_id' and 'query' must be strings."}
+        return await self.route(user_id, query)
+
+    async def handle_connection(self, reader, writer):
+        """Serve requests on one connection until the client closes it."""
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEPALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await self.respond(writer, 413, {"error": "Headers too large."}, keep_alive=False)
+                    return
+
+                request_line, _, header_block = head.decode("latin-1").partition("\r\n")
+                try:
+                    method, path, _version = request_line.split(" ", 2)
+                except ValueError:
+                    await self.respond(writer, 400, {"error": "Malformed request line."}, keep_alive=False)
+                    return
+                headers = {}
+                for line in header_block.split("\r\n"):
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+
+                length = headers.get("content-length") or "0"
+                if not (length.isascii() and length.isdigit()):  # not a number, or negative: readexactly() would raise unanswered
+                    await self.respond(writer, 400, {"error": "Invalid Content-Length."}, keep_alive=False)
+                    return
+                length = int(length)
+                if length > MAX_BODY_BYTES:
+                    await self.respond(writer, 413, {"error": "Body too large."}, keep_alive=False)
+                    return
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload = await self.dispatch(method, path.split("?", 1)[0], body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self.respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, payload, keep_alive=True):
+        """Send a JSON payload, or a str payload as Prometheus text."""
+        if isinstance(payload, str):
+            body, content_type = payload.encode("utf-8"), PROMETHEUS_CONTENT_TYPE
+        else:
+            body, content_type = json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8"
+        headers = [
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if status == 503:
+            headers.append("Retry-After: 1")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self, host="127.0.0.1", port=8080):
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+        if self.shards:
+            if hasattr(signal, "SIGHUP"):  # not on Windows
+                loop = asyncio.get_running_loop()
+                loop.add_signal_handler(signal.SIGHUP, lambda: loop.run_in_executor(None, self.shards.restart_all))
+            logging.info(f"🌐 Serving on http://{host}:{port} with {self.shards.processes} worker processes "
+                         f"(max {self.max_pending} pending, SIGHUP restarts them)")
+        else:
+            logging.info(f"🌐 Serving on http://{host}:{port} with {self.workers} workers (max {self.max_pending} pending)")
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        if self.shards:
+            self.shards.close()
+        else:
+            self.master.close()
+        close_certificate_queue()
+        close_journal()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=8, help="threads running route_query")
+    parser.add_argument("--max-pending", type=int, default=256, help="queued + running requests before 503")
+    parser.add_argument("--quiet", action="store_true", help="only log warnings and errors")
+    parser.add_argument("--lazy", action="store_true", help="create agents on their first request instead of at startup")
+    parser.add_argument("--metrics-sample-rate", type=float, default=1.0,
+                        help="fraction of calls timed into latency histograms (counters stay exact)")
+    parser.add_argument("--no-metrics", action="store_true", help="turn latency timers off")
+    parser.add_argument("--no-request-log", action="store_true", help="skip per-request log lines")
+    parser.add_argument("--journal", metavar="JSONL", help="journal leave/certificate writes here and group-commit them")
+    parser.add_argument("--journal-interval-ms", type=float, default=50, help="time between group commits")
+    parser.add_argument("--storage", metavar="DB", help="consolidated database built by `python storage.py migrate`")
+    parser.add_argument("--no-response-cache", action="store_true", help="answer every read query from the agents")
+    parser.add_argument("--processes", type=int, default=0,
+                        help="worker processes, requests sharded by user ID (0: serve from this process)")
+    parser.add_argument("--certificate-workers", type=int, default=0,
+                        help="render certificates on N background threads (per process), answering with a ticket")
+    args = parser.parse_args()
+
+    if args.quiet:
+        logging.getLogger().setLevel(logging.WARNING)
+    if args.no_request_log:
+        set_request_logging(False)
+    get_metrics().configure(sample_rate=args.metrics_sample_rate, enabled=not args.no_metrics)
+    if args.processes:
+        shards = ShardPool(args.processes, {
+            "storage": args.storage,
+            "journal": args.journal,
+            "journal_interval": args.journal_interval_ms / 1000,
+            "cache_responses": not args.no_response_cache,
+            "request_log": not args.no_request_log,
+            "log_level": logging.getLogger().level,
+            "metrics": not args.no_metrics,
+            "metrics_sample_rate": args.metrics_sample_rate,
+            "certificate_workers": args.certificate_workers,
+        }).start()
+        server = AgentServer(workers=args.workers, max_pending=args.max_pending, shards=shards)
+    else:
+        if args.storage:
+            configure_storage(args.storage)
+        if args.journal:
+            configure_journal(args.journal, flush_interval=args.journal_interval_ms / 1000)
+        if args.certificate_workers:
+            configure_certificate_queue(args.certificate_workers)
+        master = MasterAgent(preload=not args.lazy, cache_responses=not args.no_response_cache)
+        server = AgentServer(master, workers=args.workers, max_pending=args.max_pending)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("👋 Shutting down server...")
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
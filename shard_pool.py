@@ -0,0 +1,401 @@
+"""Multi-process serving: user IDs hashed to worker processes, each with its own MasterAgent.
+
+One MasterAgent is bound to one core by the GIL, and its agents spend much of
+each request in Python (parsing, policy checks, PDF rendering). ShardPool runs
+`processes` workers, each with its own agents, connection pools, caches and
+(with a journal) its own journal file, and sends every request to the worker
+owning crc32(normalized user_id) % processes:
+
+- A user's requests always reach the same worker, in order, so the
+  read-check-write sequences of one employee (balance, overlap, insert) never
+  race another process, and the per-user response cache and user directory
+  entries stay correct without cross-process invalidation.
+- Workers share the SQLite files. WAL lets their reads run alongside the one
+  writer and busy_timeout queues the writers; with --journal each worker
+  group-commits, so writers take the lock once per group instead of per request.
+- Worker 0 starts (and creates or migrates the schemas) before the others.
+- restart(shard) is graceful: the old worker finishes what it was sent, flushes
+  its journal and exits, then its replacement takes the requests queued
+  meanwhile. restart_all() rolls through every shard, one at a time. A worker
+  that dies is replaced the same way; only its in-flight requests fail, and
+  its journal replays on the replacement's startup.
+
+Journal files are per shard, so restart with the same --processes count after
+a crash, or the orphaned files are not replayed (a warning names them).
+
+    pool = ShardPool(processes=4, settings={"journal": "request_journal.jsonl"})
+    pool.start()
+    pool.route_query("EMP001", "apply 2 days sick leave")
+    pool.close()
+"""
+import atexit
+import glob
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+
+from metrics import get_metrics
+from user_directory import normalize_user_id
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Seconds a worker may take to start, or to drain its queue when stopped, before it is killed
+START_TIMEOUT = 60
+STOP_TIMEOUT = 30
+
+# How often the dispatcher checks for dead workers while no results arrive
+MONITOR_INTERVAL = 0.5
+
+# Most queued requests a worker answers before sending their results back together
+MAX_DRAIN = 64
+
+WORKER_FAILED_RESPONSE = "❌ An unexpected error occurred."
+
+SHARD_EVENTS = get_metrics().counter("office_agent_shard_events_total", "Shard worker starts, restarts and crashes",
+                                     ("event",))
+
+
+def shard_for(user_id, shards):
+    """Shard owning `user_id`; stable across processes and runs (unlike hash())."""
+    if not isinstance(user_id, str):
+        return 0  # invalid requests are answered by any worker
+    return zlib.crc32(normalize_user_id(user_id).encode("utf-8")) % shards
+
+
+def shard_path(path, shard):
+    """Per-shard variant of a file name: request_journal.jsonl -> request_journal.shard2.jsonl."""
+    root, ext = os.path.splitext(path)
+    return f"{root}.shard{shard}{ext}"
+
+
+def serve_shard(shard, requests, results, settings):
+    """Worker process: answer (request_id, kind, payload) messages until a None arrives."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C stops the dispatcher, which drains the workers
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)  # a rolling restart is the dispatcher's job
+    if settings.get("log_level"):
+        logging.getLogger().setLevel(settings["log_level"])
+
+    from master_agent import MasterAgent
+    from metrics import set_request_logging
+    from request_journal import configure_journal, close_journal
+    from certificate_queue import configure_certificate_queue, close_certificate_queue
+    from storage import configure_storage
+    import database
+
+    if not settings.get("request_log", True):
+        set_request_logging(False)
+    get_metrics().configure(sample_rate=settings.get("metrics_sample_rate", 1.0),
+                            enabled=settings.get("metrics", True))
+    if settings.get("storage"):
+        configure_storage(settings["storage"])
+    if settings.get("journal"):
+        configure_journal(shard_path(settings["journal"], shard), flush_interval=settings.get("journal_interval", 0.05),
+                          name=f"shard{shard}")
+    if settings.get("certificate_workers"):
+        configure_certificate_queue(settings["certificate_workers"], owner=f"shard{shard}")
+    master = MasterAgent(preload=True, cache_responses=settings.get("cache_responses", True))
+    parent = os.getppid()
+    results.put(("ready", shard, os.getpid()))
+
+    try:
+        running = True
+        while running:
+            try:
+                messages = [requests.get(timeout=MONITOR_INTERVAL)]
+            except queue.Empty:
+                if os.getppid() != parent:  # the dispatcher died without stopping us
+                    break
+                continue
+            try:  # answer whatever else is already queued with one results message
+                while len(messages) < MAX_DRAIN and messages[-1] is not None:
+                    messages.append(requests.get_nowait())
+            except queue.Empty:
+                pass
+            if messages[-1] is None:
+                messages.pop()
+                running = False
+            answers = []
+            for request_id, kind, payload in messages:
+                try:
+                    if kind == "batch":
+                        response = list(master.route_batch(payload, len(payload)))
+                    else:
+                        response = master.route_query(*payload)
+                except Exception as e:
+                    logging.error(f"❌ Shard {shard} failed on a {kind} request: {e}")
+                    response = [WORKER_FAILED_RESPONSE] * len(payload) if kind == "batch" else WORKER_FAILED_RESPONSE
+                answers.append((request_id, response))
+            if answers:
+                results.put(("done", answers))
+    finally:
+        master.close()
+        close_certificate_queue()
+        close_journal()
+        database.close_all()
+        results.put(("stopped", shard, os.getpid()))
+
+
+class ShardWorker:
+    """One worker process and the queue feeding it."""
+
+    def __init__(self, context, shard, results, settings):
+        self.shard = shard
+        self.requests = context.Queue()
+        # Not a daemon: bulk certificate jobs start a render pool of their own
+        self.process = context.Process(target=serve_shard, args=(shard, self.requests, results, settings),
+                                       name=f"shard-{shard}")
+        self.ready = threading.Event()
+        self.stopped = threading.Event()  # its last result has been collected
+        self.stopping = False
+        self.served = 0
+
+
+class ShardPool:
+    """Dispatches requests to `processes` worker processes by user ID."""
+
+    def __init__(self, processes=None, settings=None, start_method="spawn"):
+        """`settings` configures each worker: storage, journal, journal_interval, cache_responses,
+        request_log, log_level, metrics, metrics_sample_rate, certificate_workers (as the server's flags do)."""
+        self.processes = processes or os.cpu_count() or 1
+        self.settings = dict(settings or {})
+        self.context = multiprocessing.get_context(start_method)
+        self.results = self.context.Queue()
+        self.workers = []
+        self._draining = []  # replaced workers still finishing their queue
+        self._futures = {}  # request_id -> (worker, Future)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._restart_lock = threading.Lock()
+        self._collector = None
+        self._closed = False
+        self._workers_stopped = threading.Event()
+        self.restarts = 0
+        self.crashes = 0
+        get_metrics().gauge("office_agent_shards", "Requests in flight per shard worker",
+                            self.pending_by_shard, "shard")
+
+    def start(self):
+        """Start the workers (shard 0 first, so schema setup happens once) and wait until they are ready."""
+        self._warn_orphaned_journals()
+        self.workers = [ShardWorker(self.context, shard, self.results, self.settings)
+                        for shard in range(self.processes)]
+        self._collector = threading.Thread(target=self._collect, name="shard-results", daemon=True)
+        self._collector.start()
+        atexit.register(self.close)
+        try:
+            self._launch(self.workers[0])
+            for worker in self.workers[1:]:
+                worker.process.start()
+            for worker in self.workers[1:]:
+                self._await_ready(worker)
+        except RuntimeError:
+            self.close()
+            raise
+        SHARD_EVENTS.labels("start").inc(self.processes)
+        logging.info(f"✅ Started {self.processes} shard workers.")
+        return self
+
+    def _launch(self, worker):
+        worker.process.start()
+        self._await_ready(worker)
+
+    def _await_ready(self, worker):
+        deadline = time.monotonic() + START_TIMEOUT
+        while not worker.ready.wait(MONITOR_INTERVAL):
+            if not worker.process.is_alive():
+                raise RuntimeError(f"shard {worker.shard} exited with code {worker.process.exitcode} while starting")
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"shard {worker.shard} did not start within {START_TIMEOUT} s")
+
+    def _warn_orphaned_journals(self):
+        journal = self.settings.get("journal")
+        if not journal:
+            return
+        root, ext = os.path.splitext(journal)
+        for path in glob.glob(f"{glob.escape(root)}.shard*{ext}"):
+            suffix = path[len(root) + len(".shard"):len(path) - len(ext)]
+            if suffix.isdigit() and int(suffix) >= self.processes and os.path.getsize(path):
+                logging.warning(f"⚠️ {path} belongs to a shard beyond --processes {self.processes}; "
+                                f"its unapplied writes are only replayed by a pool with more workers.")
+
+    def submit(self, user_id, query):
+        """Queue one request on its user's shard; returns a Future for the response."""
+        return self._send(shard_for(user_id, self.processes), "query", (user_id, query))
+
+    def _send(self, shard, kind, payload):
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("shard pool is closed")
+            worker = self.workers[shard]
+            request_id = next(self._ids)
+            self._futures[request_id] = (worker, future)
+        worker.requests.put((request_id, kind, payload))
+        return future
+
+    def route_query(self, user_id, query):
+        """Same contract as MasterAgent.route_query, answered by the user's shard."""
+        return self.submit(user_id, query).result()
+
+    def route_batch(self, requests, chunk_size=1000):
+        """Same contract as MasterAgent.route_batch: each chunk is split by shard and routed in parallel."""
+        chunk = []
+        for request in requests:
+            chunk.append(request)
+            if len(chunk) >= chunk_size:
+                yield from self._route_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield from self._route_chunk(chunk)
+
+    def _route_chunk(self, chunk):
+        by_shard = {}  # shard -> [index]
+        for index, (user_id, _) in enumerate(chunk):
+            by_shard.setdefault(shard_for(user_id, self.processes), []).append(index)
+        futures = [(indexes, self._send(shard, "batch", [chunk[index] for index in indexes]))
+                   for shard, indexes in by_shard.items()]
+        responses = [None] * len(chunk)
+        for indexes, future in futures:
+            for index, response in zip(indexes, future.result()):
+                responses[index] = response
+        return responses
+
+    def _collect(self):
+        """Dispatcher thread: resolve futures from worker results and replace workers that die."""
+        next_check = time.monotonic() + MONITOR_INTERVAL
+        while True:
+            try:
+                message = self.results.get(timeout=MONITOR_INTERVAL)
+            except queue.Empty:
+                if self._workers_stopped.is_set():  # close() has collected every worker's last results
+                    return
+                message = ()
+            if time.monotonic() >= next_check:  # also under load, when results never stop arriving
+                self._check_workers()
+                next_check = time.monotonic() + MONITOR_INTERVAL
+            if not message:
+                continue
+            if message[0] == "done":
+                with self._lock:
+                    resolved = [(self._futures.pop(request_id, (None, None)), response)
+                                for request_id, response in message[1]]
+                for (worker, future), response in resolved:
+                    if future is not None:
+                        worker.served += 1
+                        future.set_result(response)
+            else:
+                with self._lock:
+                    workers = self.workers + self._draining
+                for worker in workers:
+                    if worker.shard == message[1] and worker.process.pid == message[2]:
+                        (worker.ready if message[0] == "ready" else worker.stopped).set()
+
+    def _check_workers(self):
+        for worker in list(self.workers):
+            if worker.process.is_alive() or worker.stopping or worker.process.exitcode is None:
+                continue
+            worker.stopping = True
+            self.crashes += 1
+            SHARD_EVENTS.labels("crash").inc()
+            logging.error(f"❌ Shard {worker.shard} worker exited with code {worker.process.exitcode}; replacing it.")
+            threading.Thread(target=self._replace, args=(worker,), name=f"shard-{worker.shard}-restart",
+                             daemon=True).start()
+
+    def _fail_pending(self, worker):
+        """Answer a dead worker's in-flight requests with an error, once its remaining results are in."""
+        worker.stopped.wait(MONITOR_INTERVAL)
+        with self._lock:
+            failed = [(request_id, future) for request_id, (owner, future) in self._futures.items() if owner is worker]
+            for request_id, _ in failed:
+                del self._futures[request_id]
+        for _, future in failed:
+            future.set_result(WORKER_FAILED_RESPONSE)
+        if failed:
+            logging.error(f"❌ {len(failed)} requests lost with shard {worker.shard}.")
+
+    def _replace(self, old):
+        """Swap in a new worker for `old`'s shard; it starts once `old` has drained and exited."""
+        with self._restart_lock:
+            with self._lock:
+                if self._closed or self.workers[old.shard] is not old:
+                    return
+                new = ShardWorker(self.context, old.shard, self.results, self.settings)
+                self.workers[old.shard] = new  # requests queue up for the new worker from here on
+                self._draining.append(old)
+                old.stopping = True
+            if old.process.is_alive():
+                old.requests.put(None)
+                old.process.join(STOP_TIMEOUT)
+                if old.process.is_alive():
+                    logging.error(f"❌ Shard {old.shard} did not stop within {STOP_TIMEOUT} s; killing it.")
+                    old.process.kill()
+                    old.process.join()
+            self._fail_pending(old)
+            with self._lock:
+                self._draining.remove(old)
+            self._launch(new)
+            SHARD_EVENTS.labels("restart").inc()
+
+    def restart(self, shard):
+        """Gracefully replace one shard's worker (e.g. after a deploy); its users' requests wait, none fail."""
+        started = time.perf_counter()
+        self._replace(self.workers[shard])
+        self.restarts += 1
+        logging.info(f"🔁 Restarted shard {shard} in {time.perf_counter() - started:.2f} s.")
+
+    def restart_all(self):
+        """Rolling restart: one shard at a time, so the others keep serving."""
+        for shard in range(self.processes):
+            self.restart(shard)
+
+    def pending_by_shard(self):
+        with self._lock:
+            pending = {str(worker.shard): 0 for worker in self.workers}
+            for worker, _ in self._futures.values():
+                pending[str(worker.shard)] += 1
+        return pending
+
+    def stats(self):
+        pending = self.pending_by_shard()
+        return {
+            "processes": self.processes,
+            "restarts": self.restarts,
+            "crashes": self.crashes,
+            "shards": [{"shard": worker.shard, "pid": worker.process.pid, "alive": worker.process.is_alive(),
+                        "pending": pending.get(str(worker.shard), 0), "served": worker.served}
+                       for worker in list(self.workers)],
+        }
+
+    def close(self):
+        """Let every worker finish its queue, flush its journal and exit."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            workers = list(self.workers)
+        for worker in workers:
+            worker.stopping = True
+            if worker.process.is_alive():
+                worker.requests.put(None)
+        for worker in workers:
+            if worker.process.pid is None:
+                continue
+            worker.process.join(STOP_TIMEOUT)
+            if worker.process.is_alive():
+                logging.error(f"❌ Shard {worker.shard} did not stop within {STOP_TIMEOUT} s; killing it.")
+                worker.process.kill()
+                worker.process.join()
+            self._fail_pending(worker)
+        self._workers_stopped.set()
+        if self._collector is not None:
+            self._collector.join()
+        atexit.unregister(self.close)
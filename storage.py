@@ -0,0 +1,170 @@
+"""Consolidated storage: every table in one SQLite file.
+
+The agents were written against three files (users.db with the certificates
+table, leave_requests.db and academic_data.db), so a routed request opened
+several connections and nothing could be joined or committed together.
+configure_storage() aliases those file names to one database; the agents keep
+asking for their old file names, get the shared pool and create their own
+tables in it as they would in their own files. The versioned migrations here
+only add what spans several agents.
+
+    python storage.py migrate [--target office_agent.db] [--chunk-size 5000]
+
+copies the existing files across (ATTACH, then keyset-paginated chunks of rows,
+one transaction per chunk) and is safe to re-run: rows are matched on their
+primary keys and the source wins. Run it with the service stopped (and its
+request journal flushed), then start server.py / master_agent.py with
+--storage office_agent.db.
+
+certificates.db is not imported: no code reads it, and its certificates table
+predates the current schema (student_id instead of user_id).
+"""
+import argparse
+import os
+import sqlite3
+import time
+import logging
+
+from database import get_database, alias_database
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+STORAGE_PATH = "office_agent.db"
+
+# Legacy files and the tables imported from each, in dependency order
+LEGACY_TABLES = (
+    ("users.db", ("users", "certificates")),
+    ("leave_requests.db", ("leave_requests",)),
+    ("academic_data.db", ("academic_events",)),
+)
+
+
+def create_agent_tables(path):
+    """Let every agent create its tables, indexes and triggers in `path`, as it does in its own file.
+
+    The agents' schema checks are the only copy of their DDL; the legacy file names are
+    aliased to `path` first so the agents (and the users table's MasterAgent) write there.
+    """
+    for legacy_path, _ in LEGACY_TABLES:
+        alias_database(legacy_path, path)
+    from master_agent import MasterAgent  # master_agent imports this module
+    MasterAgent(preload=True, cache_responses=False).close()
+
+
+def create_leave_view(conn):
+    """Leave requests with the requester's name and role, a join the split files could not do."""
+    conn.execute('''CREATE VIEW IF NOT EXISTS leave_requests_with_users AS
+                    SELECT leave_requests.*, users.name, users.role
+                    FROM leave_requests LEFT JOIN users ON users.user_id = leave_requests.employee_id''')
+
+
+# Append only: (version, description, apply(conn)); each step runs in its own transaction.
+# Version 1 created copies of the agents' tables; create_agent_tables() does that now.
+MIGRATIONS = (
+    (2, "leave_requests_with_users view", create_leave_view),
+)
+
+
+def open_storage(path=STORAGE_PATH):
+    """Return the pool for the consolidated file with the agents' tables and every migration applied.
+
+    Leaves the legacy file names aliased to `path` (see create_agent_tables).
+    """
+    create_agent_tables(path)
+    database = get_database(path)
+    database.migrate("storage", MIGRATIONS)
+    return database
+
+
+def configure_storage(path=STORAGE_PATH):
+    """Route the agents' legacy database names to one consolidated file (call before creating agents)."""
+    database = open_storage(path)
+    logging.info(f"✅ Using consolidated storage {path}.")
+    return database
+
+
+def reset_storage():
+    """Go back to one file per agent (for agents created from now on)."""
+    for legacy_path, _ in LEGACY_TABLES:
+        alias_database(legacy_path, None)
+
+
+def copy_table(conn, schema, table, chunk_size):
+    """Copy `schema`.`table` into the main database in rowid order, one transaction per chunk."""
+    target_columns = [row[1] for row in conn.execute(f"PRAGMA main.table_info({table})")]
+    source_columns = {row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table})")}
+    if not source_columns:
+        return 0
+    columns = ", ".join(column for column in target_columns if column in source_columns)
+    copied = 0
+    last_rowid = -1 << 63
+    while True:
+        with conn:
+            rows = conn.execute(f"SELECT rowid, {columns} FROM {schema}.{table} WHERE rowid > ? "
+                                f"ORDER BY rowid LIMIT ?", (last_rowid, chunk_size)).fetchall()
+            if not rows:
+                return copied
+            placeholders = ", ".join("?" * (len(rows[0]) - 1))
+            conn.executemany(f"INSERT OR REPLACE INTO main.{table} ({columns}) VALUES ({placeholders})",
+                             (row[1:] for row in rows))
+        last_rowid = rows[-1][0]
+        copied += len(rows)
+
+
+def migrate_legacy_files(target=STORAGE_PATH, source_dir=".", chunk_size=5000):
+    """Import the legacy files into `target`; returns {table: rows copied}."""
+    open_storage(target).close()  # create the schema through the pool, then copy on a private connection
+    conn = sqlite3.connect(target)  # `with conn` commits each chunk
+    conn.execute("PRAGMA journal_mode=WAL")
+    copied = {}
+    try:
+        for legacy_path, tables in LEGACY_TABLES:
+            path = os.path.join(source_dir, legacy_path)
+            if not os.path.exists(path):
+                logging.warning(f"⚠️ {path} not found, skipping.")
+                continue
+            conn.execute("ATTACH DATABASE ? AS legacy", (path,))
+            try:
+                for table in tables:
+                    started = time.perf_counter()
+                    copied[table] = copy_table(conn, "legacy", table, chunk_size)
+                    logging.info(f"📦 Copied {copied[table]} {table} rows from {legacy_path} "
+                                 f"in {time.perf_counter() - started:.2f} s.")
+            finally:
+                conn.execute("DETACH DATABASE legacy")
+        with conn:
+            # Older files predate the normalized event type column
+            conn.execute("UPDATE academic_events SET event_type_norm = lower(trim(event_type)) "
+                         "WHERE event_type_norm IS NOT lower(trim(event_type))")
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE name='academic_events_fts'").fetchone():
+                conn.execute("INSERT INTO academic_events_fts (academic_events_fts) VALUES ('rebuild')")
+    finally:
+        conn.close()
+    return copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("migrate",))
+    parser.add_argument("--target", default=STORAGE_PATH)
+    parser.add_argument("--source-dir", default=".", help="directory holding the legacy *.db files")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="rows copied per transaction")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    copied = migrate_legacy_files(args.target, args.source_dir, args.chunk_size)
+
+    # Let the agents add their indexes, triggers and caches, then recompute the leave ledger
+    from master_agent import MasterAgent
+    configure_storage(args.target)
+    master = MasterAgent(preload=True)
+    master.agents["leave"].rebuild_leave_balances()
+    master.close()
+    print(f"✅ Migrated {sum(copied.values())} rows into {args.target} in {time.perf_counter() - started:.2f} s "
+          f"({', '.join(f'{table}: {rows}' for table, rows in copied.items())}).")
+    print(f"   Start the service with --storage {args.target} to use it.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+import sqlite3
+import threading
+import time
+import logging
+from collections import OrderedDict
+
+from database import get_database
+from metrics import get_metrics
+from records import UserRecord
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+
+# Sentinel cached for user IDs that are not in the database
+_MISSING = object()
+
+# Bump when create_version_table changes
+USER_DIRECTORY_SCHEMA_VERSION = 1
+
+# Maximum number of IDs bound into one "user_id IN (...)" lookup
+IN_QUERY_CHUNK = 500
+
+# add_users() clears the whole cache instead of dropping IDs one by one past this many rows
+BULK_INVALIDATION_ROWS = 1000
+
+
+def normalize_user_id(user_id):
+    """Normalize user ID format (e.g. ' emp001' -> 'EMP001')."""
+    return user_id.strip().upper()
+
+
+class UserDirectory:
+    """LRU cache of user records in front of the users table.
+
+    Entries expire after `ttl` seconds (unknown IDs after `negative_ttl`). Writers
+    in this process call `invalidate()`; writes from other processes (e.g.
+    init_users.py) bump a trigger-maintained version that is polled at most once
+    every `check_interval` seconds and clears the cache when it changes.
+    """
+
+    def __init__(self, db_path="users.db", max_size=65536, ttl=600, negative_ttl=30, check_interval=1.0):
+        self.db_path = db_path
+        self.database = get_database(db_path)
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.check_interval = check_interval
+        self._entries = OrderedDict()  # user_id -> (expires_at, UserRecord or _MISSING)
+        self._lock = threading.Lock()
+        self._version = None
+        self._next_check = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.database.ensure_schema("user_directory", USER_DIRECTORY_SCHEMA_VERSION, self.create_version_table)
+        get_metrics().gauge("office_agent_user_directory", "User directory cache statistics", self.stats, "stat")
+
+    def create_version_table(self):
+        """Create the version counter bumped by any write to the users table."""
+        with self.database.transaction() as conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS user_directory_version (
+                                id INTEGER PRIMARY KEY CHECK (id = 1),
+                                version INTEGER NOT NULL
+                            )''')
+            conn.execute("INSERT OR IGNORE INTO user_directory_version (id, version) VALUES (1, 0)")
+            for event in ("INSERT", "UPDATE", "DELETE"):
+                conn.execute(f'''CREATE TRIGGER IF NOT EXISTS users_{event.lower()}_bump_version
+                                 AFTER {event} ON users
+                                 BEGIN
+                                     UPDATE user_directory_version SET version = version + 1 WHERE id = 1;
+                                 END''')
+
+    def _check_version(self, now):
+        """Clear the cache if the users table changed since the last poll."""
+        self._next_check = now + self.check_interval
+        try:
+            row = self.database.fetchone("SELECT version FROM user_directory_version WHERE id = 1")
+        except sqlite3.Error:
+            return
+        version = row[0] if row else None
+        if version != self._version:
+            if self._version is not None:
+                self._entries.clear()
+                self.invalidations += 1
+            self._version = version
+
+    def _cached(self, user_id, now):
+        """Look up a normalized ID in the cache; caller holds the lock. Returns (hit, record)."""
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            if entry[0] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return True, None if entry[1] is _MISSING else entry[1]
+            del self._entries[user_id]
+            self.expirations += 1
+        self.misses += 1
+        return False, None
+
+    def get(self, user_id):
+        """Return the UserRecord for a user ID, or None if the user does not exist."""
+        user_id = normalize_user_id(user_id)
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._next_check:
+                self._check_version(now)
+            hit, record = self._cached(user_id, now)
+        if hit:
+            return record
+
+        row = self.database.fetchone("SELECT user_id, name, role FROM users WHERE user_id=?", (user_id,))
+        record = UserRecord(user_id, row[1], row[2]) if row else None  # keyed and stored under one ID string
+        self._store(user_id, record, now)
+        return record
+
+    def get_many(self, user_ids):
+        """Return {normalized user ID: UserRecord or None}, fetching all cache misses with IN (...) queries."""
+        now = time.monotonic()
+        records = {}
+        missing = []
+        with self._lock:
+            if now >= self._next_check:
+                self._check_version(now)
+            for user_id in {normalize_user_id(user_id) for user_id in user_ids}:
+                hit, record = self._cached(user_id, now)
+                if hit:
+                    records[user_id] = record
+                else:
+                    missing.append(user_id)
+
+        for start in range(0, len(missing), IN_QUERY_CHUNK):
+            chunk = missing[start:start + IN_QUERY_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            found = {user_id: (name, role) for user_id, name, role in self.database.fetchall(
+                f"SELECT user_id, name, role FROM users WHERE user_id IN ({placeholders})", chunk)}
+            for user_id in chunk:
+                row = found.get(user_id)
+                record = records[user_id] = UserRecord(user_id, *row) if row else None
+                self._store(user_id, record, now)
+        return records
+
+    def _store(self, user_id, record, now):
+        ttl = self.ttl if record is not None else self.negative_ttl
+        with self._lock:
+            self._entries[user_id] = (now + ttl, _MISSING if record is None else record)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id=None):
+        """Drop one user (or the whole cache when no ID is given)."""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(normalize_user_id(user_id), None)
+            self.invalidations += 1
+
+    def add_users(self, users, replace=False):
+        """Insert (user_id, name, role) rows and invalidate their cache entries; returns the rows written."""
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        with self.database.transaction() as conn:
+            written = conn.executemany(f"{verb} INTO users (user_id, name, role) VALUES (?, ?, ?)", users).rowcount
+        if len(users) > BULK_INVALIDATION_ROWS:
+            self.invalidate()  # cheaper than one pop per user; the cache refills on demand
+        else:
+            for user in users:
+                self.invalidate(user[0])
+        return written
+
+    def stats(self):
+        """Return hit/miss counters and occupancy for sizing the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+_directories = {}
+_directories_lock = threading.Lock()
+
+
+def get_user_directory(db_path="users.db"):
+    """Return the user directory shared by every agent using this database."""
+    with _directories_lock:
+        directory = _directories.get(db_path)
+        if directory is None:
+            directory = _directories[db_path] = UserDirectory(db_path)
+        return directory
+
+
+def clear_user_directories():
+    """Forget all shared directories (e.g. after switching working directory)."""
+    with _directories_lock:
+        _directories.clear()